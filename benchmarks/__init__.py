@@ -0,0 +1 @@
+"""Performance benchmarks. Run from project root: python -m benchmarks.<name>"""
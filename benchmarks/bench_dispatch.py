@@ -0,0 +1,67 @@
+"""
+Measures overhead of binary operation dispatch per operation: getattr based duck typing
+(as it was implemented in MathPrimitive before) against DISPATCH_TABLE lookup
+Usage: python -m benchmarks.bench_dispatch
+"""
+
+import timeit
+from exceptions.math_exceptions import OperationIsNotSupported
+from math_types import Number, ComplexNumber, Matrix
+from math_types.math_primitive import DISPATCH_TABLE
+
+
+def legacy_dispatch(left, op, right):
+    try:
+        other_op_method = getattr(right, left._operations[op])
+        return other_op_method(left)
+    except AttributeError:
+        raise OperationIsNotSupported(left.__class__, op, type(right))
+
+
+def table_dispatch(left, op, right):
+    try:
+        implementation = DISPATCH_TABLE[left.__class__, op, right.__class__]
+    except KeyError:
+        implementation = None
+    if implementation is None:
+        raise OperationIsNotSupported(left.__class__, op, type(right))
+    return implementation(right, left)
+
+
+def measure(stmt, number, repeat, **names):
+    """
+    :return: best time of stmt in nanoseconds
+    """
+    return min(timeit.repeat(stmt, globals=names, number=number, repeat=repeat)) / number * 1e9
+
+
+def run(number=100000, repeat=15):
+    """
+    Overhead is time of dispatched operation minus time of direct call of its implementation
+    """
+    cases = [
+        ("Number + Number", Number(3), "+", Number(4)),
+        ("Number * ComplexNumber", Number(3), "*", ComplexNumber(1, 2)),
+        ("Matrix * Number", Matrix(1, 1, [[Number(1)]]), "*", Number(2)),
+    ]
+    print("{:>24} {:>10} {:>18} {:>16}".format("operation", "impl, ns", "getattr overhead", "table overhead"))
+    for name, left, op, right in cases:
+        implementation = DISPATCH_TABLE[left.__class__, op, right.__class__]
+        names = dict(left=left, op=op, right=right, implementation=implementation,
+                     legacy_dispatch=legacy_dispatch, table_dispatch=table_dispatch)
+        direct = measure("implementation(right, left)", number, repeat, **names)
+        legacy = measure("legacy_dispatch(left, op, right)", number, repeat, **names)
+        table = measure("table_dispatch(left, op, right)", number, repeat, **names)
+        print("{:>24} {:>10.0f} {:>15.0f} ns {:>13.0f} ns".format(name, direct, legacy - direct, table - direct))
+
+    # unsupported pair: getattr fails inside try block, table rejects by lookup
+    names = dict(left=ComplexNumber(1, 2), op="%", right=Number(2), OperationIsNotSupported=OperationIsNotSupported,
+                 legacy_dispatch=legacy_dispatch, table_dispatch=table_dispatch)
+    stmt = "try:\n    {}(left, op, right)\nexcept OperationIsNotSupported:\n    pass"
+    legacy = measure(stmt.format("legacy_dispatch"), number, repeat, **names)
+    table = measure(stmt.format("table_dispatch"), number, repeat, **names)
+    print("{:>24} {:>10} {:>15.0f} ns {:>13.0f} ns".format("ComplexNumber % Number", "-", legacy, table))
+
+
+if __name__ == "__main__":
+    run()
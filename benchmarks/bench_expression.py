@@ -0,0 +1,53 @@
+"""
+Compares compiled postfix evaluation of Expression with bracket reduction on long generated expressions
+Usage: python -m benchmarks.bench_expression
+"""
+
+import random
+import timeit
+import fuzzy_tester
+from interpreter import Interpreter
+from math_types import Expression
+from parsing.tokenizer import Tokenizer
+from parsing.parser import Parser
+from exceptions import MathException, EvalException, ParsingError
+
+
+def generate_long_expression(interpreter, min_tokens):
+    """
+    Joins random valid expressions from fuzzy_tester until expression is long enough
+
+    :return: Expression
+    """
+    tokenizer, parser = Tokenizer(), Parser()
+    parts, length = [], 0
+    while length < min_tokens:
+        part = fuzzy_tester.generate_math_expression()
+        if "[" in part or "^" in part:
+            continue
+        try:
+            interpreter.eval_string(part)
+        except (MathException, EvalException, ParsingError, ArithmeticError):
+            continue
+        parts.append("(" + part + ")")
+        length += len(tokenizer.tokenize(part)) + 3
+    return Expression(parser.parse(tokenizer.tokenize(" + ".join(parts))))
+
+
+def run(sizes=(100, 1000, 5000, 20000), repeat=3):
+    random.seed(42)
+    interpreter = Interpreter()
+    variables, functions = interpreter._variables, interpreter._functions
+    print("{:>8} {:>16} {:>12} {:>8}".format("tokens", "brackets red., s", "compiled, s", "speedup"))
+    for size in sizes:
+        expr = generate_long_expression(interpreter, size)
+        values = expr._evaluate_operands(variables, functions)
+        assert expr._reduce_brackets(values) == expr.evaluate(variables, functions)
+        reduction = min(timeit.repeat(lambda: expr._reduce_brackets(expr._evaluate_operands(variables, functions)),
+                                      number=1, repeat=repeat))
+        compiled = min(timeit.repeat(lambda: expr.evaluate(variables, functions), number=1, repeat=repeat))
+        print("{:>8} {:>16.4f} {:>12.4f} {:>7.1f}x".format(len(expr), reduction, compiled, reduction / compiled))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,67 @@
+"""
+Compares chains of element-wise matrix operations computed operation by operation
+with deferred fused computation of lazy_matrix: time and peak memory allocated
+during evaluation (measured with tracemalloc, which tracks NumPy arrays too)
+Usage: python -m benchmarks.bench_fusion [--size N]
+"""
+
+import argparse
+import time
+import tracemalloc
+import numpy as np
+from math_types import Number, Matrix, Operator, Expression
+from math_types import array_storage
+
+CHAINS = {
+    "A * 2 + B - C / 3": "a * 2 + b - c / 3",
+    "A + B + C + A + B": "a + b + c + a + b",
+    "(A - B) * (A + B) / 4": "( a - b ) * ( a + b ) / 4",
+    "A % 7 * 2 - B * C + 1": "a % 7 * 2 - b * c + 1",
+}
+
+
+def build_expression(chain, matrices):
+    body = []
+    for token in chain.split():
+        if token in matrices:
+            body.append(matrices[token])
+        elif token[0].isdigit():
+            body.append(Number(int(token)))
+        else:
+            body.append(Operator(token))
+    return Expression(body, preprocess=False)
+
+
+def measure(evaluate):
+    """
+    :return: (result, seconds, peak of allocated bytes)
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    res = evaluate()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return res, elapsed, peak
+
+
+def run(n=2000):
+    rng = np.random.default_rng(0)
+    matrices = {name: Matrix.from_array(rng.uniform(-1, 1, (n, n)), array_storage.REAL) for name in "abc"}
+    print("{}x{} matrices, one matrix is {:.1f} MB".format(n, n, n * n * 8 / 2 ** 20))
+    print("{:>24} {:>10} {:>10} {:>12} {:>12}".format("expression", "plain, s", "fused, s", "plain, MB", "fused, MB"))
+    for name, chain in CHAINS.items():
+        expr = build_expression(chain, matrices)
+        program = expr.compile()
+        values = expr.body
+        plain, plain_time, plain_peak = measure(lambda: Expression._run_program(program, values))
+        fused, fused_time, fused_peak = measure(lambda: Expression._run_matrix_program(program, values))
+        assert np.array_equal(plain.as_array()[0], fused.as_array()[0])
+        print("{:>24} {:>10.3f} {:>10.3f} {:>12.1f} {:>12.1f}".format(
+            name, plain_time, fused_time, plain_peak / 2 ** 20, fused_peak / 2 ** 20))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=2000)
+    run(parser.parse_args().size)
@@ -0,0 +1,56 @@
+"""
+Compares polynomial fit by normal equations, which linreg used to solve with
+matrix inversion, with blocked Householder QR fit: time and error of coefficients
+on points with x around 10^5
+Usage: python -m benchmarks.bench_least_squares [--points N] [--degree D]
+"""
+
+import argparse
+import time
+import numpy as np
+from math_types import Number, Matrix, array_storage
+from math_types.least_squares import polyfit
+
+
+def normal_equations(x, y, degree):
+    """
+    :return: coefficients from constant term, theta = (X^T * X)^-1 * X^T * y
+    """
+    design = Matrix(len(x), degree + 1, [[Number(float(val) ** k) for k in range(degree + 1)] for val in x])
+    values = Matrix(len(y), 1, [[Number(float(val))] for val in y])
+    transposed = design.transpose_matrix()
+    theta = (transposed ** design).invert_matrix() ** transposed ** values
+    return np.array([row[0].val for row in theta._read_rows()])
+
+
+def measure(func):
+    start = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - start
+
+
+def run(points=10000, degree=2):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(2e4, 2.5e5, points)
+    exact = np.array([8000, -0.02, 3e-8, 1e-14][:degree + 1])
+    y = np.polynomial.polynomial.polyval(x, exact)
+    row = lambda values: Matrix.from_array(values[None, :], array_storage.REAL)
+    print("{} points, degree {}".format(points, degree))
+    print("{:>18} {:>10} {:>16}".format("method", "time, s", "relative error"))
+    for name, fit in (("normal equations", lambda: normal_equations(x, y, degree)),
+                      ("blocked QR", lambda: polyfit(row(x), row(y), degree))):
+        try:
+            coefficients, elapsed = measure(fit)
+            error = np.abs((coefficients - exact) / exact).max()
+        except Exception as e:
+            print("{:>18} failed: {}".format(name, str(e).split("\n")[0]))
+            continue
+        print("{:>18} {:>10.3f} {:>16.2e}".format(name, elapsed, error))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=10000)
+    parser.add_argument("--degree", type=int, default=2)
+    args = parser.parse_args()
+    run(args.points, args.degree)
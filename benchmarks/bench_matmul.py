@@ -0,0 +1,58 @@
+"""
+Compares pure Python matrix product of matmul_kernel with element by element
+product of boxed Numbers, which Matrix used before
+Usage: python -m benchmarks.bench_matmul [--legacy-limit N]
+Legacy kernel is measured only up to legacy limit, for bigger sizes its time
+is extrapolated from the biggest measured size as O(n^3)
+"""
+
+import argparse
+import random
+import time
+from math_types import Number, ComplexNumber, Matrix
+from math_types import matmul_kernel
+
+
+def legacy_matmul(left, right):
+    return [[Matrix._calc_matrix_matmul_elem(left.matrix, right.matrix, row, col) for col in range(right.cols)]
+            for row in range(left.rows)]
+
+
+def random_matrix(n, complex_elements=False):
+    if complex_elements:
+        return Matrix(n, n, [[ComplexNumber(random.uniform(-1, 1), random.uniform(-1, 1)) for _ in range(n)]
+                             for _ in range(n)])
+    return Matrix(n, n, [[Number(random.uniform(-1, 1)) for _ in range(n)] for _ in range(n)])
+
+
+def measure(func):
+    start = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - start
+
+
+def run(sizes=(16, 32, 64, 128, 256, 512), legacy_limit=128):
+    random.seed(0)
+    print("{:>8} {:>6} {:>12} {:>12} {:>8}".format("elements", "n", "legacy, s", "kernel, s", "speedup"))
+    for complex_elements in (False, True):
+        measured = None
+        for n in sizes:
+            a, b = random_matrix(n, complex_elements), random_matrix(n, complex_elements)
+            res, kernel_time = measure(lambda: matmul_kernel.matmul(a.matrix, b.matrix))
+            if n <= legacy_limit:
+                expected, legacy_time = measure(lambda: legacy_matmul(a, b))
+                assert Matrix(n, n, res) == Matrix(n, n, expected)
+                measured = n, legacy_time
+                legacy = "{:12.4f}".format(legacy_time)
+            else:
+                legacy_time = measured[1] * (n / measured[0]) ** 3
+                legacy = "~{:11.4f}".format(legacy_time)
+            print("{:>8} {:>6} {} {:>12.4f} {:>7.1f}x".format(
+                "complex" if complex_elements else "real", n, legacy, kernel_time, legacy_time / kernel_time))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--legacy-limit", type=int, default=128,
+                        help="biggest size measured with legacy kernel")
+    run(legacy_limit=parser.parse_args().legacy_limit)
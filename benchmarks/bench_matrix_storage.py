@@ -0,0 +1,54 @@
+"""
+Compares matrix operations on list of lists storage with NumPy array storage
+Usage: python -m benchmarks.bench_matrix_storage
+"""
+
+import random
+import time
+from math_types import Number, Matrix
+from math_types import array_storage
+
+
+def random_matrix(n):
+    return Matrix(n, n, [[Number(random.uniform(-1, 1)) for _ in range(n)] for _ in range(n)])
+
+
+def measure(func, threshold):
+    """
+    :param func: callable which gets fresh matrices
+    :param threshold: ARRAY_THRESHOLD used during measurement
+    :return: seconds
+    """
+    array_storage.ARRAY_THRESHOLD = threshold
+    try:
+        start = time.perf_counter()
+        func()
+        return time.perf_counter() - start
+    finally:
+        array_storage.ARRAY_THRESHOLD = ARRAY_THRESHOLD
+
+
+ARRAY_THRESHOLD = array_storage.ARRAY_THRESHOLD
+OPERATIONS = {
+    "A + B": lambda a, b: a + b,
+    "A * 2.5": lambda a, b: a * Number(2.5),
+    "A ** B": lambda a, b: a ** b,
+    "transp(A)": lambda a, b: a.transpose_matrix(),
+    "inv(A)": lambda a, b: a.invert_matrix(),
+}
+
+
+def run(sizes=(50, 100)):
+    random.seed(0)
+    print("{:>10} {:>6} {:>10} {:>10} {:>8}".format("operation", "n", "lists, s", "array, s", "speedup"))
+    for n in sizes:
+        a, b = random_matrix(n), random_matrix(n)
+        for name, operation in OPERATIONS.items():
+            # result of first operation keeps array storage, so chains of operations don't box elements
+            lists = measure(lambda: operation(Matrix(n, n, a.matrix), Matrix(n, n, b.matrix)), float("inf"))
+            array = measure(lambda: operation(Matrix(n, n, a.matrix), Matrix(n, n, b.matrix)), ARRAY_THRESHOLD)
+            print("{:>10} {:>6} {:>10.4f} {:>10.4f} {:>7.1f}x".format(name, n, lists, array, lists / array))
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,83 @@
+"""
+Measures memory held by large matrices and long parsed expressions with tracemalloc.
+Legacy classes below are plain __dict__ classes without interning, as math types were before
+Usage: python -m benchmarks.bench_memory
+"""
+
+import random
+import tracemalloc
+from math_types import Number, Matrix, Operator, Expression
+from parsing.tokenizer import Tokenizer
+from parsing.parser import Parser
+
+
+class LegacyNumber:
+    def __init__(self, val):
+        self.val = val
+
+
+class LegacyOperator:
+    def __init__(self, op):
+        self.op = op
+
+
+class LegacyMatrix:
+    def __init__(self, rows, cols, matrix):
+        self.rows = rows
+        self.cols = cols
+        self.matrix = matrix
+
+
+def measure(build):
+    """
+    :param build: callable which creates measured objects
+    :return: (bytes, number of memory blocks) held by result of build
+    """
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = build()
+    stats = tracemalloc.take_snapshot().compare_to(before, "filename")
+    tracemalloc.stop()
+    del result
+    return sum(stat.size_diff for stat in stats), sum(stat.count_diff for stat in stats)
+
+
+def build_matrix(number_type, matrix_type, n, values):
+    return matrix_type(n, n, [[number_type(values[i * n + j]) for j in range(n)] for i in range(n)])
+
+
+def build_expression(body):
+    return Expression([Number(obj.val) if isinstance(obj, Number) else Operator(obj.op) for obj in body],
+                      preprocess=False)
+
+
+def build_legacy_expression(body):
+    return [LegacyNumber(obj.val) if isinstance(obj, Number) else LegacyOperator(obj.op) for obj in body]
+
+
+def report(name, elements, legacy, current):
+    print("{:>28} {:>10} {:>16.1f} {:>16.1f} {:>14.2f} {:>14.2f}".format(
+        name, elements, legacy[0] / elements, current[0] / elements,
+        legacy[1] / elements, current[1] / elements))
+
+
+def run(n=300, expression_terms=20000):
+    random.seed(0)
+    print("{:>28} {:>10} {:>16} {:>16} {:>14} {:>14}".format(
+        "", "elements", "legacy, B/elem", "slots, B/elem", "legacy, allocs", "slots, allocs"))
+    for name, values in (("float matrix {0}x{0}".format(n), [random.random() for _ in range(n * n)]),
+                         ("small int matrix {0}x{0}".format(n), [random.randint(-5, 100) for _ in range(n * n)])):
+        legacy = measure(lambda: build_matrix(LegacyNumber, LegacyMatrix, n, values))
+        current = measure(lambda: build_matrix(Number, Matrix, n, values))
+        report(name, n * n, legacy, current)
+
+    line = " + ".join("{} * ({} - {})".format(random.randint(0, 9), random.randint(0, 99), random.random())
+                      for _ in range(expression_terms // 8))
+    body = Parser().parse(Tokenizer().tokenize(line))
+    legacy = measure(lambda: build_legacy_expression(body))
+    current = measure(lambda: build_expression(body))
+    report("expression", len(body), legacy, current)
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,52 @@
+"""
+Compares rendering of many plots to PNG files with new pyplot figure for every plot
+and with headless renderer of plot_renderer, which reuses one Agg figure and writes
+files by background thread: time until all files are written, and time caller is blocked
+Usage: python -m benchmarks.bench_plot_render [--plots N]
+"""
+
+import argparse
+import tempfile
+import time
+import numpy as np
+from math_types.plot_renderer import HeadlessRenderer, draw
+
+
+def function_plot(k):
+    x = np.linspace(-5, 5, 500)
+    y = np.sin(x * (k % 7 + 1)) * x
+    return [("plot", (x, y), {}), ("axhline", (), {"color": "black"}), ("axvline", (), {"color": "black"})]
+
+
+def figure_per_plot(directory, plots):
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    for k in range(plots):
+        figure = plt.figure()
+        draw(figure.gca(), function_plot(k))
+        figure.savefig("{}/{:04d}.png".format(directory, k))
+        plt.close(figure)
+
+
+def run(plots=50):
+    print("{} plots".format(plots))
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        figure_per_plot(directory, plots)
+        print("{:>22}: {:.3f} s".format("figure per plot", time.perf_counter() - start))
+    with tempfile.TemporaryDirectory() as directory:
+        renderer = HeadlessRenderer(directory)
+        start = time.perf_counter()
+        for k in range(plots):
+            renderer.render("plot", function_plot(k))
+        queued = time.perf_counter() - start
+        renderer.wait()
+        print("{:>22}: {:.3f} s, caller blocked for {:.3f} s".format("reused figure, thread",
+                                                                    time.perf_counter() - start, queued))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--plots", type=int, default=50)
+    run(parser.parse_args().plots)
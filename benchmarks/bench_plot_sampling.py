@@ -0,0 +1,73 @@
+"""
+Compares fixed grid of 1000 points, which plot used before, evaluated point by point
+and as one batch, with adaptive sampling of plot_sampling: number of evaluated points,
+time and largest distance between plotted line and function, relative to range of values
+Usage: python -m benchmarks.bench_plot_sampling [--tolerance T]
+"""
+
+import argparse
+import time
+import numpy as np
+from interpreter import Interpreter
+from math_types import Number
+from math_types.commands import evaluate_points
+from math_types.plot_sampling import adaptive_sample, DEFAULT_TOLERANCE
+
+FUNCTIONS = {
+    "x ^ 2": (-3, 3),
+    "x ^ 3 - 2 * x": (-2, 2),
+    "sin(x) * 10": (-10, 10),
+    "x / (x ^ 2 + 0.01)": (-1, 1),
+    "sqrt(x)": (-1, 4),
+}
+FIXED_POINTS = 1000
+
+
+def serial(func, xs, functions):
+    return np.array([func.evaluate_value(Number(float(x)), functions).val for x in xs])
+
+
+def measure(sample):
+    start = time.perf_counter()
+    res = sample()
+    return res, time.perf_counter() - start
+
+
+def error(x, y, exact_x, exact_y):
+    """
+    :return: largest distance between piecewise linear plot and function at points of dense grid
+    """
+    defined = np.isfinite(exact_y)
+    interpolated = np.interp(exact_x[defined], x[np.isfinite(y)], y[np.isfinite(y)])
+    values = exact_y[defined]
+    return np.abs(interpolated - values).max() / (values.max() - values.min())
+
+
+def run(tolerance=DEFAULT_TOLERANCE):
+    interpreter = Interpreter()
+    functions = interpreter._functions
+    print("{:>20} {:>18} {:>18} {:>24}".format("function", "fixed serial", "fixed batch", "adaptive"))
+    print("{:>20} {:>18} {:>18} {:>24}".format("", "time, s / error", "time, s / error", "points / time, s / error"))
+    for body, (a, b) in FUNCTIONS.items():
+        interpreter.eval_string("f(x) = " + body)
+        func = functions["f"]
+        evaluate = lambda xs: evaluate_points(func, xs, functions)
+        exact_x = np.linspace(a, b, 100001)
+        exact_y = evaluate(exact_x)
+        fixed_x = a + (b - a) / FIXED_POINTS * np.arange(FIXED_POINTS)
+        if np.isfinite(evaluate(fixed_x)).all():
+            serial_y, serial_time = measure(lambda: serial(func, fixed_x, functions))
+            serial_report = "{:.4f} / {:.1e}".format(serial_time, error(fixed_x, serial_y, exact_x, exact_y))
+        else:
+            serial_report = "undefined points"
+        fixed_y, fixed_time = measure(lambda: evaluate(fixed_x))
+        (x, y, count), adaptive_time = measure(lambda: adaptive_sample(evaluate, a, b, tolerance))
+        print("{:>20} {:>18} {:>18} {:>24}".format(
+            body, serial_report, "{:.4f} / {:.1e}".format(fixed_time, error(fixed_x, fixed_y, exact_x, exact_y)),
+            "{} / {:.4f} / {:.1e}".format(count, adaptive_time, error(x, y, exact_x, exact_y))))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    run(parser.parse_args().tolerance)
@@ -0,0 +1,68 @@
+"""
+Compares powers computed by repeated multiplication (as it was implemented before)
+with exponentiation by squaring, results are checked against reference implementations
+Usage: python -m benchmarks.bench_power
+"""
+
+import operator
+import random
+import time
+import numpy as np
+from math_types import Number, ComplexNumber, Matrix
+
+
+def legacy_power(base, exponent, multiply):
+    res = base
+    for i in range(exponent - 1):
+        res = multiply(res, base)
+    return res
+
+
+def measure(func):
+    """
+    :return: result of func and seconds spent
+    """
+    start = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - start
+
+
+def random_matrix(n):
+    """
+    Random orthogonal matrix, so that large powers of it and of its inverse neither overflow nor vanish
+    """
+    a, _ = np.linalg.qr(np.random.default_rng(0).uniform(-1, 1, (n, n)))
+    return Matrix(n, n, [[Number(float(x)) for x in row] for row in a])
+
+
+def run_matrix(n=50, exponents=(10, 100, 1000, -1000)):
+    m = random_matrix(n)
+    print("{:>10} {:>8} {:>12} {:>12} {:>8}".format("matrix", "power", "legacy, s", "squaring, s", "speedup"))
+    for exponent in exponents:
+        base = m.invert_matrix() if exponent < 0 else m
+        legacy, legacy_time = measure(lambda: legacy_power(base, abs(exponent), operator.pow))
+        res, res_time = measure(lambda: m ^ Number(exponent))
+        reference = np.linalg.matrix_power(np.linalg.inv(m.as_array()[0]) if exponent < 0 else m.as_array()[0], abs(exponent))
+        assert np.allclose(res.as_array()[0], reference, rtol=1e-6, atol=1e-9)
+        assert np.allclose(legacy.as_array()[0], reference, rtol=1e-6, atol=1e-9)
+        print("{:>10} {:>8} {:>12.4f} {:>12.4f} {:>7.1f}x".format(
+            "{}x{}".format(n, n), exponent, legacy_time, res_time, legacy_time / res_time))
+
+
+def run_complex(exponents=(10, 1000, 100000)):
+    random.seed(0)
+    c = ComplexNumber(random.uniform(-1, 1), random.uniform(-1, 1))
+    c = c / Number(abs(complex(c.real, c.imag)))
+    print("{:>10} {:>8} {:>12} {:>12} {:>8}".format("complex", "power", "legacy, s", "squaring, s", "speedup"))
+    for exponent in exponents:
+        legacy, legacy_time = measure(lambda: legacy_power(c, exponent, operator.mul))
+        res, res_time = measure(lambda: c ^ Number(exponent))
+        reference = complex(c.real, c.imag) ** exponent
+        assert abs(complex(res.real, res.imag) - reference) < 1e-9
+        print("{:>10} {:>8} {:>12.4f} {:>12.4f} {:>7.1f}x".format(
+            "unit", exponent, legacy_time, res_time, legacy_time / res_time))
+
+
+if __name__ == "__main__":
+    run_matrix()
+    run_complex()
@@ -0,0 +1,46 @@
+"""
+Compares dense Matrix with SparseMatrix on banded matrices: matrix product,
+element-wise product and solving of linear system
+Usage: python -m benchmarks.bench_sparse [--size N]
+"""
+
+import argparse
+import time
+from math_types import Number, Matrix, SparseMatrix
+
+
+def banded(n, width=1):
+    """
+    :return: list of lists of n x n diagonally dominant matrix with 2 * width + 1 diagonals
+    """
+    return [[Number(4 * width) if i == j else Number(-1) if abs(i - j) <= width else Number(0)
+             for j in range(n)] for i in range(n)]
+
+
+def measure(func):
+    start = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - start
+
+
+def run(n=300):
+    dense = Matrix(n, n, banded(n))
+    sparse = SparseMatrix.from_dense(dense)
+    rhs = Matrix(n, 1, [[Number(i % 7)] for i in range(n)])
+    print("{}x{} tridiagonal matrix, {:.1%} of elements are nonzero".format(n, n, sparse.density))
+    print("{:>18} {:>10} {:>10}".format("operation", "dense, s", "sparse, s"))
+    for name, dense_op, sparse_op in (
+            ("A ** A", lambda: dense ** dense, lambda: sparse ** sparse),
+            ("A * A", lambda: dense * dense, lambda: sparse * sparse),
+            ("A * 2 - A", lambda: dense * Number(2) - dense, lambda: sparse * Number(2) - sparse),
+            ("solve(A, b)", lambda: dense.solve(rhs), lambda: sparse.solve(rhs))):
+        dense_res, dense_time = measure(dense_op)
+        sparse_res, sparse_time = measure(sparse_op)
+        assert sparse_res == dense_res
+        print("{:>18} {:>10.3f} {:>10.3f}".format(name, dense_time, sparse_time))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=300)
+    run(parser.parse_args().size)
@@ -0,0 +1,64 @@
+"""
+Measures interpreter startup: cold run of computorV2.py with small file and
+import with Interpreter() construction in fresh process, best of several runs,
+and checks them against time budget. Modules loaded at startup are listed, NumPy
+and matplotlib shouldn't be among them
+Usage: python -m benchmarks.bench_startup [--runs N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+STARTUP_BUDGET = 0.15  # seconds for cold run of one-line file
+CONSTRUCTION_BUDGET = 0.12  # seconds for import of interpreter and Interpreter() in fresh process
+HEAVY_MODULES = ("numpy", "matplotlib")
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CONSTRUCTION = """
+import sys, time
+start = time.perf_counter()
+from interpreter import Interpreter
+Interpreter()
+elapsed = time.perf_counter() - start
+loaded = [name for name in {heavy} if name in sys.modules and type(sys.modules[name]).__name__ == "module"]
+print(elapsed, *loaded)
+"""
+
+
+def best_time(command, runs, **kwargs):
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT, check=True, stdout=subprocess.DEVNULL, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(runs=5):
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as file:
+        file.write("a = 2 + 3\na * 2\n")
+    try:
+        cold = best_time([sys.executable, "computorV2.py", file.name], runs, stdin=subprocess.DEVNULL)
+    finally:
+        os.remove(file.name)
+    outputs = [subprocess.run([sys.executable, "-c", CONSTRUCTION.format(heavy=HEAVY_MODULES)], cwd=ROOT,
+                              check=True, capture_output=True, text=True).stdout.split() for _ in range(runs)]
+    construction = min(float(output[0]) for output in outputs)
+    loaded = outputs[0][1:]
+    print("{:>40}: {:.3f} s (budget {:.3f} s)".format("python computorV2.py file", cold, STARTUP_BUDGET))
+    print("{:>40}: {:.3f} s (budget {:.3f} s)".format("import interpreter, Interpreter()", construction,
+                                                     CONSTRUCTION_BUDGET))
+    print("{:>40}: {}".format("heavy modules loaded at startup", ", ".join(loaded) or "none"))
+    within = cold <= STARTUP_BUDGET and construction <= CONSTRUCTION_BUDGET and not loaded
+    print("within budget" if within else "OVER BUDGET")
+    return within
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    sys.exit(0 if run(parser.parse_args().runs) else 1)
@@ -0,0 +1,60 @@
+"""
+Compares general algorithms with fast paths for structured matrices: products
+with identity and diagonal matrices, powers and inversion of diagonal matrices,
+solving of triangular systems
+Usage: python -m benchmarks.bench_structure [--size N]
+"""
+
+import argparse
+import time
+import numpy as np
+from math_types import Number, Matrix
+from math_types import array_storage, matrix_structure
+
+
+def general(matrix):
+    """
+    :return: copy of matrix which is treated as general one
+    """
+    res = Matrix.from_array(matrix.as_array()[0].copy(), matrix.as_array()[1])
+    res._structure = matrix_structure.GENERAL
+    return res
+
+
+def measure(func):
+    start = time.perf_counter()
+    res = func()
+    return res, time.perf_counter() - start
+
+
+def run(n=500):
+    rng = np.random.default_rng(0)
+    dense = Matrix.from_array(rng.uniform(-1, 1, (n, n)), array_storage.REAL)
+    identity = Matrix.identity(n)
+    diagonal = Matrix.from_array(np.diag(rng.uniform(1, 2, n)), array_storage.REAL)
+    upper = Matrix.from_array(np.triu(rng.uniform(1, 2, (n, n))), array_storage.REAL)
+    rhs = Matrix.from_array(rng.uniform(-1, 1, (n, 1)), array_storage.REAL)
+    print("{}x{} matrices".format(n, n))
+    print("{:>18} {:>12} {:>14}".format("operation", "general, s", "structured, s"))
+    for name, func, args in (
+            ("I ** A", lambda a, b: a ** b, (identity, dense)),
+            ("D ** A", lambda a, b: a ** b, (diagonal, dense)),
+            ("A ** D", lambda a, b: a ** b, (dense, diagonal)),
+            ("D ^ 20", lambda a: a ^ Number(20), (diagonal,)),
+            ("inv(D)", lambda a: a.invert_matrix(), (diagonal,)),
+            ("inv(U)", lambda a: a.invert_matrix(), (upper,)),
+            ("det(U)", lambda a: a.determinant(), (upper,)),
+            ("solve(U, b)", lambda a: a.solve(rhs), (upper,))):
+        plain_res, plain_time = measure(lambda: func(*map(general, args)))
+        for arg in args:
+            arg.structure  # detection is done once, before operations
+        res, fast_time = measure(lambda: func(*args))
+        assert np.allclose(np.asarray(res.as_array()[0] if isinstance(res, Matrix) else res.val),
+                           np.asarray(plain_res.as_array()[0] if isinstance(plain_res, Matrix) else plain_res.val))
+        print("{:>18} {:>12.4f} {:>14.4f}".format(name, plain_time, fast_time))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=500)
+    run(parser.parse_args().size)
@@ -0,0 +1,68 @@
+"""
+Compares single-pass scanner with previous per-character tokenizer on large matrix literals
+Usage: python -m benchmarks.bench_tokenizer
+"""
+
+import random
+import timeit
+from string import whitespace
+from exceptions.parsing_exceptions import UnknownToken
+from consts import ONE_CHAR_TOKENS
+from parsing.tokenizer import Tokenizer
+
+
+def legacy_tokenize(string):
+    """Previous implementation of Tokenizer.tokenize, kept as reference"""
+    tokens = []
+    char_idx = 0
+    while char_idx < len(string):
+        char = string[char_idx]
+        if char in whitespace:
+            char_idx += 1
+            continue
+        elif char.isdigit():
+            start_idx = char_idx
+            while char_idx < len(string) and (string[char_idx].isdigit() or string[char_idx] == '.'):
+                char_idx += 1
+            token = string[start_idx:char_idx]
+        elif char.isalpha():
+            start_idx = char_idx
+            while char_idx < len(string) and string[char_idx].isalpha():
+                char_idx += 1
+            token = string[start_idx:char_idx].lower()
+        elif string[char_idx:char_idx + 2] == "**":
+            char_idx += 2
+            token = "**"
+        elif char in ONE_CHAR_TOKENS:
+            char_idx += 1
+            token = char
+        else:
+            raise UnknownToken(char)
+        tokens.append(token)
+    return tokens
+
+
+def generate_matrix_literal(rows, cols):
+    def elem():
+        return random.choice(["{}".format(random.randint(0, 10**6)),
+                              "{:.4f}".format(random.uniform(-1000, 1000)),
+                              "{}i".format(random.randint(0, 100))])
+    return "A = [" + ";".join("[" + ", ".join(elem() for _ in range(cols)) + "]" for _ in range(rows)) + "]"
+
+
+def run(sizes=((10, 10), (100, 100), (200, 250)), repeat=3):
+    tokenizer = Tokenizer()
+    print("{:>12} {:>10} {:>12} {:>12} {:>12} {:>8}".format("matrix", "tokens", "legacy, s", "scan(), s",
+                                                             "tokenize, s", "speedup"))
+    for rows, cols in sizes:
+        literal = generate_matrix_literal(rows, cols)
+        assert legacy_tokenize(literal) == tokenizer.tokenize(literal)
+        legacy = min(timeit.repeat(lambda: legacy_tokenize(literal), number=1, repeat=repeat))
+        scan = min(timeit.repeat(lambda: list(tokenizer.scan(literal)), number=1, repeat=repeat))
+        tokenize = min(timeit.repeat(lambda: tokenizer.tokenize(literal), number=1, repeat=repeat))
+        print("{:>12} {:>10} {:>12.4f} {:>12.4f} {:>12.4f} {:>7.1f}x".format(
+            "{}x{}".format(rows, cols), len(tokenizer.tokenize(literal)), legacy, scan, tokenize, legacy / tokenize))
+
+
+if __name__ == "__main__":
+    run()
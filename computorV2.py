@@ -1,18 +1,65 @@
 from interpreter import Interpreter
-import sys
+from math_types import plot_renderer
+from exceptions import EvalException
+import argparse
 import os
 
 
+def positive_int(text):
+    """
+    argparse type of option which should be positive integer
+    """
+    try:
+        value = int(text)
+    except ValueError:
+        value = 0
+    if value <= 0:
+        raise argparse.ArgumentTypeError("should be positive integer, got '{}'".format(text))
+    return value
+
+
 if __name__ == "__main__":
-    if len(sys.argv) > 2:
-        print("usage: python computorV2.py [path_to_file]")
+    arg_parser = argparse.ArgumentParser(description="Math expressions interpreter")
+    arg_parser.add_argument("file", nargs="?", help="file with expressions which are evaluated before interactive mode")
+    arg_parser.add_argument("--reactive", action="store_true",
+                            help="recompute variables and functions when names they were assigned from change")
+    arg_parser.add_argument("--linreg", metavar="DATA",
+                            help="print best-fit line for points from .npy file with (N, 2) array or "
+                                 "csv file with x and y on every line, and exit")
+    arg_parser.add_argument("--chunk-size", type=positive_int,
+                            help="number of points --linreg reads at once (default: 65536)")
+    arg_parser.add_argument("--plot-dir", metavar="DIR", default=os.environ.get(plot_renderer.PLOT_DIR_VARIABLE),
+                            help="write plots to image files in DIR instead of showing them, file is evaluated "
+                                 "without interactive mode then (default: ${})".format(plot_renderer.PLOT_DIR_VARIABLE))
+    arg_parser.add_argument("--plot-format", choices=plot_renderer.FORMATS,
+                            default=os.environ.get(plot_renderer.PLOT_FORMAT_VARIABLE, "png"),
+                            help="format of image files (default: ${} or png)".format(plot_renderer.PLOT_FORMAT_VARIABLE))
+    args = arg_parser.parse_args()
+    if args.plot_format not in plot_renderer.FORMATS:  # default from environment isn't checked by choices
+        arg_parser.error("invalid ${} value: '{}' (choose from {})".format(
+            plot_renderer.PLOT_FORMAT_VARIABLE, args.plot_format, ", ".join(plot_renderer.FORMATS)))
+
+    if args.linreg is not None:
+        from math_types.regression import LinearRegression, CHUNK_SIZE  # loads NumPy, so only when needed
+        try:
+            print(LinearRegression.from_file(args.linreg, CHUNK_SIZE if args.chunk_size is None else args.chunk_size))
+        except (OSError, ValueError, EvalException) as e:
+            print("ERROR: ", str(e))
+            exit(1)
+        exit(0)
+
+    if args.plot_dir:
+        plot_renderer.use(plot_renderer.HeadlessRenderer(args.plot_dir, args.plot_format))
+    else:
+        plot_renderer.use_windows()
 
-    interpreter = Interpreter()
-    if len(sys.argv) == 1:
+    interpreter = Interpreter(reactive=args.reactive)
+    if args.file is None:
         interpreter.read_eval_print_loop()
-    elif len(sys.argv) == 2:
-        if not os.path.isfile(sys.argv[1]):
+    else:
+        if not os.path.isfile(args.file):
             print("Wrong file")
             exit(1)
-        interpreter.read_eval_print_file(sys.argv[1])
-        interpreter.read_eval_print_loop()
+        interpreter.read_eval_print_file(args.file)
+        if not args.plot_dir:
+            interpreter.read_eval_print_loop()
@@ -31,11 +31,13 @@ DEFINED_FUNCS = {
 }
 
 from math_types.function import SpecialCommand
-from math_types.commands import *
 
 SPECIAL_COMMANDS = {
-    "vars": SpecialCommand("vars", vars_command),
-    "funcs": SpecialCommand("funcs", funcs_command),
-    "plot": SpecialCommand("plot", plot_command),
-    "linreg": SpecialCommand("plot", linreg_command)
+    "vars": SpecialCommand("vars", "vars_command"),
+    "funcs": SpecialCommand("funcs", "funcs_command"),
+    "plot": SpecialCommand("plot", "plot_command"),
+    "linreg": SpecialCommand("plot", "linreg_command"),
+    "cache": SpecialCommand("cache", "cache_command"),
+    "polyfit": SpecialCommand("polyfit", "polyfit_command"),
+    "linfit": SpecialCommand("linfit", "linfit_command")
 }
@@ -0,0 +1,107 @@
+"""DependencyGraph class implementation"""
+
+from typing import Dict, FrozenSet, Iterable, List, Set, Tuple
+from math_types import Variable, Matrix, AFunction, Expression
+
+VARIABLE = "variable"
+FUNCTION = "function"
+Node = Tuple[str, str]
+
+
+def read_names(expr: List, exceptions: Iterable[Variable] = ()) -> Set[Node]:
+    """
+    Finds every variable and function which is read by expression,
+    including ones inside function inputs and matrix elements
+
+    :param expr: list of objects
+    :param exceptions: variables which aren't looked up (like function input)
+    :return: set of (VARIABLE, name) and (FUNCTION, name) nodes
+    """
+    names = set()
+    for obj in expr:
+        if isinstance(obj, Variable):
+            if obj not in exceptions:
+                names.add((VARIABLE, obj.name))
+        elif isinstance(obj, AFunction):
+            names.add((FUNCTION, obj.name))
+            if isinstance(obj.input, Expression):
+                names |= read_names(obj.input.body, exceptions)
+        elif isinstance(obj, Matrix):
+            for row in obj.matrix:
+                for elem in row:
+                    if isinstance(elem, Expression):
+                        names |= read_names(elem.body, exceptions)
+        elif isinstance(obj, Expression):
+            names |= read_names(obj.body, exceptions)
+    return names
+
+
+class DependencyGraph:
+    """
+    Directed graph of names: every assigned variable or function points
+    to names which were read by its assignment
+    """
+    def __init__(self):
+        self._dependencies: Dict[Node, FrozenSet[Node]] = {}
+        self._dependents: Dict[Node, Set[Node]] = {}
+
+    def dependencies(self, node: Node) -> FrozenSet[Node]:
+        """
+        :param node: assigned name
+        :return: names read by last assignment of node
+        """
+        return self._dependencies.get(node, frozenset())
+
+    def set_dependencies(self, node: Node, names: Iterable[Node]) -> None:
+        """
+        Replaces edges of node with edges to names
+
+        :param node: assigned name
+        :param names: names read by assignment
+        """
+        for name in self.dependencies(node):
+            self._dependents[name].discard(node)
+        names = frozenset(names)
+        self._dependencies[node] = names
+        for name in names:
+            self._dependents.setdefault(name, set()).add(node)
+
+    def depends_on(self, node: Node, other: Node) -> bool:
+        """
+        :return: True if node reads other directly or through other names
+        """
+        seen = set()
+        stack = [node]
+        while stack:
+            for name in self.dependencies(stack.pop()):
+                if name == other:
+                    return True
+                if name not in seen:
+                    seen.add(name)
+                    stack.append(name)
+        return False
+
+    def dependents(self, node: Node) -> List[Node]:
+        """
+        Collects only subgraph affected by change of node
+
+        :param node: changed name
+        :return: every name which reads node directly or indirectly,
+                 ordered so that each name goes after names it reads
+        """
+        order = []
+        visited = {node}
+        # iterative depth-first search, long chains of assignments shouldn't hit recursion limit
+        stack = [(node, iter(self._dependents.get(node, ())))]
+        while stack:
+            name, children = stack[-1]
+            for dependent in children:
+                if dependent not in visited:
+                    visited.add(dependent)
+                    stack.append((dependent, iter(self._dependents.get(dependent, ()))))
+                    break
+            else:
+                stack.pop()
+                order.append(name)
+        order.pop()
+        return order[::-1]
@@ -89,6 +89,24 @@ class MatrixIsNonInvertible(EvalException):
         super(MatrixIsNonInvertible, self).__init__(message)
 
 
+class MatrixIsNotSquare(MatrixIsNonInvertible):
+    def __init__(self, matrix):
+        message = "Matrix should be square:\n {}".format(matrix)
+        super(MatrixIsNonInvertible, self).__init__(message)
+
+
+class SolverDidNotConverge(EvalException):
+    def __init__(self, matrix):
+        message = "Iterative solver didn't converge for matrix:\n {}".format(matrix)
+        super(SolverDidNotConverge, self).__init__(message)
+
+
 class WrongSpecialCommandUse(EvalException):
     def __init__(self, message="Special command error"):
         super(WrongSpecialCommandUse, self).__init__(message)
+
+
+class NonNumericResult(EvalException):
+    def __init__(self, func_name, result):
+        message = "Function {} returned not a number: {}".format(func_name, result)
+        super(NonNumericResult, self).__init__(message)
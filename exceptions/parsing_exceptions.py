@@ -61,3 +61,9 @@ class EmptyFunctionInput(ParsingError):
     def __init__(self):
         message = "No input to function!"
         super(EmptyFunctionInput, self).__init__(message)
+
+
+class UnexpectedEndOfInput(ParsingError):
+    def __init__(self):
+        message = "Unexpected end of input"
+        super(UnexpectedEndOfInput, self).__init__(message)
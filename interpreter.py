@@ -3,11 +3,23 @@ from exceptions.parsing_exceptions import UnexpectedToken
 from exceptions.evaluation_exceptions import TooManyAssignments, WrongAssingmentLeftPart, \
     WrongSpecialCommandUse, FunctionIsRecursive, FunctionNotExists
 from typing import Tuple, List
+from copy import deepcopy
 from parsing.tokenizer import Tokenizer
 from parsing.parser import Parser
-from math_types import Operator, AFunction, Variable, Expression, Equation, UserDefinedFunction
-from math_types.function import MatrixInversionFunc, MatrixTransposeFunc, SpecialNumericFunction
+from parsing.parse_cache import ParseCache
+from parsing.pratt_parser import PrattParser
+from parsing.ast_adapter import lower_statement
+from math_types import MathPrimitive, Operator, AFunction, Variable, ReactiveVariable, Expression, Equation, UserDefinedFunction
+from math_types.function import MatrixInversionFunc, MatrixTransposeFunc, MatrixDeterminantFunc, \
+    LinearSystemSolveFunc, SubmatrixFunc, MatrixToSparseFunc, MatrixToDenseFunc, IdentityMatrixFunc, \
+    DiagonalMatrixFunc, SpecialNumericFunction
+from math_types.sparse_matrix import auto_sparse
+from math_types import plot_renderer
+from math_types.function_compiler import compile_function, find_references
+from math_types.vectorized import vectorize_function
+from math_types.simplifier import simplify
 from consts import DEFINED_VARS, DEFINED_FUNCS, SPECIAL_COMMANDS
+from dependency_graph import DependencyGraph, read_names, VARIABLE, FUNCTION
 
 
 class Interpreter:
@@ -20,19 +32,31 @@ class Interpreter:
         Variables
         Functions
     Variables and functions could be defined usign assignment operator
+    In reactive mode variables are recomputed when names they were assigned from change.
     Also, simple equations of degree 0-2 is supported. Every term should be in correct form:
         [coefficient][*][variable][^degree]
 
     Predefined math functions: sin, cos, tan, log, abs, sqrt, exp
-    Predefined matrix functions: inv, transp
-    Predefined special commands: vars, funcs, plot, linreg
+    Predefined matrix functions: inv, transp, det, solve, sub, sparse, dense, eye, diag
+    Big matrix results with few nonzero elements are stored as sparse matrices
+    Predefined special commands: vars, funcs, plot, linreg, cache, polyfit, linfit
+    Result of special command could be assigned to variable: 'C = polyfit(X, Y, 2)'
     """
-    def __init__(self):
+    def __init__(self, parse_cache_capacity: int = 100000, reactive: bool = False):
+        """
+        :param parse_cache_capacity: total number of tokens which parse cache could hold
+        :param reactive: if True, variables and functions are kept up to date with names they read
+        """
+        self.reactive = reactive
+        self.dependencies = DependencyGraph()
+        self._definitions = {}
         self._variables = self._init_predefined_variables()
         self._functions = self._init_predefined_functions()
 
-        self._parser = Parser()
+        self._parser = PrattParser()
+        self._fallback_parser = Parser()
         self._tokenizer = Tokenizer()
+        self.parse_cache = ParseCache(parse_cache_capacity)
 
     def _init_predefined_variables(self):
         variables = {}
@@ -48,13 +72,23 @@ class Interpreter:
 
         functions["inv"] = MatrixInversionFunc("inv")
         functions["transp"] = MatrixTransposeFunc("transp")
+        functions["det"] = MatrixDeterminantFunc("det")
+        functions["solve"] = LinearSystemSolveFunc("solve")
+        functions["sub"] = SubmatrixFunc("sub")
+        functions["sparse"] = MatrixToSparseFunc("sparse")
+        functions["dense"] = MatrixToDenseFunc("dense")
+        functions["eye"] = IdentityMatrixFunc("eye")
+        functions["diag"] = DiagonalMatrixFunc("diag")
 
         return functions
 
     def read_eval_print_loop(self) -> None:
         """
-        Infinite REP loop which stops after key interrupt
+        Infinite REP loop which stops after key interrupt.
+        Plots are shown by separate process (see plot_renderer.WindowRenderer), so their
+        windows respond while loop waits for input
         """
+        plot_renderer.use_windows()
         while True:
             try:
                 input_string = input(">")
@@ -81,21 +115,20 @@ class Interpreter:
         :param string: input to interpreter
         :return: output as string
         """
-        tokens = self._tokenizer.tokenize(string)
-        objs = self._parser.parse(tokens)
-
-        op_type, left, right = self._recognize_operation_type(objs)
+        op_type, left, right = self._parse_line(string)
 
         if op_type == "assignment":
             eval_res = self._make_assignment(left, right)
         elif op_type == "evaluation":
-            eval_res = Expression(left).evaluate(self._variables, self._functions)
+            eval_res = self._evaluate_expression(self._as_expression(left))
         elif op_type == "equation":
             equation = Equation(left, right[:-1], self._variables, self._functions)
             eval_res = equation.solve()
         elif op_type == "special":
             spec_comm = SPECIAL_COMMANDS[left[0].name]
             eval_res = spec_comm.evaluate(left[0].input, self._variables, self._functions)
+        elif op_type == "special_assignment":
+            eval_res = self._assign_special_command(left, right[0])
         elif op_type == "print_func":  # kostyl
             if left[0].name not in self._functions:
                 raise FunctionNotExists(left[0].name)
@@ -119,29 +152,174 @@ class Interpreter:
         left = left[0]
 
         if isinstance(left, Variable):
-            right_part_evaluated = Expression(right).evaluate(self._variables, self._functions)
-            left.val = right_part_evaluated
-            self._variables[left.name] = left
-            output = right_part_evaluated
+            output = self._assign_variable(left.name, self._as_expression(right))
+            self._refresh_dependents((VARIABLE, left.name))
 
         elif isinstance(left, AFunction):
             if len(left.input) != 1 or not isinstance(left.input.body[0], Variable):
                 raise WrongAssingmentLeftPart(left.input)
-            left_input_variable = left.input.body[0]
-            func_body = Expression(right)
-            if self._func_body_is_recursive(left.name, right):
-                raise FunctionIsRecursive(left.name)
-            func_body.evaluate_variables(self._variables, exceptions=[left_input_variable])
-            left.body = func_body
-            left.input = left_input_variable
-            self._functions[left.name] = left
-            output = str(left)
+            definition = (deepcopy(left), deepcopy(right)) if self.reactive else None
+            output = self._define_function(left, right)
+            self._definitions[left.name] = definition
+            self._refresh_dependents((FUNCTION, left.name))
 
         else:
             raise WrongAssingmentLeftPart(left)
 
         return output
 
+    def _assign_special_command(self, left: List, command: AFunction):
+        """
+        Assigns value returned by special command to variable. Command isn't repeated
+        in reactive mode, as it could plot
+
+        :param left: list of objects on left part of assignment
+        :param command: special command with its input
+        :return: assigned value
+        """
+        if len(left) != 1 or not isinstance(left[0], Variable):
+            raise WrongAssingmentLeftPart(left[0] if len(left) else None)
+        value = SPECIAL_COMMANDS[command.name].evaluate(command.input, self._variables, self._functions)
+        if not isinstance(value, MathPrimitive):
+            raise WrongSpecialCommandUse("{}() doesn't return value which could be assigned".format(command.name))
+        name = left[0].name
+        self._variables[name] = Variable(name, value)
+        self.dependencies.set_dependencies((VARIABLE, name), ())
+        self._refresh_dependents((VARIABLE, name))
+        return value
+
+    def _assign_variable(self, name: str, expr: Expression):
+        """
+        Assigns expression value to variable and records names expression reads.
+        In reactive mode variable keeps expression to be recomputed when these names change.
+        Assignment which reads variable itself (like 'a = a + 1'), directly or through
+        other names, stores only current value, as it can't be recomputed
+
+        :param name: variable name
+        :param expr: assigned expression
+        :return: assigned value
+        """
+        node = (VARIABLE, name)
+        names = read_names(expr.body)
+        if self.reactive and node not in names and not any(self.dependencies.depends_on(other, node)
+                                                          for other in names):
+            variable = ReactiveVariable(name, expr, self._evaluate_expression)
+            value = variable.val
+        else:
+            value = self._evaluate_expression(expr)
+            variable = Variable(name, value)
+            if self.reactive:
+                names = ()
+        self._variables[name] = variable
+        self.dependencies.set_dependencies(node, names)
+        return value
+
+    def _evaluate_expression(self, expr: Expression):
+        return auto_sparse(expr.evaluate(self._variables, self._functions))
+
+    def _define_function(self, left: UserDefinedFunction, right: List) -> str:
+        """
+        Defines function. Variables are substituted into body by their current values
+
+        :param left: function with input variable as input
+        :param right: list of objects of function body
+        :return: function definition as string
+        """
+        left_input_variable = left.input.body[0]
+        func_body = Expression(right)
+        if self._func_body_is_recursive(left.name, right):
+            raise FunctionIsRecursive(left.name)
+        names = read_names(func_body.body, exceptions=[left_input_variable])
+        func_body.evaluate_variables(self._variables, exceptions=[left_input_variable])
+        left.body = simplify(func_body)
+        left.input = left_input_variable
+        previous = self._functions.get(left.name)
+        if isinstance(previous, UserDefinedFunction):
+            left.memo = previous.memo  # stays enabled, cleared in _compile_functions
+        self._functions[left.name] = left
+        self.dependencies.set_dependencies((FUNCTION, left.name), names)
+        self._compile_functions(left.name)
+        return str(left)
+
+    def _refresh_dependents(self, node) -> None:
+        """
+        In reactive mode, marks variables which read changed name dirty, so they are
+        recomputed on next access, and redefines functions which read it.
+        Only subgraph of dependents is visited
+
+        :param node: (VARIABLE or FUNCTION, name) of changed name
+        """
+        if not self.reactive:
+            return
+        for kind, name in self.dependencies.dependents(node):
+            if kind == VARIABLE:
+                variable = self._variables.get(name)
+                if isinstance(variable, ReactiveVariable):
+                    variable.dirty = True
+            elif self._definitions.get(name) is not None:
+                left, right = deepcopy(self._definitions[name])
+                self._define_function(left, right)
+
+    def _parse_line(self, string: str) -> Tuple[str, List, List]:
+        """
+        Parses and classifies line, reusing ASTs of lines that were seen before.
+        Every statement kind is parsed by PrattParser. Evaluation mutates parsed objects,
+        so cache holds immutable AST, which is lowered to new objects on every use.
+        Line which PrattParser rejects is parsed by Parser, so it fails with same error
+        as before, usually on evaluation. It isn't cached.
+
+        :param string: input line
+        :return: same as _recognize_operation_type
+        """
+        key = self.parse_cache.normalize(string)
+        statement = self.parse_cache.get(key)
+        if statement is None:
+            tokens = self._tokenizer.tokenize(string)
+            try:
+                statement = self._parser.parse_statement(tokens)
+            except ParsingError:
+                return self._recognize_operation_type(self._fallback_parser.parse(tokens))
+            self.parse_cache.put(key, statement, len(tokens))
+        return self._recognize_operation_type(lower_statement(statement))
+
+    @staticmethod
+    def _as_expression(objs) -> Expression:
+        return objs if isinstance(objs, Expression) else Expression(objs)
+
+    def _compile_functions(self, func_name: str) -> None:
+        """
+        Compiles just defined function, then recompiles every function which calls it
+        directly or through other functions, as compiled functions are bound to
+        definitions of functions they call. Memoized results of these functions are dropped.
+        Variables are substituted into function body at definition, so reassigning
+        variable doesn't affect defined functions
+
+        :param func_name: name of defined function
+        """
+        pending = [func_name]
+        while pending:
+            name = pending.pop(0)
+            func = self._functions[name]
+            func.references = frozenset(find_references(func.body))
+            func.compiled = compile_function(func, self._functions)
+            func.vectorized = vectorize_function(func, self._functions)
+            if func.memo is not None:
+                func.memo.clear()
+            pending.extend(other.name for other in self._functions.values()
+                           if isinstance(other, UserDefinedFunction) and name in other.references)
+
+    def evaluate_function_many(self, func_name: str, xs):
+        """
+        Evaluates defined function at every value of array
+
+        :param func_name: name of function
+        :param xs: NumPy array (or sequence) of real or complex values
+        :return: ndarray of results
+        """
+        if func_name not in self._functions:
+            raise FunctionNotExists(func_name)
+        return self._functions[func_name].evaluate_many(xs, self._functions)
+
     def _func_body_is_recursive(self, func_name, func_body):
         """
         Checks if func_body contains any calls to func_name, including one that nested
@@ -194,6 +372,8 @@ class Interpreter:
 
         if Interpreter._is_special_command(left, right):
             op_type = "special"
+        elif assignment_indices and not question_mark and Interpreter._is_special_command(right, None):
+            op_type = "special_assignment"
         elif (question_mark and len(right) == 1 and len(left) == 1 and isinstance(left[0], AFunction) and
               len(left[0].input.body) == 1 and isinstance(left[0].input.body[0], Variable)):
             op_type = "print_func"  # stupid case for function definition printing
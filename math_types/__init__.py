@@ -4,8 +4,12 @@ from math_types.math_primitive import MathPrimitive
 from math_types.complex_number import ComplexNumber
 from math_types.matrix import Matrix
 from math_types.number import Number
-from math_types.variable import Variable
+from math_types.sparse_matrix import SparseMatrix
+from math_types.variable import Variable, ReactiveVariable
 from math_types.function import AFunction, SpecialNumericFunction, UserDefinedFunction
 from math_types.operator import Operator
 from math_types.expression import Expression
 from math_types.equation import Equation, Polynomial
+from math_types.math_primitive import register_types
+
+register_types(Number, ComplexNumber, Matrix, SparseMatrix)
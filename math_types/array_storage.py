@@ -0,0 +1,240 @@
+"""
+NumPy storage for big dense matrices.
+Matrix of Numbers or ComplexNumbers could keep its elements as one contiguous
+float64 or complex128 array instead of list of lists of boxed objects, so
+arithmetic is done by array kernels. Kernels are used only when their result is
+exactly what element by element arithmetic would print, otherwise (mixed int and
+float elements, possible int overflow, division by zero...) they return None
+and Matrix falls back to evaluation element by element.
+"""
+
+import operator
+from typing import Callable, List, Optional, Tuple
+from math_types.number import Number
+from math_types.complex_number import ComplexNumber
+from math_types.lazy_import import lazy_import
+
+np = lazy_import("numpy")  # None if NumPy isn't installed
+
+ARRAY_THRESHOLD = 100  # smaller matrices are kept as lists
+MAX_EXACT_INT = 2 ** 53  # every integer below is exactly representable by float64
+
+# kinds of stored values
+INT = "int"  # real integers (float64 array, boxed as int Numbers)
+REAL = "real"  # real floats
+COMPLEX = "complex"  # complex numbers with float real and imaginary parts
+
+Operand = Tuple[object, str]  # (array or scalar, kind)
+
+
+def to_array(rows: List[List]) -> Optional[Operand]:
+    """
+    :param rows: matrix elements as list of lists
+    :return: (array, kind), or None if elements can't be stored as array
+    """
+    if np is None:
+        return None
+    elements = [elem for row in rows for elem in row]
+    kind = _elements_kind(elements)
+    if kind is None:
+        return None
+    if kind == COMPLEX:
+        array = np.array([complex(elem.real, elem.imag) for elem in elements], dtype=np.complex128)
+    else:
+        array = np.array([elem.val for elem in elements], dtype=np.float64)
+    return array.reshape(len(rows), -1), kind
+
+
+def _elements_kind(elements: List) -> Optional[str]:
+    if all(type(elem) is Number for elem in elements):
+        if all(type(elem.val) is int and -MAX_EXACT_INT < elem.val < MAX_EXACT_INT for elem in elements):
+            return INT
+        if all(type(elem.val) is float for elem in elements):
+            return REAL
+    elif all(type(elem) is ComplexNumber and type(elem.real) is float and type(elem.imag) is float
+             for elem in elements):
+        return COMPLEX
+    return None
+
+
+def scalar_operand(obj) -> Optional[Operand]:
+    """
+    :param obj: Number or ComplexNumber
+    :return: (value, kind) or None if it can't be used by kernels
+    """
+    kind = _elements_kind([obj])
+    if kind is None:
+        return None
+    return (complex(obj.real, obj.imag), kind) if kind == COMPLEX else (float(obj.val), kind)
+
+
+def box_rows(array, kind: str) -> List[List]:
+    """
+    :return: array elements as list of lists of Numbers or ComplexNumbers
+    """
+    if kind == INT:
+        return [[Number(int(val)) for val in row] for row in array.tolist()]
+    if kind == REAL:
+        return [[Number(val) for val in row] for row in array.tolist()]
+    return [[ComplexNumber(val.real, val.imag) for val in row] for row in array.tolist()]
+
+
+def format_rows(array, kind: str) -> List[List[str]]:
+    """
+    :return: elements as they are printed by Number or ComplexNumber, without boxing
+    """
+    if kind == INT:
+        return [[str(int(val)) for val in row] for row in array.tolist()]
+    if kind == REAL:
+        return [[str(val) for val in row] for row in array.tolist()]
+    return [[str(ComplexNumber(val.real, val.imag)) for val in row] for row in array.tolist()]
+
+
+def element_type(kind: str) -> type:
+    return ComplexNumber if kind == COMPLEX else Number
+
+
+def _result_kind(left_kind: str, right_kind: str, op: Callable) -> str:
+    if COMPLEX in (left_kind, right_kind):
+        return COMPLEX
+    if left_kind == INT and right_kind == INT and op is not operator.truediv:
+        return INT
+    return REAL
+
+
+def _checked(result, kind: str):
+    """
+    Rejects results which element by element arithmetic would compute differently
+    """
+    if not np.isfinite(result).all():
+        return None
+    if kind == INT and result.size and np.abs(result).max() >= MAX_EXACT_INT:
+        return None
+    return result, kind
+
+
+def elementwise(left: Operand, right: Operand, op: Callable) -> Optional[Operand]:
+    """
+    :param left: left operand (array or scalar, kind)
+    :param right: right operand
+    :param op: one of operator.add, sub, mul, truediv, mod
+    :return: (result array, kind) or None if it should be computed element by element
+    """
+    (left_val, left_kind), (right_val, right_kind) = left, right
+    if op in (operator.truediv, operator.mod) and COMPLEX in (left_kind, right_kind):
+        return None  # ComplexNumber divides by its own formula
+    if op in (operator.truediv, operator.mod) and np.any(right_val == 0):
+        return None  # let Number raise its own error
+    kind = _result_kind(left_kind, right_kind, op)
+    with np.errstate(all="ignore"):
+        if kind == COMPLEX:
+            return _checked(_complex_elementwise(left_val, left_kind, right_val, right_kind, op), kind)
+        return _checked(op(left_val, right_val), kind)
+
+
+def _parts(val, kind: str):
+    return (np.real(val), np.imag(val)) if kind == COMPLEX else (val, None)
+
+
+def _complex_elementwise(left, left_kind: str, right, right_kind: str, op: Callable):
+    """
+    Follows formulas of ComplexNumber: NumPy promotes real operand to complex with zero
+    imaginary part, which changes signs of zeros and rounding of products
+    """
+    (left_re, left_im), (right_re, right_im) = _parts(left, left_kind), _parts(right, right_kind)
+    if op is operator.mul:
+        if left_im is None:
+            real, imag = left_re * right_re, left_re * right_im
+        elif right_im is None:
+            real, imag = left_re * right_re, left_im * right_re
+        else:
+            real = left_re * right_re - left_im * right_im
+            imag = left_re * right_im + left_im * right_re
+    else:
+        real = op(left_re, right_re)
+        if right_im is None:
+            imag = left_im
+        elif left_im is None:
+            imag = -right_im if op is operator.sub else right_im
+        else:
+            imag = op(left_im, right_im)
+    result = np.empty(np.broadcast(real, imag).shape, dtype=np.complex128)
+    result.real = real
+    result.imag = imag
+    return result
+
+
+def matmul(left: Operand, right: Operand) -> Optional[Operand]:
+    """
+    Matrix product. Products of integer matrices are exact only if every partial
+    sum is small enough, so they are checked against product of absolute values
+
+    :return: (result array, kind) or None
+    """
+    (left_val, left_kind), (right_val, right_kind) = left, right
+    kind = _result_kind(left_kind, right_kind, operator.mul)
+    with np.errstate(all="ignore"):
+        if kind == INT and _checked(np.abs(left_val) @ np.abs(right_val), INT) is None:
+            return None
+        return _checked(left_val @ right_val, kind)
+
+
+_UFUNCS = {operator.add: "add", operator.sub: "subtract", operator.mul: "multiply",
+           operator.truediv: "true_divide", operator.mod: "remainder"}
+
+
+def fused_elementwise(tree) -> Optional[Operand]:
+    """
+    Computes tree of element-wise operations without intermediate arrays: result of
+    operation is written into array which holds result of its operand, so only arrays
+    of leaves and of independent subtrees are allocated. Results are checked only
+    once, at the end, so bounds of integer values are estimated for every operation
+
+    :param tree: (op, left, right), where op is one of operator.add, sub, mul, truediv, mod,
+        and operands are trees or Operands
+    :return: (result array, kind) or None if it should be computed element by element
+    """
+    if np is None:
+        return None
+    with np.errstate(all="ignore"):
+        res = _fused(tree)
+    if res is None:
+        return None
+    val, kind = res[:2]
+    return _checked(val, kind)
+
+
+def _fused(tree):
+    """
+    :return: (value, kind, bound of absolute value for INT kind, True if value is array
+        allocated here) or None
+    """
+    if len(tree) == 2:
+        val, kind = tree
+        if kind == COMPLEX:
+            return None  # ComplexNumber formulas aren't followed
+        bound = (np.abs(val).max() if isinstance(val, np.ndarray) else abs(val)) if kind == INT else None
+        return val, kind, bound, False
+    op, left, right = tree
+    left, right = _fused(left), _fused(right)
+    if left is None or right is None:
+        return None
+    (left_val, left_kind, left_bound, left_owned), (right_val, right_kind, right_bound, right_owned) = left, right
+    if op in (operator.truediv, operator.mod):
+        if np.any(right_val == 0):
+            return None  # let Number raise its own error
+        if not (np.isfinite(left_val).all() and np.isfinite(right_val).all()):
+            return None  # infinite values could vanish here, so they are computed element by element
+    kind = _result_kind(left_kind, right_kind, op)
+    bound = None
+    if kind == INT:
+        if op is operator.mul:
+            bound = left_bound * right_bound
+        elif op is operator.mod:
+            bound = right_bound
+        else:
+            bound = left_bound + right_bound
+        if bound >= MAX_EXACT_INT:
+            return None
+    out = left_val if left_owned else right_val if right_owned else None
+    return getattr(np, _UFUNCS[op])(left_val, right_val, out=out), kind, bound, True
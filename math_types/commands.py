@@ -1,60 +1,94 @@
 from math_types import *
+from math_types.vectorized import evaluate_many
+from math_types.memo_cache import MemoCache
+from math_types.regression import LinearRegression
+from math_types import least_squares, plot_sampling, plot_renderer
+from exceptions import MathException
 from exceptions.evaluation_exceptions import *
-import matplotlib.pyplot as plt
+import numpy as np
 
 
 def plot_command(func_input, variables, functions):
     """
     Special command that plots function at defined x range
-    Usage: plot(func, x_1, x_2)
+    Usage: plot(func, x_1, x_2) or plot(func, x_1, x_2, tolerance)
     func should AFunction object, should take Number and return Number
     x_1, x_2 could be Expressions which define plot x limits
+    Function is sampled adaptively (see plot_sampling): more points are taken where plot
+    bends or jumps, tolerance is allowed error relative to range of function values.
+    Points where function isn't defined are left out of plot
 
     func_input: list of objects passed to plot()
     variables: dict of defined variables
     functions: dict of defined functions
-    returns: None
+    returns: path of image file in headless mode (see plot_renderer) or None
     """
-    delimiters_idx = []
-
-    for i, obj in enumerate(func_input):
-        if isinstance(obj, Operator) and obj.op == ",":
-            delimiters_idx.append(i)
-    if len(delimiters_idx) != 2:
-        raise WrongSpecialCommandUse("plot usage: plot(func, min_x, max_x)")
-    func = func_input[:delimiters_idx[0]]
-    left = func_input[delimiters_idx[0]+1:delimiters_idx[1]]
-    left = Expression(left).evaluate(variables, functions)
-    right = func_input[delimiters_idx[1]+1:]
-    right = Expression(right).evaluate(variables, functions)
+    usage = "plot usage: plot(func, min_x, max_x) or plot(func, min_x, max_x, tolerance)"
+    args = _split_arguments(func_input)
+    if len(args) not in (3, 4) or not all(args):
+        raise WrongSpecialCommandUse(usage)
+    func = args[0]
+    left, right, *tolerance = (Expression(arg).evaluate(variables, functions) for arg in args[1:])
 
     if (len(func) != 1 or not isinstance(func[0], AFunction) or
             not isinstance(left, Number) or not isinstance(right, Number)):
-        raise WrongSpecialCommandUse("plot usage: plot(func, min_x, max_x)")
+        raise WrongSpecialCommandUse(usage)
+    if tolerance and (not isinstance(tolerance[0], Number) or tolerance[0].val <= 0):
+        raise WrongSpecialCommandUse("Plot tolerance should be positive number")
+    tolerance = tolerance[0].val if tolerance else plot_sampling.DEFAULT_TOLERANCE
 
     if func[0].name not in functions:
         raise FunctionNotExists(func.name)
     func = functions[func[0].name]
 
-    x = []
-    dx = (right.val - left.val) / 1000
-    for i in range(1000):
-        x.append(left.val + dx*i)
-    y = []
-    for x_i in x:
-        res = func.evaluate(Expression([Number(x_i)]), variables, functions)
-        if not isinstance(res, Number):
-            raise WrongSpecialCommandUse("Plotted function returned not a Number")
-        y.append(res.val)
-
-    plt.figure()
-    plt.ion()
-    plt.plot(x, y)
-    plt.axhline(color="black")
-    plt.axvline(color="black")
-    plt.show()
-    plt.pause(0.001)
-    return None
+    renderer = plot_renderer.current()
+
+    def show_level(x, y):
+        # progressive renderer shows coarse plot at once, then it's refined
+        if np.isfinite(y).any():
+            renderer.render("plot", _function_plot(x, y), final=False)
+
+    try:
+        x, y, _ = plot_sampling.adaptive_sample(lambda xs: evaluate_points(func, xs, functions),
+                                                left.val, right.val, tolerance,
+                                                on_level=show_level if renderer.progressive else None)
+        if not np.isfinite(y).any():
+            raise WrongSpecialCommandUse("Plotted function isn't defined at plot range")
+        return renderer.render("plot", _function_plot(x, y))
+    finally:
+        # plot which was shown unrefined isn't replaced by next plot if this one is aborted
+        renderer.cancel()
+
+
+def _function_plot(x, y):
+    """
+    :return: plot of function with coordinate axes as list of calls of Axes methods
+    """
+    return [("plot", (x, y), {}), ("axhline", (), {"color": "black"}), ("axvline", (), {"color": "black"})]
+
+
+def evaluate_points(func, xs, functions):
+    """
+    Evaluates function at batch of points, one by one if some of them are out of function domain
+
+    :return: array of real values, nan where function isn't defined
+    """
+    try:
+        y = evaluate_many(func, xs, functions)
+    except NonNumericResult:
+        y = None
+    except (MathException, BadFunctionInput):
+        y = np.array([_evaluate_point(func, x, functions) for x in xs])
+    if y is None or np.iscomplexobj(y):
+        raise WrongSpecialCommandUse("Plotted function returned not a Number")
+    return y
+
+
+def _evaluate_point(func, x, functions):
+    try:
+        return evaluate_many(func, [x], functions)[0]
+    except (MathException, BadFunctionInput):
+        return np.nan
 
 
 def vars_command(func_input, variables, functions):
@@ -91,17 +125,63 @@ def funcs_command(func_input, variables, functions):
     return "\n".join(vars)
 
 
+def cache_command(func_input, variables, functions):
+    """
+    Manages memo tables of user defined functions
+    Usage: cache() - show statistics of every memoized function
+           cache(clear) - drop all memoized results
+           cache(func) - memoize func results with default memory budget
+           cache(func, budget) - memoize func results using at most budget bytes, 0 disables memoization
+
+    func_input: list of objects passed to cache()
+    variables: dict of defined variables
+    functions: dict of defined functions
+    returns: string or None
+    """
+    memoized = [func for func in functions.values() if isinstance(func, UserDefinedFunction) and func.memo is not None]
+    if len(func_input) == 0:
+        if not memoized:
+            return "No memoized functions"
+        return "\n".join("{}: {}".format(func.name, func.memo) for func in memoized)
+
+    comma_idx = [i for i, obj in enumerate(func_input) if isinstance(obj, Operator) and obj.op == ","]
+    if len(comma_idx) > 1 or comma_idx and comma_idx[0] != 1 or not isinstance(func_input[0], (Variable, AFunction)):
+        raise WrongSpecialCommandUse("cache usage: cache(), cache(clear), cache(func) or cache(func, budget)")
+    name = func_input[0].name
+
+    if name == "clear" and not comma_idx:
+        for func in memoized:
+            func.memo.clear()
+        return None
+
+    if name not in functions:
+        raise FunctionNotExists(name)
+    func = functions[name]
+    if not isinstance(func, UserDefinedFunction):
+        raise WrongSpecialCommandUse("Only user defined functions could be memoized")
+    if not comma_idx:
+        func.memo = MemoCache()
+        return None
+    budget = Expression(func_input[2:]).evaluate(variables, functions)
+    if not isinstance(budget, Number) or budget.val < 0 or budget.val != int(budget.val):
+        raise WrongSpecialCommandUse("Memory budget should be non-negative integer")
+    func.memo = MemoCache(int(budget.val)) if budget.val else None
+    return None
+
+
 def linreg_command(func_input, variables, functions):
     """
     usage: linreg(X, Y) where X and Y row matrices with same shape
+           linreg(X, Y, noplot) - only returns coefficients
     X and Y define set of points on 2D euclidean plane
-    This functions tries to find best-fit line using normal equations.
-    Then it plots points and line.
+    This functions finds best-fit line by least squares in one pass over points
+    (see regression.LinearRegression). Then it plots points and line.
 
     func_input: list of objects passed to linreg()
     variables: dict of defined variables
     functions: dict of defined functions
-    returns: None
+    returns: path of image file in headless mode (see plot_renderer) or None,
+             Matrix [[intercept]; [slope]] in noplot mode
     """
     # validate
     delimiters_idx = []
@@ -109,12 +189,18 @@ def linreg_command(func_input, variables, functions):
     for i, obj in enumerate(func_input):
         if isinstance(obj, Operator) and obj.op == ",":
             delimiters_idx.append(i)
-    if len(delimiters_idx) != 1:
-        raise WrongSpecialCommandUse("linreg usage: linreg(X, Y)")
+    if len(delimiters_idx) not in (1, 2):
+        raise WrongSpecialCommandUse("linreg usage: linreg(X, Y) or linreg(X, Y, noplot)")
+    plot = len(delimiters_idx) == 1
+    if not plot:
+        mode = func_input[delimiters_idx[1] + 1:]
+        if len(mode) != 1 or not isinstance(mode[0], Variable) or mode[0].name != "noplot":
+            raise WrongSpecialCommandUse("linreg usage: linreg(X, Y) or linreg(X, Y, noplot)")
     left = func_input[:delimiters_idx[0]]
     left = Expression(left).evaluate(variables, functions)
-    right = func_input[delimiters_idx[0] + 1:]
+    right = func_input[delimiters_idx[0] + 1:delimiters_idx[1] if not plot else len(func_input)]
     right = Expression(right).evaluate(variables, functions)
+    left, right = (val.to_dense() if isinstance(val, SparseMatrix) else val for val in (left, right))
 
     if (not isinstance(left, Matrix) or not left.rows == 1 or not
             isinstance(right, Matrix) or not right.rows == 1 or not
@@ -122,33 +208,122 @@ def linreg_command(func_input, variables, functions):
         raise WrongSpecialCommandUse("X and Y matrices both should be of (1, N) shape")
 
     # solve lin reg
-    X = Matrix(left.cols, 2, [[Number(1), left.matrix[0][i]] for i in range(left.cols)])
-    Y = right.transpose_matrix()
-    theta = ((X.transpose_matrix() ** X).invert_matrix() ** X.transpose_matrix() ** Y)
+    regression = LinearRegression.from_matrices(left, right)
+    intercept, slope = regression.coefficients()
+    if not plot:
+        return Matrix(2, 1, [[Number(intercept)], [Number(slope)]])
 
-    f = lambda x: theta.matrix[0][0].val + theta.matrix[1][0].val * x
+    f = lambda x: intercept + slope * x
+    min_x, max_x = regression.min_x, regression.max_x
 
-    # find points and x limit
-    min_x = float("inf")
-    max_x = float("-inf")
+    x_points = [elem.val for elem in left._read_rows()[0]]
+    y_points = [elem.val for elem in right._read_rows()[0]]
 
-    for i in range(X.rows):
-        val = X.matrix[i][1].val
-        if val < min_x:
-            min_x = val
-        if val > max_x:
-            max_x = val
+    # plot
+    calls = [("plot", ([min_x, max_x], [f(min_x), f(max_x)]), {"color": "red"}),
+             ("scatter", (x_points, y_points), {}),
+             ("set_title", ("f(x) = {:.3f} + {:.3f}*x".format(intercept, slope),), {})]
+    return plot_renderer.current().render("linreg", calls)
 
-    x_points = [X.matrix[i][1].val for i in range(X.rows)]
-    y_points = [Y.matrix[i][0].val for i in range(Y.rows)]
 
-    # plot
-    plt.figure()
-    plt.ion()
-    plt.plot([min_x, max_x], [f(min_x), f(max_x)], color="red")
-    plt.scatter(x_points, y_points)
-    plt.show()
-    plt.pause(0.001)
-    plt.title("f(x) = {:.3f} + {:.3f}*x".format(theta.matrix[0][0].val, theta.matrix[1][0].val))
+def _split_arguments(func_input):
+    """
+    :return: list of lists of objects between commas
+    """
+    args = [[]]
+    for obj in func_input:
+        if isinstance(obj, Operator) and obj.op == ",":
+            args.append([])
+        else:
+            args[-1].append(obj)
+    return args
 
-    return None
+
+def _plot_flag(args, usage):
+    """
+    Removes optional last argument 'plot'
+
+    :return: True if it was passed
+    """
+    last = args[-1]
+    if len(last) == 1 and isinstance(last[0], Variable) and last[0].name == "plot":
+        args.pop()
+        return True
+    if any(not arg for arg in args):
+        raise WrongSpecialCommandUse(usage)
+    return False
+
+
+def _plot_fit(name, x, y, coefficients, title):
+    """
+    Plots points and polynomial with coefficients from constant term
+    """
+    x_points, y_points = least_squares.values(x), least_squares.values(y)
+    line_x = np.linspace(x_points.min(), x_points.max(), 1000)
+    line_y = np.polynomial.polynomial.polyval(line_x, coefficients)
+
+    calls = [("plot", (line_x, line_y), {"color": "red"}), ("scatter", (x_points, y_points), {}),
+             ("set_title", (title,), {})]
+    plot_renderer.current().render(name, calls)
+
+
+def polyfit_command(func_input, variables, functions):
+    """
+    usage: polyfit(X, Y, degree) or polyfit(X, Y, degree, plot)
+    X and Y row or column matrices with same number of elements
+    Finds polynomial of degree which fits points best by least squares (see least_squares),
+    plots it with points if plot is passed.
+    Result could be assigned to variable: C = polyfit(X, Y, 2)
+
+    func_input: list of objects passed to polyfit()
+    variables: dict of defined variables
+    functions: dict of defined functions
+    returns: column Matrix of coefficients, from constant term to coefficient of x^degree
+    """
+    usage = "polyfit usage: polyfit(X, Y, degree) or polyfit(X, Y, degree, plot)"
+    args = _split_arguments(func_input)
+    plot = _plot_flag(args, usage)
+    if len(args) != 3:
+        raise WrongSpecialCommandUse(usage)
+    x, y, degree = (Expression(arg).evaluate(variables, functions) for arg in args)
+    if not isinstance(x, (Matrix, SparseMatrix)) or not isinstance(y, (Matrix, SparseMatrix)):
+        raise WrongSpecialCommandUse("X and Y should be matrices")
+    if not isinstance(degree, Number) or degree.val < 0 or degree.val != int(degree.val):
+        raise WrongSpecialCommandUse("Degree should be non-negative integer")
+
+    coefficients = least_squares.polyfit(x, y, int(degree.val))
+    if plot:
+        title = "f(x) = " + " + ".join("{:.3g}*x^{}".format(val, k) for k, val in enumerate(coefficients))
+        _plot_fit("polyfit", x, y, coefficients, title)
+    return least_squares.as_column(coefficients)
+
+
+def linfit_command(func_input, variables, functions):
+    """
+    usage: linfit(X, Y) or linfit(X, Y, plot)
+    X matrix with row of features for every point (or row matrix with one feature of
+    every point), Y row or column matrix with value for every point
+    Finds linear function of features which fits values best by least squares (see least_squares),
+    fit of one feature could be plotted.
+    Result could be assigned to variable: C = linfit(X, Y)
+
+    func_input: list of objects passed to linfit()
+    variables: dict of defined variables
+    functions: dict of defined functions
+    returns: column Matrix of coefficients, intercept first
+    """
+    usage = "linfit usage: linfit(X, Y) or linfit(X, Y, plot)"
+    args = _split_arguments(func_input)
+    plot = _plot_flag(args, usage)
+    if len(args) != 2:
+        raise WrongSpecialCommandUse(usage)
+    x, y = (Expression(arg).evaluate(variables, functions) for arg in args)
+    if not isinstance(x, (Matrix, SparseMatrix)) or not isinstance(y, (Matrix, SparseMatrix)):
+        raise WrongSpecialCommandUse("X and Y should be matrices")
+    if plot and x.rows != 1 and x.cols != 1:
+        raise WrongSpecialCommandUse("Only fit of one feature could be plotted")
+
+    coefficients = least_squares.linfit(x, y)
+    if plot:
+        _plot_fit("linfit", x, y, coefficients, "f(x) = {:.3f} + {:.3f}*x".format(*coefficients))
+    return least_squares.as_column(coefficients)
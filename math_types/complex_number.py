@@ -18,6 +18,7 @@ class ComplexNumber(MathPrimitive):
                    "^": "power_comp_num",
                    "%": "modulo_comp_num",
                    "**": "matmul_comp_num"}
+    __slots__ = ("real", "imag")
 
     def __init__(self, real: float, imag: float):
         """
@@ -27,6 +28,12 @@ class ComplexNumber(MathPrimitive):
         self.real = real
         self.imag = imag
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __eq__(self, other):
         return isclose(self.real, other.real) and isclose(self.imag, other.imag)
 
@@ -67,12 +74,10 @@ class ComplexNumber(MathPrimitive):
         return ComplexNumber(real, imag)
 
     def matrix_elementwise_op(self, matrix, op):
-        from math_types import Matrix
-        res = Matrix(matrix.rows, matrix.cols, [row[:] for row in matrix.matrix])
-        for row_idx in range(res.rows):
-            for col_idx in range(res.cols):
-                res.matrix[row_idx][col_idx] = op(res.matrix[row_idx][col_idx], self)
-        return res
+        res = matrix.apply_scalar(self, op)
+        if res is not None:
+            return res
+        return matrix.map_elements(lambda elem: op(elem, self))
 
     def add_to_matrix(self, other):
         return self.matrix_elementwise_op(other, operator.add)
@@ -85,3 +90,15 @@ class ComplexNumber(MathPrimitive):
 
     def divide_matrix(self, other):
         return self.matrix_elementwise_op(other, operator.truediv)
+
+    def add_to_sparse(self, other):
+        return other.scalar_op(self, operator.add)
+
+    def subtract_from_sparse(self, other):
+        return other.scalar_op(self, operator.sub)
+
+    def multiply_by_sparse(self, other):
+        return other.scalar_op(self, operator.mul)
+
+    def divide_sparse(self, other):
+        return other.scalar_op(self, operator.truediv)
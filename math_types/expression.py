@@ -2,21 +2,64 @@ from typing import List, Optional, Tuple, Dict
 from consts import OPERATOR_PRECEDENCE, OPERATOR_MAP
 from math_types import Variable, MathPrimitive, Matrix, Number, ComplexNumber, AFunction
 from math_types.operator import Operator
+from math_types import lazy_matrix
 from exceptions.parsing_exceptions import UnexpectedToken
 from exceptions.evaluation_exceptions import FunctionNotExists, ExpressionIsNotValid, \
     NoExpectedOperand, VariableNotDefined, WrongMatrixElementType
 
 
+class _NotCompiled:
+    """Marks expression which wasn't compiled yet. Copies of expression share it"""
+    def __deepcopy__(self, memo):
+        return self
+
+
+_NOT_COMPILED = _NotCompiled()
+UNARY_MINUS_PRECEDENCE = float("inf")  # unary minus binds to single operand after it, so -x^2 is (-x)^2
+
+
+def negate(value: MathPrimitive) -> MathPrimitive:
+    """
+    Instruction of compiled program for unary minus
+    """
+    return Number(-1) * value
+
+
 class Expression:
-    def __init__(self, body):
-        self.body = body
-        self._preprocess_expression()
+    __slots__ = ("_body", "_program")
+
+    def __init__(self, body, preprocess=True):
+        """
+        :param body: list of math objects
+        :param preprocess: False if body is already in explicit form(built from AST),
+                           so hidden multiplication shouldn't be searched.
+                           Unary minus is kept in both forms as "-" in place of operand
+        """
+        self._body = body
+        self._program = _NOT_COMPILED
+        if preprocess:
+            self._preprocess_expression()
+
+    @property
+    def body(self):
+        return self._body
+
+    @body.setter
+    def body(self, body):
+        self._body = body
+        self._program = _NOT_COMPILED
 
     def __len__(self):
         return len(self.body)
 
     def __str__(self):
-        return " ".join(str(obj) for obj in self.body)
+        parts = []
+        for i, obj in enumerate(self.body):
+            if i and self._is_unary_minus(i - 1):
+                parts[-1] += str(obj)
+            else:
+                parts.append(str(obj))
+        return " ".join(parts)
 
     __repr__ = __str__
 
@@ -32,7 +75,10 @@ class Expression:
     def evaluate(self, variables: Dict[str, Variable],
                        functions: Dict[str, AFunction]) -> MathPrimitive:
         """
-        Tries to evaluate self using simple algorithm:
+        Replaces matrices, variables and functions by their values, then runs
+        postfix program of self on them. Body isn't modified.
+        If expression is malformed and couldn't be compiled, it's evaluated using
+        bracket reduction, which reports the exact error:
         while expression not simple(one term):
             find deepest nested brackets
             evaluate expression inside brackets and replace it with result
@@ -41,26 +87,159 @@ class Expression:
         :param functions: dictionary of defined functions
         :return: result of evaluation
         """
-        original_body = self.body.copy()
-        result = self._evaluate(variables, functions)
-        self.body = original_body
-        return result
+        values = self._evaluate_operands(variables, functions)
+        program = self.compile()
+        if program is None:
+            return self._reduce_brackets(values)
+        if any(value.__class__ is Matrix for value in values):
+            return self._run_matrix_program(program, values)
+        return self._run_program(program, values)
+
+    def compile(self) -> Optional[List]:
+        """
+        Compiles self to postfix program using shunting-yard algorithm. Program is built
+        once and reused by every evaluation, as it depends only on positions of operators.
+        Every instruction is either index of operand in body, binary operator function
+        or negate for unary minus.
+
+        :return: list of instructions, or None if expression is malformed
+        """
+        if self._program is _NOT_COMPILED:
+            self._program = self._compile(self.body)
+        return self._program
+
+    @staticmethod
+    def _compile(expr: List) -> Optional[List]:
+        program = []
+        operators = []  # stack of (precedence, function), None for opening bracket
+        expect_operand = True
+        for i, obj in enumerate(expr):
+            if not isinstance(obj, Operator):
+                if not expect_operand:
+                    return None
+                program.append(i)
+                expect_operand = False
+            elif obj.op == "(":
+                if not expect_operand:
+                    return None
+                operators.append(None)
+            elif obj.op == ")":
+                if expect_operand:
+                    return None
+                while operators and operators[-1] is not None:
+                    program.append(operators.pop()[1])
+                if not operators:
+                    return None
+                operators.pop()
+            elif obj.op == "-" and expect_operand:
+                if operators and operators[-1] is not None and operators[-1][1] is negate:
+                    return None  # '- - x' isn't valid, as in PrattParser
+                operators.append((UNARY_MINUS_PRECEDENCE, negate))
+            elif obj.op in OPERATOR_PRECEDENCE:
+                if expect_operand:
+                    return None
+                prec = OPERATOR_PRECEDENCE[obj.op]
+                # all operators are left associative
+                while operators and operators[-1] is not None and operators[-1][0] >= prec:
+                    program.append(operators.pop()[1])
+                operators.append((prec, OPERATOR_MAP[obj.op]))
+                expect_operand = True
+            else:
+                return None
+        if expect_operand:
+            return None
+        while operators:
+            operator = operators.pop()
+            if operator is None:
+                return None
+            program.append(operator[1])
+        return program
+
+    @staticmethod
+    def _run_program(program: List, values: List) -> MathPrimitive:
+        """
+        Stack machine for postfix program
+
+        :param program: compiled program
+        :param values: body of expression with evaluated operands
+        :return: result of evaluation
+        """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for instruction in program:
+            if type(instruction) is int:
+                push(values[instruction])
+            elif instruction is negate:
+                stack[-1] = negate(stack[-1])
+            else:
+                right = pop()
+                stack[-1] = instruction(stack[-1], right)
+        return stack[0]
+
+    @staticmethod
+    def _run_matrix_program(program: List, values: List) -> MathPrimitive:
+        """
+        Stack machine for postfix program with matrices: element-wise operations
+        on matrices are deferred and fused (see lazy_matrix), they are computed
+        when other operation needs their value, or at the end of program
+
+        :param program: compiled program
+        :param values: body of expression with evaluated operands
+        :return: result of evaluation
+        """
+        stack = []
+        push = stack.append
+        pop = stack.pop
+        for instruction in program:
+            if type(instruction) is int:
+                push(values[instruction])
+            elif instruction is negate:
+                stack[-1] = lazy_matrix.apply(Number(-1), OPERATOR_MAP["*"], stack[-1])
+            else:
+                right = pop()
+                try:
+                    stack[-1] = lazy_matrix.apply(stack[-1], instruction, right)
+                except Exception:
+                    # deferred operations come first, so their errors are reported first
+                    for value in stack + [right]:
+                        lazy_matrix.materialize(value)
+                    raise
+        return lazy_matrix.materialize(stack[0])
+
+    def _is_unary_minus(self, idx: int) -> bool:
+        obj = self.body[idx]
+        if not isinstance(obj, Operator) or obj.op != "-":
+            return False
+        return idx == 0 or (isinstance(self.body[idx - 1], Operator) and self.body[idx - 1].op not in ")]")
 
     def _preprocess_expression(self):
-        objs = self._preprocess_hidden_multiplication(self.body)
-        objs = self._preprocess_unary_minus(objs)
-        self.body = objs
+        self.body = self._preprocess_hidden_multiplication(self.body)
 
-    def _evaluate(self, variables: Dict[str, Variable],
-                        functions: Dict[str, AFunction]) -> MathPrimitive:
+    def _evaluate_operands(self, variables: Dict[str, Variable],
+                                 functions: Dict[str, AFunction]) -> List:
         """
-        Helper function for self.evaluate
+        Evaluates matrices, variables and functions, in that order
+
+        :param variables: dictionary of defined variables
+        :param functions: dictionary of defined functions
+        :return: copy of body where they're replaced by values
+        """
+        values = self.body[:]
+        self._evaluate_matrices(values, variables, functions)
+        self._evaluate_variables(values, variables)
+        self._evaluate_functions(values, variables, functions)
+        return values
+
+    def _reduce_brackets(self, expr: List) -> MathPrimitive:
         """
-        self._evaluate_matrices(variables, functions)
-        self.evaluate_variables(variables)
-        self._evaluate_functions(variables, functions)
+        Evaluates expression by reducing deepest brackets one by one.
+        Unary minus is replaced by multiplication by -1 first, as only binary operators are reduced
 
-        res_expr = self.body[:]
+        :param expr: body of expression with evaluated operands
+        :return: result of evaluation
+        """
+        res_expr = self._preprocess_unary_minus(expr)
         while True:
             idx1, idx2 = self._get_deepest_brackets(res_expr)
             if idx1 is None:
@@ -71,43 +250,48 @@ class Expression:
             res_expr = res_expr[:idx1] + [res] + res_expr[idx2+1:]
         return res
 
-    def _evaluate_matrices(self, variables: Dict[str, Variable],
-                                 functions: Dict[str, AFunction]) -> None:
+    @staticmethod
+    def _evaluate_matrices(expr: List, variables: Dict[str, Variable],
+                           functions: Dict[str, AFunction]) -> None:
         """
-        Searches for matrices in self.body and tries to evaluate their elements
+        Searches for matrices in expr and replaces them with matrices of evaluated elements.
+        Matrices in body aren't modified, so they could be evaluated again with other variables.
 
+        :param expr: copy of body
         :param variables: dictionary of defined variables
         :param functions: dictionary of defined functions
         """
-        for obj in self.body:
+        for i, obj in enumerate(expr):
             if isinstance(obj, Matrix):
-                for row_idx in range(obj.rows):
-                    for col_idx in range(obj.cols):
-                        if not isinstance(obj.matrix[row_idx][col_idx], (Number, ComplexNumber)):
-                            matrix_elem = obj.matrix[row_idx][col_idx].evaluate(variables, functions)
-                        else:
-                            matrix_elem = obj.matrix[row_idx][col_idx]
-                        if not isinstance(matrix_elem, (Number, ComplexNumber)):
-                            raise WrongMatrixElementType(matrix_elem)
-                        obj.matrix[row_idx][col_idx] = matrix_elem
-
-    def _evaluate_functions(self, variables: Dict[str, Variable],
+                if obj.elements_are((Number, ComplexNumber)):
+                    continue
+                matrix = [row[:] for row in obj.matrix]
+                for row in matrix:
+                    for col_idx, elem in enumerate(row):
+                        if not isinstance(elem, (Number, ComplexNumber)):
+                            elem = elem.evaluate(variables, functions)
+                            if not isinstance(elem, (Number, ComplexNumber)):
+                                raise WrongMatrixElementType(elem)
+                            row[col_idx] = elem
+                expr[i] = Matrix(obj.rows, obj.cols, matrix)
+
+    @staticmethod
+    def _evaluate_functions(expr: List, variables: Dict[str, Variable],
                             functions: Dict[str, AFunction]) -> None:
         """
-        Searches for functions in self.body and tries to evaluate them using definition from given dict
+        Searches for functions in expr and replaces them with results, using definition from given dict
 
+        :param expr: copy of body
         :param variables: dictionary of defined variables
         :param functions: dictionary of defined functions
         """
-        for i, obj in enumerate(self.body):
+        for i, obj in enumerate(expr):
             if isinstance(obj, AFunction):
                 func_name = obj.name
                 if func_name not in functions:
                     raise FunctionNotExists(func_name)
 
-                res = functions[func_name].evaluate(obj.input, variables, functions)
-
-                self.body[i] = res
+                expr[i] = functions[func_name].evaluate(obj.input, variables, functions)
 
     def evaluate_variables(self, variables: Dict[str, Variable],
                            exceptions: Optional[List[Variable]]=None) -> None:
@@ -117,7 +301,12 @@ class Expression:
         :param variables: dictionary of defined variables
         :param exceptions: list of variables which shouldn't be evaluated
         """
-        for i, obj in enumerate(self.body):
+        self._evaluate_variables(self.body, variables, exceptions)
+
+    @staticmethod
+    def _evaluate_variables(expr: List, variables: Dict[str, Variable],
+                            exceptions: Optional[List[Variable]]=None) -> None:
+        for i, obj in enumerate(expr):
             if isinstance(obj, Variable):
                 if exceptions and obj in exceptions:
                     continue
@@ -125,7 +314,7 @@ class Expression:
                 var_name = obj.name
                 if var_name not in variables:
                     raise VariableNotDefined(var_name)
-                self.body[i] = variables[var_name].val
+                expr[i] = variables[var_name].val
 
     @staticmethod
     def _get_deepest_brackets(expr: List) -> Tuple[Optional[int], Optional[int]]:
@@ -198,7 +387,7 @@ class Expression:
             if (isinstance(expr[i], Operator) and expr[i].op == '-'):   # replace -2 with   (-1 * 2)
                 if ((i == 0 or (i != 0 and type(expr[i-1]) is Operator and expr[i-1].op not in ")]"))
                         and i != (len(expr)-1)
-                        and type(expr[i+1]) in (Number, ComplexNumber, Matrix, Variable, AFunction)):
+                        and not isinstance(expr[i+1], Operator)):
                     new_expr.extend([Operator("("), Number(-1), Operator("*"), expr[i+1], Operator(")")])
                     i += 2
                     continue
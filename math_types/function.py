@@ -1,10 +1,12 @@
 """Function class implementation"""
-from math_types import Variable, Number, Matrix
+from math_types import Variable, Number, ComplexNumber, Matrix, SparseMatrix
 from exceptions.evaluation_exceptions import SpecialFunctionWrongUsage, BadFunctionInput
 import abc
 
 
 class AFunction(abc.ABC):
+    __slots__ = ("name", "input", "_body")
+
     def __init__(self, name, input_, body=None):
         """
         :param name: function name
@@ -38,9 +40,16 @@ class UserDefinedFunction(AFunction):
     If function represents only function call, it's body is None and input is Expression
     Else if function is defined as math object, it's body is Expression, and input is Variable which
         is used in function body
+    If memo is MemoCache, results are memoized by evaluated input
     """
+    __slots__ = ("compiled", "vectorized", "references", "memo")
+
     def __init__(self, name, input_, body=None):
         super().__init__(name, input_, body)
+        self.compiled = None
+        self.vectorized = None
+        self.references = frozenset()
+        self.memo = None
 
     def __eq__(self, other):
         return self.name == other.name and self.input == other.input
@@ -57,13 +66,46 @@ class UserDefinedFunction(AFunction):
         if self.body is None:
             raise Exception("Shouldn't be here")
 
-        func_var_name = self.input.name
         func_input_value = func_input.evaluate(variables, functions)
+        return self.evaluate_value(func_input_value, functions)
 
-        res = self.body.evaluate({func_var_name: Variable(func_var_name, func_input_value)},
-                                 functions)
+    def evaluate_value(self, value, functions):
+        """
+        Evaluates self with already evaluated input. Compiled body is used for numbers,
+        other inputs are evaluated by body expression
+
+        :param value: input value (MathPrimitive)
+        :param functions: dict of defined functions
+        :return: evaluation result (MathPrimitive)
+        """
+        if self.memo is None:
+            return self._evaluate_value(value, functions)
+        from math_types.memo_cache import memo_key
+        key = memo_key(value)
+        if key is None:
+            return self._evaluate_value(value, functions)
+        result = self.memo.get(key)
+        if result is None:
+            result = self._evaluate_value(value, functions)
+            self.memo.put(key, result)
+        return result
+
+    def _evaluate_value(self, value, functions):
+        if self.compiled is not None and isinstance(value, (Number, ComplexNumber)):
+            return self.compiled(value)
+        func_var_name = self.input.name
+        return self.body.evaluate({func_var_name: Variable(func_var_name, value)}, functions)
 
-        return res
+    def evaluate_many(self, xs, functions):
+        """
+        Evaluates self at every value of array, using NumPy when body could be vectorized
+
+        :param xs: array of real or complex values
+        :param functions: dict of defined functions
+        :return: ndarray of results
+        """
+        from math_types.vectorized import evaluate_many
+        return evaluate_many(self, xs, functions)
 
 
 class SpecialFunction(AFunction):
@@ -75,18 +117,24 @@ class SpecialFunction(AFunction):
     Also, such functions usually expect arguments with defined type, so it has
     argument check before execution
     """
-    def __init__(self, name, eval_func, expected_types):
+    __slots__ = ("eval_func", "expected_types", "arg_names", "arg_counts")
+
+    def __init__(self, name, eval_func, expected_types, arg_names=("x",), arg_counts=None):
         """
         :param name: function name
         :param eval_func: function which will be called during evaluation
         :param expected_types: tuple of accessible argument types
+        :param arg_names: names of arguments shown in function description
+        :param arg_counts: tuple of accepted numbers of arguments, all of arg_names by default
         """
-        super().__init__(name, Variable("x"))
+        super().__init__(name, Variable(arg_names[0]) if len(arg_names) == 1 else None)
         self.eval_func = eval_func
         self.expected_types = expected_types
+        self.arg_names = arg_names
+        self.arg_counts = arg_counts if arg_counts is not None else (len(arg_names),)
 
     def __str__(self):
-        return "{}({})".format(self.name, self.input)
+        return "{}({})".format(self.name, ", ".join(self.arg_names))
 
     @property
     def body(self):
@@ -94,12 +142,35 @@ class SpecialFunction(AFunction):
 
     def evaluate(self, func_input, variables, functions):
         func_input_value = func_input.evaluate(variables, functions)
-        if not isinstance(func_input_value, self.expected_types):
-            raise BadFunctionInput(self.name, func_input_value)
-        return self.eval_func(func_input_value)
+        return self.evaluate_value(func_input_value, functions)
+
+    def evaluate_value(self, value, functions):
+        if not isinstance(value, self.expected_types):
+            raise BadFunctionInput(self.name, value)
+        return self.eval_func(value)
+
+    def _evaluate_arguments(self, func_input, variables, functions):
+        """
+        Splits input of function with several arguments by commas, checks number of
+        arguments and evaluates each argument
+
+        :return: list of argument values
+        """
+        from math_types import Operator, Expression
+        args = [[]]
+        for obj in func_input.body:
+            if isinstance(obj, Operator) and obj.op == ",":
+                args.append([])
+            else:
+                args[-1].append(obj)
+        if not all(args) or len(args) not in self.arg_counts:
+            raise BadFunctionInput(self.name, func_input)
+        return [Expression(arg, preprocess=False).evaluate(variables, functions) for arg in args]
 
 
 class SpecialNumericFunction(SpecialFunction):
+    __slots__ = ()
+
     def __init__(self, name, eval_func):
 
         def eval(var):
@@ -110,32 +181,200 @@ class SpecialNumericFunction(SpecialFunction):
 
         super().__init__(name, eval, (Number,))
 
+    def evaluate_many(self, xs, functions):
+        from math_types.vectorized import evaluate_many
+        return evaluate_many(self, xs, functions)
+
 
 class MatrixInversionFunc(SpecialFunction):
+    __slots__ = ()
+
     def __init__(self, name):
 
         def eval(matrix):
-            if not all(isinstance(matrix.matrix[i][j], Number) for i in range(matrix.rows) for j in range(matrix.cols)):
+            if not matrix.elements_are(Number):
                 raise BadFunctionInput(self.name, matrix)
+            if isinstance(matrix, SparseMatrix):
+                matrix = matrix.to_dense()
             inverted = matrix.invert_matrix()
             return inverted
 
-        super().__init__(name, eval, (Matrix,))
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class MatrixDeterminantFunc(SpecialFunction):
+    __slots__ = ()
+
+    def __init__(self, name):
+
+        def eval(matrix):
+            if not matrix.elements_are(Number):
+                raise BadFunctionInput(self.name, matrix)
+            if isinstance(matrix, SparseMatrix):
+                matrix = matrix.to_dense()
+            return matrix.determinant()
+
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class LinearSystemSolveFunc(SpecialFunction):
+    """
+    Takes two arguments: square matrix A and matrix b, returns x such that A ** x = b.
+    System with sparse A is solved by iterative method
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+        super().__init__(name, None, (Matrix, SparseMatrix), arg_names=("a", "b"))
+
+    def evaluate(self, func_input, variables, functions):
+        a, b = self._evaluate_arguments(func_input, variables, functions)
+        for arg in (a, b):
+            if not isinstance(arg, self.expected_types) or not arg.elements_are(Number):
+                raise BadFunctionInput(self.name, arg)
+        if isinstance(b, SparseMatrix):
+            b = b.to_dense()
+        return a.solve(b)
+
+    def evaluate_value(self, value, functions):
+        raise BadFunctionInput(self.name, value)
 
 
 class MatrixTransposeFunc(SpecialFunction):
+    __slots__ = ()
+
     def __init__(self, name):
 
         def eval(matrix):
             return matrix.transpose_matrix()
 
-        super().__init__(name, eval, (Matrix,))
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class IdentityMatrixFunc(SpecialFunction):
+    """
+    eye(n) returns n x n identity matrix
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+
+        def eval(number):
+            if number.val != int(number.val) or number.val < 1:
+                raise BadFunctionInput(self.name, number)
+            return Matrix.identity(int(number.val))
+
+        super().__init__(name, eval, (Number,))
+
+
+class DiagonalMatrixFunc(SpecialFunction):
+    """
+    diag(v) returns diagonal matrix with elements of row or column v on diagonal,
+    diag(M) of square matrix M keeps only its diagonal
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+
+        def eval(matrix):
+            if matrix.rows != matrix.cols and matrix.rows != 1 and matrix.cols != 1:
+                raise BadFunctionInput(self.name, matrix)
+            if isinstance(matrix, SparseMatrix):
+                if matrix.rows == 1 or matrix.cols == 1:
+                    matrix = matrix.to_dense()
+                else:
+                    return Matrix.diagonal([dict(matrix.row(i)).get(i, Number(0)) for i in range(matrix.rows)])
+            rows = matrix._read_rows()
+            if matrix.rows == 1 or matrix.cols == 1:
+                elements = [elem for row in rows for elem in row]
+            else:
+                elements = [rows[i][i] for i in range(matrix.rows)]
+            return Matrix.diagonal(elements)
+
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class MatrixToSparseFunc(SpecialFunction):
+    """
+    Stores matrix as SparseMatrix, which keeps only nonzero elements
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+
+        def eval(matrix):
+            if isinstance(matrix, SparseMatrix):
+                return matrix
+            return SparseMatrix.from_dense(matrix)
+
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class MatrixToDenseFunc(SpecialFunction):
+    """
+    Stores SparseMatrix as Matrix with all elements
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+
+        def eval(matrix):
+            if isinstance(matrix, SparseMatrix):
+                return matrix.to_dense()
+            return matrix
+
+        super().__init__(name, eval, (Matrix, SparseMatrix))
+
+
+class SubmatrixFunc(SpecialFunction):
+    """
+    Takes matrix and bounds of its block: sub(M, r1, r2) returns rows from r1 to r2,
+    sub(M, r1, r2, c1, c2) returns elements of those rows in columns from c1 to c2.
+    Indices start from 1, bounds are included. Result shares elements with M
+    """
+    __slots__ = ()
+
+    def __init__(self, name):
+        super().__init__(name, None, (Matrix, SparseMatrix), arg_names=("m", "r1", "r2", "c1", "c2"),
+                         arg_counts=(3, 5))
+
+    def evaluate(self, func_input, variables, functions):
+        args = self._evaluate_arguments(func_input, variables, functions)
+        if not isinstance(args[0], self.expected_types):
+            raise BadFunctionInput(self.name, func_input)
+        matrix, bounds = args[0], args[1:]
+        if len(bounds) == 2:
+            bounds += [Number(1), Number(matrix.cols)]
+        for bound in bounds:
+            if not isinstance(bound, Number) or bound.val != int(bound.val):
+                raise BadFunctionInput(self.name, bound)
+        r1, r2, c1, c2 = (int(bound.val) for bound in bounds)
+        if not (1 <= r1 <= r2 <= matrix.rows and 1 <= c1 <= c2 <= matrix.cols):
+            raise BadFunctionInput(self.name, func_input)
+        return matrix.submatrix(range(r1 - 1, r2), range(c1 - 1, c2))
+
+    def evaluate_value(self, value, functions):
+        raise BadFunctionInput(self.name, value)
 
 
 class SpecialCommand(AFunction):
-    def __init__(self, name, eval_func):
+    """
+    Command is registered by name of function in math_types.commands, module is imported
+    on first call, as commands need NumPy and matplotlib
+    """
+    __slots__ = ("eval_func", "func_name")
+
+    def __init__(self, name, func_name):
+        """
+        :param name: command name
+        :param func_name: name of function in math_types.commands which evaluates command
+        """
         super().__init__(name, None, None)
-        self.eval_func = eval_func
+        self.func_name = func_name
+        self.eval_func = None
 
     def evaluate(self, func_input, variables, functions):
+        if self.eval_func is None:
+            from math_types import commands
+            self.eval_func = getattr(commands, self.func_name)
         return self.eval_func(func_input.body, variables, functions)
@@ -0,0 +1,129 @@
+"""
+Compiles bodies of user defined functions to python functions.
+Body is lowered to single python expression over MathPrimitive objects, where constants
+and called functions are bound once, so call doesn't copy body, substitute variables,
+search functions by name or parse brackets.
+"""
+
+from typing import Callable, Dict, Optional, Set
+from consts import OPERATOR_MAP
+from math_types import Variable, Number, ComplexNumber, Matrix, AFunction, Operator
+from math_types.expression import negate
+
+# python operators have same symbols and call same MathPrimitive methods
+OPERATOR_SYMBOLS = {func: symbol for symbol, func in OPERATOR_MAP.items()}
+
+
+class CodeGenerator:
+    """
+    Generates python code of expression from its postfix program.
+    Code is generated for function of one argument x, which is input variable of expression.
+    """
+    def __init__(self, input_name: str, functions: Dict[str, AFunction]):
+        self.input_name = input_name
+        self.functions = functions
+        self.namespace = {"_functions": functions}
+
+    def bind(self, obj) -> str:
+        """
+        Binds object to name in namespace of generated code
+
+        :return: name
+        """
+        name = "_c{}".format(len(self.namespace))
+        self.namespace[name] = obj
+        return name
+
+    def generate(self, expr) -> Optional[str]:
+        """
+        :param expr: Expression
+        :return: python code of expression, or None if it can't be compiled
+        """
+        program = expr.compile()
+        if program is None:
+            return None
+        stack = []
+        for instruction in program:
+            if type(instruction) is int:
+                code = self.generate_operand(expr.body[instruction])
+            elif instruction is negate:
+                code = self.generate_negation(stack.pop())
+            else:
+                right = stack.pop()
+                code = self.generate_operator(instruction, stack.pop(), right)
+            if code is None:
+                return None
+            stack.append(code)
+        return stack[0]
+
+    def generate_operand(self, obj) -> Optional[str]:
+        if isinstance(obj, Variable):
+            return "x" if obj.name == self.input_name else None
+        if isinstance(obj, AFunction):
+            if obj.name not in self.functions or any(isinstance(arg, Operator) and arg.op == ","
+                                                     for arg in obj.input.body):
+                return None
+            arg = self.generate(obj.input)
+            if arg is None:
+                return None
+            return self.generate_call(self.functions[obj.name], arg)
+        return self.generate_constant(obj)
+
+    def generate_operator(self, func: Callable, left: str, right: str) -> Optional[str]:
+        return "({} {} {})".format(left, OPERATOR_SYMBOLS[func], right)
+
+    def generate_negation(self, operand: str) -> Optional[str]:
+        return self.generate_operator(OPERATOR_MAP["*"], self.generate_constant(Number(-1)), operand)
+
+    def generate_constant(self, obj) -> Optional[str]:
+        if isinstance(obj, (Number, ComplexNumber)):
+            return self.bind(obj)
+        if isinstance(obj, Matrix):
+            if obj.elements_are((Number, ComplexNumber)):
+                return self.bind(obj)
+        return None
+
+    def generate_call(self, func: AFunction, arg: str) -> Optional[str]:
+        return "{}.evaluate_value({}, _functions)".format(self.bind(func), arg)
+
+    def build(self, name: str, code: str) -> Callable:
+        """
+        :param name: name of generated function
+        :param code: generated code of expression
+        :return: python function of x
+        """
+        source = "def {}(x):\n    return {}\n".format(name, code)
+        exec(compile(source, "<function {}>".format(name), "exec"), self.namespace)
+        return self.namespace[name]
+
+
+def compile_function(func, functions: Dict[str, AFunction]) -> Optional[Callable]:
+    """
+    :param func: UserDefinedFunction with defined body
+    :param functions: dict of defined functions, functions called in body are bound from it
+    :return: python function which takes Number or ComplexNumber and returns result,
+             or None if body can't be compiled
+    """
+    generator = CodeGenerator(func.input.name, functions)
+    code = generator.generate(func.body)
+    if code is None:
+        return None
+    return generator.build("compiled_" + func.name, code)
+
+
+def find_references(expr) -> Set[str]:
+    """
+    :param expr: Expression
+    :return: names of all functions called in expression, including nested calls
+    """
+    names = set()
+    for obj in expr.body:
+        if isinstance(obj, AFunction):
+            names.add(obj.name)
+            names |= find_references(obj.input)
+        elif isinstance(obj, Matrix):
+            for row in obj.matrix:
+                for elem in row:
+                    if not isinstance(elem, (Number, ComplexNumber)):
+                        names |= find_references(elem)
+    return names
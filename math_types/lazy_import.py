@@ -0,0 +1,26 @@
+"""
+Deferred import of heavy optional modules. NumPy takes about half of interpreter
+startup, though most sessions never have matrix big enough for array storage.
+Module returned by lazy_import is executed on first access to its attribute.
+"""
+
+import importlib.util
+import sys
+
+
+def lazy_import(name: str):
+    """
+    :param name: name of module
+    :return: module, which is loaded on first attribute access, or None if it isn't installed
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -0,0 +1,115 @@
+"""
+Deferred element-wise matrix operations.
+Expression doesn't compute +, -, *, / and % of matrices at once, it builds tree
+of LazyMatrix nodes instead. Tree is computed when its value is needed by other
+operation or as result of expression: by array_storage.fused_elementwise, or row
+by row if elements can't be stored as arrays, so no intermediate matrices are created.
+"""
+
+import operator
+from typing import Iterator, List, Optional
+from math_types import Matrix, Number, ComplexNumber, array_storage
+from math_types.math_primitive import DISPATCH_TABLE
+
+ELEMENTWISE_OPERATORS = {operator.add: "+", operator.sub: "-", operator.mul: "*",
+                         operator.truediv: "/", operator.mod: "%"}
+SCALAR_TYPES = (Number, ComplexNumber)
+
+
+class LazyMatrix:
+    """
+    Element-wise operation which isn't computed yet. Element of result is
+    op(element of matrix, element of other), or op(element of matrix, other) if other is scalar
+    """
+    __slots__ = ("op", "matrix", "other", "rows", "cols")
+
+    def __init__(self, op, matrix, other):
+        """
+        :param op: operator function
+        :param matrix: Matrix or LazyMatrix
+        :param other: Matrix, LazyMatrix, Number or ComplexNumber
+        """
+        self.op = op
+        self.matrix = matrix
+        self.other = other
+        self.rows = matrix.rows
+        self.cols = matrix.cols
+
+
+def apply(left, op, right):
+    """
+    :param left: left operand, could be LazyMatrix
+    :param op: operator function
+    :param right: right operand, could be LazyMatrix
+    :return: LazyMatrix if op is element-wise operation on matrix, otherwise result of op
+    """
+    node = _defer(left, op, right)
+    if node is not None:
+        return node
+    return op(materialize(left), materialize(right))
+
+
+def _defer(left, op, right) -> Optional[LazyMatrix]:
+    symbol = ELEMENTWISE_OPERATORS.get(op)
+    if symbol is None:
+        return None
+    left_type = Matrix if type(left) is LazyMatrix else type(left)
+    right_type = Matrix if type(right) is LazyMatrix else type(right)
+    if DISPATCH_TABLE.get((left_type, symbol, right_type)) is None:
+        return None  # operation isn't supported, let it raise
+    if left_type is Matrix and right_type is Matrix:
+        if left.rows != right.rows or left.cols != right.cols:
+            return None
+        return LazyMatrix(op, left, right)
+    if left_type is Matrix and right_type in SCALAR_TYPES:
+        return LazyMatrix(op, left, right)
+    if right_type is Matrix and left_type in SCALAR_TYPES:
+        # only + and * are supported, matrix computes them as op(element, scalar)
+        return LazyMatrix(op, right, left)
+    return None
+
+
+def materialize(value):
+    """
+    :param value: math object or LazyMatrix
+    :return: value, where LazyMatrix is computed to Matrix
+    """
+    if type(value) is not LazyMatrix:
+        return value
+    tree = _operand_tree(value)
+    if tree is not None:
+        res = array_storage.fused_elementwise(tree)
+        if res is not None:
+            return Matrix.from_array(*res)
+    return Matrix(value.rows, value.cols, list(_rows(value)))
+
+
+def _operand_tree(value):
+    """
+    :return: tree of array_storage Operands for fused_elementwise, or None if
+        some operand can't be stored as array
+    """
+    if type(value) is LazyMatrix:
+        matrix, other = _operand_tree(value.matrix), _operand_tree(value.other)
+        if matrix is None or other is None:
+            return None
+        return value.op, matrix, other
+    if type(value) is Matrix:
+        return value.as_array()
+    return array_storage.scalar_operand(value)
+
+
+def _rows(value) -> Iterator[List]:
+    """
+    Computes value row by row, so only one row of every operand is kept at once
+    """
+    if type(value) is Matrix:
+        yield from value._read_rows()
+        return
+    op, other = value.op, value.other
+    if type(other) in (Matrix, LazyMatrix):
+        for row, other_row in zip(_rows(value.matrix), _rows(other)):
+            yield list(map(op, row, other_row))
+    else:
+        for row in _rows(value.matrix):
+            yield [op(elem, other) for elem in row]
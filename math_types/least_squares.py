@@ -0,0 +1,193 @@
+"""
+Least squares fits of linear models: polynomial of one variable and linear function of
+several variables. Design matrix isn't formed at once and X^T * X isn't formed at all:
+rows are processed by blocks, every block is appended to R factor of rows seen so far
+and the stack is factorized again by Householder QR, so memory depends on block size
+and number of coefficients only. Right-hand side is kept as last column of factorized
+matrix, then top of this column in R is Q^T * y and coefficients are found by back
+substitution. Features are mapped to [-1, 1] before factorization, coefficients of
+original variables are restored after it.
+"""
+
+from math import comb
+from typing import Iterator, Tuple
+import numpy as np
+from exceptions.evaluation_exceptions import WrongSpecialCommandUse
+from math_types import Number, Matrix, SparseMatrix, array_storage
+from math_types.lu import LUDecomposition
+from math_types.matrix_structure import UPPER
+
+BLOCK_ROWS = 4096  # rows of design matrix factorized at once
+
+
+class QRLeastSquares:
+    """
+    Minimizes |A * c - y| for design matrix A which is added by blocks of rows
+    """
+    __slots__ = ("n", "_r")
+
+    def __init__(self, features: int):
+        """
+        :param features: number of columns of design matrix
+        """
+        self.n = 0
+        self._r = np.zeros((0, features + 1))
+
+    def update(self, design, y) -> None:
+        """
+        :param design: 2D array, block of rows of design matrix
+        :param y: 1D array of right-hand side values of these rows
+        """
+        if len(design) == 0:
+            return
+        stacked = np.vstack((self._r, np.column_stack((design, y))))
+        self._r = np.linalg.qr(stacked, mode="r")
+        self.n += len(design)
+
+    def coefficients(self) -> np.ndarray:
+        """
+        :return: 1D array of coefficients
+        """
+        features = self._r.shape[1] - 1
+        if self._r.shape[0] < features:
+            raise WrongSpecialCommandUse("Fit of {} coefficients needs at least {} points".format(features, features))
+        lu = LUDecomposition.of_triangular(self._r[:features, :features], UPPER)
+        res = lu.solve(self._r[:features, features:])
+        if res is None:
+            raise WrongSpecialCommandUse("Points don't define unique fit, there are too few different points")
+        return res[:, 0]
+
+
+def polyfit(x, y, degree: int, block_rows: int = BLOCK_ROWS) -> np.ndarray:
+    """
+    :param x: row or column Matrix of x coordinates
+    :param y: row or column Matrix of y coordinates with same number of elements
+    :param degree: degree of polynomial
+    :return: 1D array of coefficients, from constant term to coefficient of x^degree
+    """
+    _check_lengths(_length(x), y)
+    shift, scale = _mapping(_vector_blocks(x, block_rows))
+    shift, scale = shift[0], scale[0]
+    fit = QRLeastSquares(degree + 1)
+    powers = np.arange(degree + 1)
+    for x_block, y_block in zip(_vector_blocks(x, block_rows), _vector_blocks(y, block_rows)):
+        fit.update(((x_block[:, 0] - shift) / scale)[:, None] ** powers, y_block[:, 0])
+    scaled = fit.coefficients() / scale ** powers
+    # c_k * (x - shift)^k contributes c_k * comb(k, m) * (-shift)^(k - m) to coefficient of x^m
+    return np.array([sum(scaled[k] * comb(k, m) * (-shift) ** (k - m) for k in range(m, degree + 1))
+                     for m in range(degree + 1)]) + 0.0
+
+
+def linfit(x, y, block_rows: int = BLOCK_ROWS) -> np.ndarray:
+    """
+    :param x: Matrix with one row of features for every point, or row Matrix of
+        single feature of every point
+    :param y: row or column Matrix of values with element for every point
+    :return: 1D array of coefficients, intercept first
+    """
+    if x.rows == 1 and x.cols != 1:
+        blocks = lambda: _vector_blocks(x, block_rows)
+    else:
+        blocks = lambda: _row_blocks(x, block_rows)
+    features = 1 if x.rows == 1 else x.cols
+    _check_lengths(x.cols if x.rows == 1 else x.rows, y)
+    shift, scale = _mapping(blocks())
+    fit = QRLeastSquares(features + 1)
+    for x_block, y_block in zip(blocks(), _vector_blocks(y, block_rows)):
+        fit.update(np.column_stack((np.ones(len(x_block)), (x_block - shift) / scale)), y_block[:, 0])
+    intercept, *slopes = fit.coefficients()
+    slopes = np.array(slopes) / scale
+    return np.concatenate(([intercept - slopes @ shift], slopes)) + 0.0
+
+
+def as_column(coefficients) -> Matrix:
+    """
+    :return: column Matrix of coefficients
+    """
+    return Matrix(len(coefficients), 1, [[Number(float(val))] for val in coefficients])
+
+
+def values(vector) -> np.ndarray:
+    """
+    :return: 1D float array of elements of row or column matrix
+    """
+    _length(vector)
+    return np.concatenate([block[:, 0] for block in _vector_blocks(vector, BLOCK_ROWS)])
+
+
+def _length(vector) -> int:
+    if vector.rows != 1 and vector.cols != 1:
+        raise WrongSpecialCommandUse("Expected matrix with one row or one column, got ({}, {})"
+                                     .format(vector.rows, vector.cols))
+    return vector.rows * vector.cols
+
+
+def _check_lengths(points: int, y) -> None:
+    if _length(y) != points:
+        raise WrongSpecialCommandUse("There should be value for every of {} points, got {}".format(points, _length(y)))
+
+
+def _mapping(blocks: Iterator[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: (shift, scale) arrays which map every feature to [-1, 1] by (x - shift) / scale
+    """
+    low = high = None
+    for block in blocks:
+        block_low, block_high = block.min(axis=0), block.max(axis=0)
+        low = block_low if low is None else np.minimum(low, block_low)
+        high = block_high if high is None else np.maximum(high, block_high)
+    shift, scale = (low + high) / 2, (high - low) / 2
+    return shift, np.where(scale > 0, scale, 1.0)
+
+
+def _vector_blocks(vector, block_rows: int) -> Iterator[np.ndarray]:
+    """
+    :return: iterator over elements of row or column matrix as (block_rows, 1) arrays,
+        sparse row is returned at once
+    """
+    if vector.rows != 1 or isinstance(vector, SparseMatrix):
+        for block in _row_blocks(vector, block_rows):
+            yield block.reshape(-1, 1)
+        return
+    stored = vector.as_array()
+    if stored is not None:
+        values, kind = stored
+        if kind == array_storage.COMPLEX:
+            raise WrongSpecialCommandUse("Fitted points should be real numbers")
+        for start in range(0, vector.cols, block_rows):
+            yield np.asarray(values[0, start:start + block_rows, None], dtype=np.float64)
+        return
+    row = vector._read_rows()[0]
+    for start in range(0, vector.cols, block_rows):
+        yield np.array([[_real(elem)] for elem in row[start:start + block_rows]], dtype=np.float64)
+
+
+def _row_blocks(matrix, block_rows: int) -> Iterator[np.ndarray]:
+    """
+    :return: iterator over rows of matrix as 2D float arrays with at most block_rows rows
+    """
+    if isinstance(matrix, SparseMatrix):
+        for start in range(0, matrix.rows, block_rows):
+            block = np.zeros((min(block_rows, matrix.rows - start), matrix.cols))
+            for i in range(len(block)):
+                for j, elem in matrix.row(start + i):
+                    block[i, j] = _real(elem)
+            yield block
+        return
+    stored = matrix.as_array()
+    if stored is not None:
+        values, kind = stored
+        if kind == array_storage.COMPLEX:
+            raise WrongSpecialCommandUse("Fitted points should be real numbers")
+        for start in range(0, matrix.rows, block_rows):
+            yield np.asarray(values[start:start + block_rows], dtype=np.float64)
+        return
+    rows = matrix._read_rows()
+    for start in range(0, matrix.rows, block_rows):
+        yield np.array([[_real(elem) for elem in row] for row in rows[start:start + block_rows]], dtype=np.float64)
+
+
+def _real(elem) -> float:
+    if not isinstance(elem, Number):
+        raise WrongSpecialCommandUse("Fitted points should be real numbers")
+    return elem.val
@@ -0,0 +1,135 @@
+"""
+LU decomposition with partial pivoting, which is used for matrix inversion,
+determinant and solving of linear systems. Small matrices are inverted exactly
+by elimination over fractions (see exact_inverse)
+"""
+
+from fractions import Fraction
+from typing import List, Optional
+from math_types.lazy_import import lazy_import
+from math_types.matrix_structure import DIAGONAL, UPPER, LOWER
+
+np = lazy_import("numpy")
+
+
+class LUDecomposition:
+    """
+    Factorization P * A = L * U of square real matrix, where L is unit lower triangular,
+    U is upper triangular and P is permutation of rows. Both triangles are kept in one array.
+    Matrix is singular if some pivot is negligible compared to matrix elements.
+    Triangular matrices are not factorized (see of_triangular)
+    """
+    def __init__(self, array):
+        """
+        :param array: square 2D array of floats, it isn't modified
+        """
+        lu = np.array(array, dtype=np.float64)
+        n = lu.shape[0]
+        self.permutation = np.arange(n)
+        self.sign = 1
+        self.singular = False
+        self.triangle = None
+        tolerance = self._tolerance(lu)
+
+        for k in range(n):
+            pivot = k + int(np.argmax(np.abs(lu[k:, k])))
+            if abs(lu[pivot, k]) <= tolerance:
+                self.singular = True
+                continue
+            if pivot != k:
+                lu[[k, pivot]] = lu[[pivot, k]]
+                self.permutation[[k, pivot]] = self.permutation[[pivot, k]]
+                self.sign = -self.sign
+            lu[k+1:, k] /= lu[k, k]
+            lu[k+1:, k+1:] -= np.outer(lu[k+1:, k], lu[k, k+1:])
+        self.lu = lu
+
+    @classmethod
+    def of_triangular(cls, array, triangle: str) -> "LUDecomposition":
+        """
+        Upper triangular matrix is its own U with identity L, lower triangular and
+        diagonal matrices are solved by substitution directly, so nothing is computed
+
+        :param array: square 2D array of floats, it isn't modified
+        :param triangle: matrix_structure UPPER, LOWER or DIAGONAL
+        """
+        res = cls.__new__(cls)
+        res.lu = np.array(array, dtype=np.float64)
+        res.permutation = np.arange(res.lu.shape[0])
+        res.sign = 1
+        res.triangle = triangle
+        res.singular = bool((np.abs(np.diagonal(res.lu)) <= res._tolerance(res.lu)).any())
+        return res
+
+    @staticmethod
+    def _tolerance(lu) -> float:
+        n = lu.shape[0]
+        return n * np.finfo(np.float64).eps * (np.abs(lu).max() if n else 0)
+
+    def determinant(self) -> float:
+        if self.singular:
+            return 0.0
+        with np.errstate(over="ignore"):  # too big determinant is inf, as for Numbers
+            return float(self.sign * np.prod(np.diag(self.lu))) + 0.0
+
+    def solve(self, b):
+        """
+        Solves A * X = b by forward and backward substitution
+
+        :param b: 2D array with same number of rows as A
+        :return: X, or None if matrix is singular
+        """
+        if self.singular:
+            return None
+        lu = self.lu
+        x = np.array(b, dtype=np.float64)[self.permutation]
+        n = lu.shape[0]
+        if self.triangle == DIAGONAL:
+            return x / np.diagonal(lu)[:, None] + 0.0
+        if self.triangle == LOWER:
+            for i in range(n):
+                x[i] -= lu[i, :i] @ x[:i]
+                x[i] /= lu[i, i]
+            return x + 0.0
+        if self.triangle != UPPER:
+            for i in range(1, n):
+                x[i] -= lu[i, :i] @ x[:i]
+        for i in range(n - 1, -1, -1):
+            x[i] -= lu[i, i+1:] @ x[i+1:]
+            x[i] /= lu[i, i]
+        return x + 0.0  # no negative zeros in output
+
+    def inverse(self):
+        """
+        :return: inverse of A, or None if matrix is singular
+        """
+        if self.triangle == DIAGONAL and not self.singular:
+            return np.diag(1.0 / np.diagonal(self.lu)) + 0.0
+        return self.solve(np.eye(self.lu.shape[0]))
+
+
+def exact_inverse(rows: List[List]) -> Optional[List[List[Fraction]]]:
+    """
+    Inverts matrix by Gauss-Jordan elimination over fractions, so inverse has no error
+    of elimination and is rounded only when it's converted to floats.
+    Cost grows fast with size, so it's used for small matrices only
+
+    :param rows: square matrix as list of lists of finite ints and floats
+    :return: inverse as list of lists of Fractions, or None if matrix is singular
+    """
+    n = len(rows)
+    work = [[Fraction(val) for val in row] + [Fraction(int(i == j)) for j in range(n)]
+            for i, row in enumerate(rows)]
+    for col in range(n):
+        pivot = next((i for i in range(col, n) if work[i][col] != 0), None)
+        if pivot is None:
+            return None
+        work[col], work[pivot] = work[pivot], work[col]
+        pivot_row = work[col]
+        scale = pivot_row[col]
+        pivot_row[:] = [val / scale for val in pivot_row]
+        for i in range(n):
+            factor = work[i][col]
+            if i != col and factor != 0:
+                work[i] = [val - factor * pivot_val for val, pivot_val in zip(work[i], pivot_row)]
+    return [row[n:] for row in work]
@@ -1,6 +1,41 @@
 from abc import abstractmethod
+from typing import Callable, Dict, Optional, Tuple
 from exceptions.math_exceptions import OperationIsNotSupported
 
+# (left operand type, operator, right operand type) -> implementation, which is called
+# as implementation(right, left). None marks unsupported pair, so it's rejected by lookup
+DISPATCH_TABLE: Dict[Tuple[type, str, type], Optional[Callable]] = {}
+
+
+def resolve_operation(left_type: type, op: str, right_type: type) -> Optional[Callable]:
+    """
+    Finds implementation of operation the same way as duck typing does:
+    method named by left operand _operations on right operand class.
+    Result is stored in DISPATCH_TABLE
+
+    :return: implementation or None if operation is not supported
+    """
+    operations = getattr(left_type, "_operations", None)
+    method_name = operations.get(op) if isinstance(operations, dict) else None
+    implementation = getattr(right_type, method_name, None) if method_name else None
+    if not callable(implementation):
+        implementation = None
+    DISPATCH_TABLE[(left_type, op, right_type)] = implementation
+    return implementation
+
+
+def register_types(*types: type) -> None:
+    """
+    Fills DISPATCH_TABLE for every pair of types and every operator.
+    Pairs of types which weren't registered are resolved on first use
+
+    :param types: MathPrimitive subclasses
+    """
+    for left_type in types:
+        for op in left_type._operations:
+            for right_type in types:
+                resolve_operation(left_type, op, right_type)
+
 
 class MathPrimitive:
     """
@@ -14,9 +49,12 @@ class MathPrimitive:
     This methods should be reversed, so when it's called with (self, other),
     self is actually right operand and other is left.
     Then, during math operations, left operand checks if right operand has
-    required function to be operated with current class and calls it or throws exception
+    required function to be operated with current class and calls it or throws exception.
+    Such lookups are done once per pair of types and stored in DISPATCH_TABLE
     """
 
+    __slots__ = ()
+
     @property
     @abstractmethod
     def _operations(self):
@@ -24,49 +62,63 @@ class MathPrimitive:
 
     def __add__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["+"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "+", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "+", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "+", type(other))
+        return implementation(other, self)
 
     def __sub__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["-"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "-", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "-", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "-", type(other))
+        return implementation(other, self)
 
     def __mul__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["*"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "*", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "*", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "*", type(other))
+        return implementation(other, self)
 
     def __truediv__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["/"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "/", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "/", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "/", type(other))
+        return implementation(other, self)
 
     def __xor__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["^"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "^", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "^", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "^", type(other))
+        return implementation(other, self)
 
     def __mod__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["%"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "%", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "%", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "%", type(other))
+        return implementation(other, self)
 
     def __pow__(self, other):
         try:
-            other_op_method = getattr(other, self._operations["**"])
-            return other_op_method(self)
-        except AttributeError:
+            implementation = DISPATCH_TABLE[self.__class__, "**", other.__class__]
+        except KeyError:
+            implementation = resolve_operation(self.__class__, "**", other.__class__)
+        if implementation is None:
             raise OperationIsNotSupported(self.__class__, "**", type(other))
+        return implementation(other, self)
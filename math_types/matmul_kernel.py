@@ -0,0 +1,155 @@
+"""
+Pure Python matrix product for matrices which are not stored as NumPy arrays.
+Elements are unboxed to plain ints, floats or complexes once, right operand is
+transposed so every element of result is a dot product of two rows, and result
+is boxed back to Numbers or ComplexNumbers only at the end. Big products are
+split by Strassen recursion. Like array_storage kernels it handles only matrices
+whose elements are all of one kind, otherwise it returns None and Matrix
+multiplies element by element.
+"""
+
+import cmath
+import operator
+from typing import List, Optional, Tuple
+from math_types.number import Number
+from math_types.complex_number import ComplexNumber
+
+BLOCK_SIZE = 32  # columns of right operand processed together
+STRASSEN_THRESHOLD = 64  # products with all dimensions above are split by Strassen recursion
+
+# kinds of unboxed values with zero which starts dot products: -0.0 keeps sign of
+# first product, so sum is the same as sum which starts from first product
+_ZEROS = {int: 0, float: -0.0, complex: complex(-0.0, -0.0)}
+
+
+def unbox(rows: List[List]) -> Optional[Tuple[List[List], type]]:
+    """
+    :param rows: matrix elements as list of lists
+    :return: (rows of plain values, their type) or None if elements are of different kinds
+    """
+    first = rows[0][0]
+    if type(first) is Number:
+        kind = type(first.val)
+        if kind in (int, float) and all(type(elem) is Number and type(elem.val) is kind
+                                        for row in rows for elem in row):
+            return [[elem.val for elem in row] for row in rows], kind
+    elif all(type(elem) is ComplexNumber and type(elem.real) is float and type(elem.imag) is float
+             for row in rows for elem in row):
+        return [[complex(elem.real, elem.imag) for elem in row] for row in rows], complex
+    return None
+
+
+def box(rows: List[List], kind: type) -> List[List]:
+    """
+    :return: values as list of lists of Numbers or ComplexNumbers
+    """
+    if kind is complex:
+        return [[ComplexNumber(val.real, val.imag) for val in row] for row in rows]
+    return [[Number(val) for val in row] for row in rows]
+
+
+def matmul(left: List[List], right: List[List]) -> Optional[List[List]]:
+    """
+    :param left: elements of left matrix
+    :param right: elements of right matrix, it has as many rows as left has columns
+    :return: elements of product or None if it should be computed element by element
+    """
+    left, right = unbox(left), unbox(right)
+    if left is None or right is None or left[1] is not right[1]:
+        return None
+    (left, kind), (right, _) = left, right
+    product = multiply(left, right, kind)
+    if kind is not int and min(len(left), len(right), len(right[0])) > STRASSEN_THRESHOLD \
+            and not _finite(product):
+        # Strassen subtracts products, so overflow gives nan instead of inf
+        product = blocked_multiply(left, right, kind)
+    return box(product, kind)
+
+
+def multiply(left: List[List], right: List[List], kind: type, threshold: int = None) -> List[List]:
+    """
+    Product of unboxed matrices
+
+    :param kind: type of values
+    :param threshold: products with all dimensions above threshold are split by Strassen
+        recursion, STRASSEN_THRESHOLD by default
+    """
+    if threshold is None:
+        threshold = STRASSEN_THRESHOLD
+    if min(len(left), len(right), len(right[0])) <= threshold:
+        return blocked_multiply(left, right, kind)
+    return _strassen(left, right, kind, threshold)
+
+
+def blocked_multiply(left: List[List], right: List[List], kind: type) -> List[List]:
+    """
+    Classic product: right operand is transposed, so each element of result is a dot
+    product of two rows, columns of right operand are processed by blocks of BLOCK_SIZE
+    which are reused by every row of left operand
+    """
+    zero = _ZEROS[kind]
+    columns = list(zip(*right))
+    res = [[None] * len(columns) for _ in range(len(left))]
+    mul = operator.mul
+    for start in range(0, len(columns), BLOCK_SIZE):
+        block = columns[start:start + BLOCK_SIZE]
+        for row, res_row in zip(left, res):
+            res_row[start:start + BLOCK_SIZE] = [sum(map(mul, row, col), zero) for col in block]
+    return res
+
+
+def _strassen(left: List[List], right: List[List], kind: type, threshold: int) -> List[List]:
+    rows, inner, cols = len(left), len(right), len(right[0])
+    # odd dimensions are padded with zero row or column
+    left = _padded(left, rows + rows % 2, inner + inner % 2, kind)
+    right = _padded(right, inner + inner % 2, cols + cols % 2, kind)
+    a11, a12, a21, a22 = _split(left)
+    b11, b12, b21, b22 = _split(right)
+
+    m1 = multiply(_add(a11, a22), _add(b11, b22), kind, threshold)
+    m2 = multiply(_add(a21, a22), b11, kind, threshold)
+    m3 = multiply(a11, _sub(b12, b22), kind, threshold)
+    m4 = multiply(a22, _sub(b21, b11), kind, threshold)
+    m5 = multiply(_add(a11, a12), b22, kind, threshold)
+    m6 = multiply(_sub(a21, a11), _add(b11, b12), kind, threshold)
+    m7 = multiply(_sub(a12, a22), _add(b21, b22), kind, threshold)
+
+    c11 = _add(_sub(_add(m1, m4), m5), m7)
+    c12 = _add(m3, m5)
+    c21 = _add(m2, m4)
+    c22 = _add(_add(_sub(m1, m2), m3), m6)
+    res = [r1 + r2 for r1, r2 in zip(c11, c12)] + [r1 + r2 for r1, r2 in zip(c21, c22)]
+    if len(res) != rows or len(res[0]) != cols:
+        res = [row[:cols] for row in res[:rows]]
+    return res
+
+
+def _padded(rows: List[List], height: int, width: int, kind: type) -> List[List]:
+    zero = kind(0)
+    if len(rows[0]) != width:
+        rows = [row + [zero] for row in rows]
+    if len(rows) != height:
+        rows = rows + [[zero] * width]
+    return rows
+
+
+def _split(rows: List[List]):
+    """
+    :return: four quarters of matrix with even dimensions
+    """
+    height, width = len(rows) // 2, len(rows[0]) // 2
+    top, bottom = rows[:height], rows[height:]
+    return ([row[:width] for row in top], [row[width:] for row in top],
+            [row[:width] for row in bottom], [row[width:] for row in bottom])
+
+
+def _add(left: List[List], right: List[List]) -> List[List]:
+    return [list(map(operator.add, r1, r2)) for r1, r2 in zip(left, right)]
+
+
+def _sub(left: List[List], right: List[List]) -> List[List]:
+    return [list(map(operator.sub, r1, r2)) for r1, r2 in zip(left, right)]
+
+
+def _finite(rows: List[List]) -> bool:
+    return all(map(cmath.isfinite, (val for row in rows for val in row)))
@@ -1,15 +1,30 @@
 """Matrix class implementation"""
 from exceptions.math_exceptions import WrongMatrixDimension
-from exceptions.evaluation_exceptions import MatrixIsNonInvertible
+from exceptions.evaluation_exceptions import MatrixIsNonInvertible, MatrixIsNotSquare
 from math_types import MathPrimitive
 from math_types.number import Number
+from math_types import array_storage, matmul_kernel, matrix_structure
+from math_types.matrix_structure import IDENTITY, DIAGONAL, UPPER, LOWER, SYMMETRIC
+from math_types.lu import LUDecomposition, exact_inverse
+from math_types.matrix_view import MatrixView
+from math_types.lazy_import import lazy_import
+import math
 import operator
 
+np = lazy_import("numpy")
+
 
 class Matrix(MathPrimitive):
     """
     Matrix class represents math object matrix and implements it's default behavior
         such as addition, subtraction, multiplication...
+    Elements are stored as list of lists, but big matrices of numbers are moved
+    to NumPy array on first operation (see array_storage). Elements of such matrix
+    are boxed back to list of lists only when they are accessed through matrix attribute.
+    Transposed matrix and blocks of matrix share elements with it: array storage
+    is sliced, list storage is wrapped in MatrixView (see matrix_view).
+    Square matrices know their structure (see matrix_structure), so products, powers,
+    inversion and solving with diagonal and triangular matrices skip general algorithms
     """
     _operations = {"+": "add_to_matrix",
                   "-": "subtract_from_matrix",
@@ -18,48 +33,185 @@ class Matrix(MathPrimitive):
                   "^": "power_matrix",
                   "%": "modulo_matrix",
                   "**": "matmul"}
+    __slots__ = ("rows", "cols", "_matrix", "_array", "_kind", "_lu", "_structure")
 
     def __init__(self, rows, cols, matrix):
         """
         :param rows: number of rows
         :param cols: number of columns
-        :param matrix: matrix as list of lists
+        :param matrix: matrix as list of lists or MatrixView
         """
         self.rows = rows
         self.cols = cols
-        self.matrix = matrix
+        self._matrix = matrix
+        self._array = None
+        self._kind = None
+        self._lu = None
+        self._structure = None
+
+    @classmethod
+    def from_array(cls, array, kind):
+        """
+        :param array: 2D NumPy array
+        :param kind: kind of values, one of array_storage INT, REAL or COMPLEX
+        :return: Matrix stored as array, small matrices are stored as lists
+        """
+        rows, cols = array.shape
+        if rows * cols < array_storage.ARRAY_THRESHOLD:
+            return cls(rows, cols, array_storage.box_rows(array, kind))
+        res = cls.__new__(cls)
+        res.rows, res.cols = rows, cols
+        res._matrix = None
+        res._array = array
+        res._kind = kind
+        res._lu = None
+        res._structure = None
+        return res
+
+    @classmethod
+    def identity(cls, n):
+        """
+        :return: n x n identity Matrix of integers
+        """
+        if n * n >= array_storage.ARRAY_THRESHOLD:
+            res = cls.from_array(np.eye(n), array_storage.INT)
+        else:
+            res = cls(n, n, [[Number(int(i == j)) for j in range(n)] for i in range(n)])
+        res._structure = matrix_structure.IDENTITY_STRUCTURE
+        return res
+
+    @classmethod
+    def diagonal(cls, elements):
+        """
+        :param elements: list of diagonal elements
+        :return: diagonal Matrix
+        """
+        n = len(elements)
+        zero = matrix_structure.zero_like(elements)
+        rows = [[zero] * n for _ in range(n)]
+        for i, elem in enumerate(elements):
+            rows[i][i] = elem
+        res = cls(n, n, rows)
+        res._structure = matrix_structure.detect(res)
+        return res
+
+    @property
+    def matrix(self):
+        """
+        Elements as list of lists. Caller could modify it, so array storage
+        and LU decomposition are dropped
+        """
+        if self._matrix is None:
+            self._matrix = array_storage.box_rows(self._array, self._kind)
+            self._array = self._kind = None
+        elif isinstance(self._matrix, MatrixView):
+            self._matrix = self._matrix.materialize()
+        self._lu = self._structure = None
+        return self._matrix
+
+    @matrix.setter
+    def matrix(self, item):
+        self._matrix = item
+        self._array = self._kind = None
+        self._lu = self._structure = None
+
+    @property
+    def structure(self):
+        """
+        Set of matrix_structure tags, detected on first use
+        """
+        if self._structure is None:
+            self._structure = matrix_structure.detect(self)
+        return self._structure
+
+    def _read_rows(self):
+        """
+        :return: elements as list of lists (or MatrixView), without changing storage
+        """
+        if self._matrix is None:
+            return array_storage.box_rows(self._array, self._kind)
+        return self._matrix
+
+    def as_array(self):
+        """
+        Moves elements to array storage if matrix is big enough and has suitable elements
+
+        :return: (array, kind) or None
+        """
+        if self._array is None:
+            if self.rows * self.cols < array_storage.ARRAY_THRESHOLD:
+                return None
+            stored = array_storage.to_array(self._matrix)
+            if stored is None:
+                return None
+            self._array, self._kind = stored
+            self._matrix = None
+        return self._array, self._kind
+
+    def elements_are(self, types) -> bool:
+        """
+        :param types: type or tuple of types
+        :return: True if every element is instance of types
+        """
+        if self._matrix is None:
+            return issubclass(array_storage.element_type(self._kind), types)
+        return all(isinstance(elem, types) for row in self._matrix for elem in row)
+
+    def apply_scalar(self, scalar, op):
+        """
+        Applies op(element, scalar) to every element using array storage
+
+        :param scalar: Number or ComplexNumber
+        :param op: operator function
+        :return: result Matrix, or None if it should be computed element by element
+        """
+        stored = self.as_array()
+        scalar = array_storage.scalar_operand(scalar) if stored is not None else None
+        if scalar is None:
+            return None
+        result = array_storage.elementwise(stored, scalar, op)
+        return Matrix.from_array(*result) if result is not None else None
+
+    def map_elements(self, func):
+        """
+        :param func: function of one element
+        :return: new Matrix with func applied to every element
+        """
+        return Matrix(self.rows, self.cols, [[func(elem) for elem in row] for row in self._read_rows()])
 
     def __eq__(self, other):
         if self.rows != other.rows or self.cols != other.cols:
             return False
-        for i in range(self.rows):
-            for j in range(self.cols):
-                if self.matrix[i][j] != other.matrix[i][j]:
+        for self_row, other_row in zip(self._read_rows(), other._read_rows()):
+            for self_elem, other_elem in zip(self_row, other_row):
+                if self_elem != other_elem:
                     return False
         return True
 
     def __str__(self):
         rows = []
-        for row in self.matrix:
-            str_row = "[ " + ", ".join(str(elem) for elem in row) + " ]"
+        if self._matrix is None:
+            elements = array_storage.format_rows(self._array, self._kind)
+        else:
+            elements = ([str(elem) for elem in row] for row in self._matrix)
+        for row in elements:
+            str_row = "[ " + ", ".join(row) + " ]"
             rows.append(str_row)
         return "\n".join(rows)
 
     __repr__ = __str__
 
     def add_to_num(self, other):
-        res = Matrix(self.rows, self.cols, [row[:] for row in self.matrix])
-        for row_idx in range(self.rows):
-            for col_idx in range(self.cols):
-                res.matrix[row_idx][col_idx] += other
-        return res
+        res = self.apply_scalar(other, operator.add)
+        if res is not None:
+            return res
+        return self.map_elements(lambda elem: elem + other)
 
     def multiply_by_num(self, other):
-        res = Matrix(self.rows, self.cols, [row[:] for row in self.matrix])
-        for row_idx in range(self.rows):
-            for col_idx in range(self.cols):
-                res.matrix[row_idx][col_idx] *= other
-        return res
+        res = self.apply_scalar(other, operator.mul)
+        if res is not None:
+            return res
+        return self.map_elements(lambda elem: elem * other)
 
     add_to_comp_num = add_to_num
     multiply_by_comp_num = multiply_by_num
@@ -67,11 +219,13 @@ class Matrix(MathPrimitive):
     def matrix_op_matrix_elementwise(self, other, op):
         if self.rows != other.rows or self.cols != other.cols:
             raise WrongMatrixDimension(other, self)
-        res = Matrix(other.rows, other.cols, [row[:] for row in other.matrix])
-        for row_idx in range(res.rows):
-            for col_idx in range(res.cols):
-                res.matrix[row_idx][col_idx] = op(other.matrix[row_idx][col_idx], self.matrix[row_idx][col_idx])
-        return res
+        left, right = other.as_array(), self.as_array()
+        if left is not None and right is not None:
+            res = array_storage.elementwise(left, right, op)
+            if res is not None:
+                return Matrix.from_array(*res)
+        return Matrix(other.rows, other.cols, [list(map(op, other_row, self_row)) for other_row, self_row
+                                               in zip(other._read_rows(), self._read_rows())])
 
     def add_to_matrix(self, other):
         return self.matrix_op_matrix_elementwise(other, operator.add)
@@ -88,104 +242,207 @@ class Matrix(MathPrimitive):
     def modulo_matrix(self, other):
         return self.matrix_op_matrix_elementwise(other, operator.mod)
 
+    @staticmethod
+    def sparse_op(left, right, op):
+        from math_types import sparse_matrix
+        if op is operator.matmul:
+            return sparse_matrix.matmul(left, right)
+        return sparse_matrix.elementwise(left, right, op)
+
+    def add_to_sparse(self, other):
+        return self.sparse_op(other, self, operator.add)
+
+    def subtract_from_sparse(self, other):
+        return self.sparse_op(other, self, operator.sub)
+
+    def multiply_by_sparse(self, other):
+        return self.sparse_op(other, self, operator.mul)
+
+    def divide_sparse(self, other):
+        return self.sparse_op(other, self, operator.truediv)
+
+    def modulo_sparse(self, other):
+        return self.sparse_op(other, self, operator.mod)
+
+    def matmul_sparse(self, other):
+        return self.sparse_op(other, self, operator.matmul)
+
     def matmul(self, other):
         left, right = other, self
 
         if left.cols != right.rows:
             raise WrongMatrixDimension(left, right)
+        if left.rows == left.cols and DIAGONAL in left.structure:
+            res = matrix_structure.scale(left, right, left=True)
+        elif right.rows == right.cols and DIAGONAL in right.structure:
+            res = matrix_structure.scale(right, left, left=False)
+        else:
+            res = None
+        if res is not None:
+            return Matrix._from_elements(left.rows, right.cols, res)
+
+        left_stored, right_stored = left.as_array(), right.as_array()
+        if left_stored is not None and right_stored is not None:
+            res = array_storage.matmul(left_stored, right_stored)
+            if res is not None:
+                return Matrix.from_array(*res)
+
+        res = matmul_kernel.matmul(left._read_rows(), right._read_rows())
+        if res is not None:
+            return Matrix(left.rows, right.cols, res)
+
+        left_rows, right_rows = left._read_rows(), right._read_rows()
+        return Matrix(left.rows, right.cols, [[self._calc_matrix_matmul_elem(left_rows, right_rows, row, col)
+                                               for col in range(right.cols)] for row in range(left.rows)])
+
+    @staticmethod
+    def _from_elements(rows, cols, elements):
+        """
+        :param elements: (array, kind) or list of lists (or MatrixView) of elements
+        :return: Matrix
+        """
+        if isinstance(elements, tuple):
+            return Matrix.from_array(*elements)
+        return Matrix(rows, cols, elements)
 
-        res = Matrix(left.rows, right.cols, [[None for _ in range(right.cols)] for _ in range(left.rows)])
-        for row in range(res.rows):
-            for col in range(res.cols):
-                res.matrix[row][col] = self._calc_matrix_matmul_elem(left, right, row, col)
+    def structured_power(self, exponent):
+        """
+        Power of diagonal matrix, which is computed element by element,
+        power of identity shares elements with it
 
+        :param exponent: positive integer
+        :return: Matrix, or None if power should be computed by matrix products
+        """
+        if self.rows != self.cols or DIAGONAL not in self.structure:
+            return None
+        if IDENTITY in self.structure:
+            res = self.submatrix(range(self.rows), range(self.cols))
+        else:
+            res = matrix_structure.power(self, exponent)
+            if res is None:
+                return None
+            res = Matrix._from_elements(self.rows, self.cols, res)
+        res._structure = self.structure
         return res
 
     @staticmethod
     def _calc_matrix_matmul_elem(left, right, row, col):
         """
         Calculates dot product of left matrix row and right matrix column
-        :param left: left matrix
-        :param right: right matrix
+        :param left: elements of left matrix
+        :param right: elements of right matrix
         :param row: row index
         :param col: column index
         :return: result of dot product
         """
         res = None
-        for i in range(left.cols):
-            cur_prod = left.matrix[row][i] * right.matrix[i][col]
+        left_row = left[row]
+        for i in range(len(left_row)):
+            cur_prod = left_row[i] * right[i][col]
             res = cur_prod if res is None else res + cur_prod
 
         return res
 
+    def lu_decomposition(self) -> LUDecomposition:
+        """
+        Decomposes square matrix of Numbers. Decomposition is computed once and kept
+        with matrix, so inversion, determinant and solving with same matrix reuse it
+
+        :return: LUDecomposition
+        """
+        if self.rows != self.cols:
+            raise MatrixIsNotSquare(self)
+        if not self.elements_are(Number):
+            raise MatrixIsNonInvertible(self)
+        if self._lu is None:
+            structure = self.structure
+            stored = self.as_array()
+            if stored is not None:
+                array = stored[0]
+            else:
+                array = np.array([[elem.val for elem in row] for row in self._matrix], dtype=np.float64)
+            triangle = next((tag for tag in (DIAGONAL, UPPER, LOWER) if tag in structure), None)
+            self._lu = LUDecomposition(array) if triangle is None else LUDecomposition.of_triangular(array, triangle)
+        return self._lu
+
     def invert_matrix(self):
         """
-        Creates and returns inversion of self
+        Creates and returns inversion of self. Small matrices, which are kept as lists,
+        are inverted exactly, so inv([[1, 2]; [3, 4]]) has -2.0, not -1.9999999999999998.
+        Others are inverted by LU decomposition
 
         :return: inverted Matrix
         """
-        if self.rows != self.cols:
+        res = self._exact_inverse()
+        if res is None:
+            inverted = self.lu_decomposition().inverse()
+            if inverted is None:
+                raise MatrixIsNonInvertible(self)
+            res = Matrix.from_array(inverted, array_storage.REAL)
+        if DIAGONAL in self.structure:
+            res._structure = self.structure
+        return res
+
+    def _exact_inverse(self):
+        """
+        :return: inverse as Matrix of floats if self is small square matrix of finite Numbers, otherwise None
+        """
+        if self.as_array() is not None or self.rows != self.cols or not self.elements_are(Number):
+            return None
+        values = [[elem.val for elem in row] for row in self._read_rows()]
+        if not all(math.isfinite(val) for row in values for val in row):
+            return None
+        inverted = exact_inverse(values)
+        if inverted is None:
             raise MatrixIsNonInvertible(self)
-        n = self.rows
-        matrix = Matrix(self.rows, self.cols, [row[:] for row in self.matrix])
-        inverted = Matrix(n, n, [[Number(0.0) if i != j else Number(1.0) for i in range(n)] for j in range(n)])
+        return Matrix(self.rows, self.cols, [[Number(float(val)) for val in row] for row in inverted])
 
-        self._forward_elimination(matrix, inverted)
-        self._backward_elimination(matrix, inverted)
+    def determinant(self):
+        """
+        :return: determinant as Number
+        """
+        return Number(self.lu_decomposition().determinant())
 
-        return inverted
+    def solve(self, b):
+        """
+        Solves linear system self * x = b
+
+        :param b: Matrix of Numbers with same number of rows as self
+        :return: x as Matrix
+        """
+        if b.rows != self.rows:
+            raise WrongMatrixDimension(self, b)
+        stored = b.as_array()
+        rhs = stored[0] if stored is not None else [[elem.val for elem in row] for row in b.matrix]
+        solution = self.lu_decomposition().solve(rhs)
+        if solution is None:
+            raise MatrixIsNonInvertible(self)
+        return Matrix.from_array(solution, array_storage.REAL)
 
     def transpose_matrix(self):
         """
-        Creates and returns transpose of self
+        Creates and returns transpose of self, which shares elements with it
 
         :return: transposed Matrix
         """
-        transposed = Matrix(self.cols, self.rows, [[None for _ in range(self.rows)] for _ in range(self.cols)])
-        for i in range(self.cols):
-            for j in range(self.rows):
-                transposed.matrix[i][j] = self.matrix[j][i]
-
-        return transposed
-
-    def _forward_elimination(self, matrix, inverted):
-        n = matrix.rows
-        for col_idx in range(n-1):
-            cur_row = matrix.matrix[col_idx]
-            if cur_row[col_idx] == Number(0):
-                non_zero_row = self._find_next_nonzero_row(matrix, col_idx, col_idx+1)
-                if non_zero_row is None:
-                    raise MatrixIsNonInvertible(matrix)
-                matrix.matrix[col_idx], matrix.matrix[non_zero_row] = matrix.matrix[non_zero_row], matrix.matrix[col_idx]
-                inverted.matrix[col_idx], inverted.matrix[non_zero_row] = inverted.matrix[non_zero_row], inverted.matrix[col_idx]
-                cur_row = matrix.matrix[col_idx]
-
-            for row_idx in range(col_idx+1, n):
-                coef = matrix.matrix[row_idx][col_idx] / cur_row[col_idx]
-
-                mult_row = [elem * coef for elem in cur_row]
-                matrix.matrix[row_idx] = [matrix.matrix[row_idx][i] - mult_row[i] for i in range(n)]
-
-                mult_row = [elem * coef for elem in inverted.matrix[col_idx]]
-                inverted.matrix[row_idx] = [inverted.matrix[row_idx][i] - mult_row[i] for i in range(n)]
-        if matrix.matrix[n-1][n-1] == Number(0):
-            raise MatrixIsNonInvertible(matrix)
-
-    def _backward_elimination(self, matrix, inverted):
-        n = matrix.rows
-        for row_idx in range(n-1, -1, -1):
-            coef = Number(1) / matrix.matrix[row_idx][row_idx]
-            inverted.matrix[row_idx] = [elem * coef for elem in inverted.matrix[row_idx]]
-
-            if row_idx == 0:
-                break
-            coef = matrix.matrix[row_idx-1][row_idx]
-            for col_idx in range(n):
-                inverted.matrix[row_idx-1][col_idx] -= inverted.matrix[row_idx][col_idx] * coef
-
-    def _find_next_nonzero_row(self, matrix, col_idx, row_idx):
-        n = matrix.rows
-        for i in range(row_idx, n):
-            if matrix.matrix[i][col_idx] != Number(0):
-                return i
-        return None
+        if self._structure is not None and SYMMETRIC in self._structure:
+            res = self.submatrix(range(self.rows), range(self.cols))
+        elif self._matrix is None:
+            res = Matrix.from_array(self._array.T, self._kind)
+        else:
+            res = Matrix(self.cols, self.rows, MatrixView.of(self._matrix).transpose())
+        if self._structure is not None:
+            res._structure = matrix_structure.transposed(self._structure)
+        return res
+
+    def submatrix(self, rows: range, cols: range):
+        """
+        Block of self which shares elements with it
+
+        :param rows: indices of rows, range with step 1
+        :param cols: indices of columns, range with step 1
+        :return: Matrix
+        """
+        if self._matrix is None:
+            return Matrix.from_array(self._array[rows.start:rows.stop, cols.start:cols.stop], self._kind)
+        return Matrix(len(rows), len(cols), MatrixView.of(self._matrix).block(rows, cols))
@@ -0,0 +1,156 @@
+"""
+Structure of square matrices: identity, diagonal, upper or lower triangular, symmetric.
+Matrix detects its structure once, when it's needed first, matrices created by
+eye() and diag() builtins declare it. Structure lets Matrix skip work of general
+algorithms: product with identity shares elements of other operand, product with
+diagonal matrix scales rows or columns of other operand, diagonal matrix is raised
+to power element by element, and LU decomposition of triangular matrix is matrix itself.
+Like array_storage kernels, functions here return None when their result could
+differ from result of general algorithm.
+"""
+
+import cmath
+import operator
+from typing import FrozenSet, List
+from math_types import array_storage, matmul_kernel
+from math_types.number import Number, power_by_squaring
+from math_types.complex_number import ComplexNumber
+from math_types.matrix_view import MatrixView
+from math_types.lazy_import import lazy_import
+
+np = lazy_import("numpy")  # None if NumPy isn't installed
+
+IDENTITY = "identity"
+DIAGONAL = "diagonal"
+UPPER = "upper"  # zeros below main diagonal
+LOWER = "lower"  # zeros above main diagonal
+SYMMETRIC = "symmetric"
+
+GENERAL = frozenset()
+DIAGONAL_STRUCTURE = frozenset((DIAGONAL, UPPER, LOWER, SYMMETRIC))
+IDENTITY_STRUCTURE = DIAGONAL_STRUCTURE | {IDENTITY}
+
+
+def _value(elem):
+    return complex(elem.real, elem.imag) if isinstance(elem, ComplexNumber) else elem.val
+
+
+def detect(matrix) -> FrozenSet[str]:
+    """
+    :param matrix: Matrix
+    :return: set of tags which describe matrix, empty for general and not square matrices
+    """
+    if matrix.rows != matrix.cols:
+        return GENERAL
+    stored = matrix.as_array()
+    if stored is not None:
+        values = stored[0]
+        upper = not np.tril(values, -1).any()
+        lower = not np.triu(values, 1).any()
+        symmetric = bool((values == values.T).all())
+        ones = bool((np.diagonal(values) == 1).all())
+    else:
+        values = [[_value(elem) for elem in row] for row in matrix._read_rows()]
+        n = len(values)
+        upper = all(values[i][j] == 0 for i in range(n) for j in range(i))
+        lower = all(values[i][j] == 0 for i in range(n) for j in range(i + 1, n))
+        symmetric = all(values[i][j] == values[j][i] for i in range(n) for j in range(i))
+        ones = all(values[i][i] == 1 for i in range(n))
+    if upper and lower:
+        return IDENTITY_STRUCTURE if ones else DIAGONAL_STRUCTURE
+    tags = {tag for tag, present in ((UPPER, upper), (LOWER, lower), (SYMMETRIC, symmetric)) if present}
+    return frozenset(tags)
+
+
+def transposed(structure: FrozenSet[str]) -> FrozenSet[str]:
+    """
+    :return: structure of transposed matrix
+    """
+    if (UPPER in structure) == (LOWER in structure):
+        return structure
+    return structure ^ {UPPER, LOWER}
+
+
+def zero_like(elements: List):
+    """
+    :return: zero of the same kind as elements, so diagonal matrix of floats is stored as array
+    """
+    kinds = {type(_value(elem)) for elem in elements}
+    if kinds == {float}:
+        return Number(0.0)
+    if kinds == {complex}:
+        return ComplexNumber(0.0, 0.0)
+    return Number(0)
+
+
+def scale(diagonal, other, left: bool):
+    """
+    Product of diagonal matrix and other matrix: i-th row (or column) of other is multiplied
+    by i-th diagonal element. Product with identity is other matrix itself
+
+    :param diagonal: diagonal Matrix
+    :param other: other operand of product
+    :param left: True if diagonal matrix is left operand
+    :return: (array, kind) or list of lists of elements, or None if product should be
+        computed by general algorithm
+    """
+    diagonal_stored, other_stored = diagonal.as_array(), other.as_array()
+    if diagonal_stored is not None and other_stored is not None:
+        (values, kind), other_kind = diagonal_stored, other_stored[1]
+        if IDENTITY in diagonal.structure and \
+                (kind == array_storage.INT or kind == other_kind == array_storage.REAL):
+            return other_stored
+        values = np.diagonal(values)
+        if left:
+            return array_storage.elementwise((values[:, None], kind), other_stored, operator.mul)
+        return array_storage.elementwise(other_stored, (values[None, :], kind), operator.mul)
+    if diagonal_stored is not None or other_stored is not None:
+        return None
+    diagonal_unboxed = matmul_kernel.unbox(diagonal._read_rows())
+    other_unboxed = matmul_kernel.unbox(other._read_rows())
+    if diagonal_unboxed is None or other_unboxed is None or diagonal_unboxed[1] is not other_unboxed[1]:
+        return None
+    (values, kind), (rows, _) = diagonal_unboxed, other_unboxed
+    if kind is not int and not all(cmath.isfinite(val) for row in rows for val in row):
+        return None  # 0 * inf is nan in general product
+    if IDENTITY in diagonal.structure and kind is not complex:
+        return MatrixView.of(other._read_rows())
+    values = [values[i][i] for i in range(len(values))]
+    if left:
+        rows = [[factor * val for val in row] for factor, row in zip(values, rows)]
+    else:
+        rows = [list(map(operator.mul, row, values)) for row in rows]
+    return matmul_kernel.box(rows, kind)
+
+
+def power(diagonal, exponent: int):
+    """
+    Power of diagonal matrix: diagonal elements are raised to power by the same
+    multiplications as matrix power does
+
+    :param diagonal: diagonal Matrix
+    :param exponent: positive integer
+    :return: (array, kind) or list of lists of elements, or None if power should be
+        computed by matrix products
+    """
+    stored = diagonal.as_array()
+    if stored is not None and stored[1] != array_storage.COMPLEX:
+        values, kind = stored
+        with np.errstate(all="ignore"):
+            values = power_by_squaring(np.diagonal(values), exponent, np.multiply)
+        if not np.isfinite(values).all() or kind == array_storage.INT and \
+                np.abs(values).max() >= array_storage.MAX_EXACT_INT:
+            return None
+        return np.diag(values), kind
+    unboxed = matmul_kernel.unbox(diagonal._read_rows())
+    if unboxed is None:
+        return None
+    values, kind = unboxed
+    values = [power_by_squaring(values[i][i], exponent, operator.mul) for i in range(len(values))]
+    if kind is not int and not all(map(cmath.isfinite, values)):
+        return None
+    zero = kind(0)
+    rows = [[zero] * len(values) for _ in values]
+    for i, val in enumerate(values):
+        rows[i][i] = val
+    return matmul_kernel.box(rows, kind)
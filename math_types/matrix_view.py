@@ -0,0 +1,103 @@
+"""
+Read only views of matrix elements stored as list of lists.
+Transposed matrix, rows, columns and blocks of matrix share elements of
+original matrix instead of copying them: view maps its indices to indices of
+source list of lists, and is indexed like list of lists (view[i][j]), so Matrix
+operations read through it. Matrix materializes view to lists only when its
+elements are accessed for modification.
+"""
+
+from collections.abc import Sequence
+from typing import List
+
+
+class _Line(Sequence):
+    """
+    Row of view, i-th element is getter(indices[i])
+    """
+    __slots__ = ("_getter", "_indices")
+
+    def __init__(self, getter, indices: range):
+        self._getter = getter
+        self._indices = indices
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return list(map(self._getter, self._indices[item]))
+        return self._getter(self._indices[item])
+
+    def __iter__(self):
+        return map(self._getter, self._indices)
+
+    def __len__(self):
+        return len(self._indices)
+
+
+def _select(indices: range, selection: range) -> range:
+    """
+    :return: indices[i] for every i in selection
+    """
+    return indices[selection.start:selection.stop:selection.step]
+
+
+class MatrixView(Sequence):
+    """
+    Block of source matrix, possibly transposed: element (i, j) of view is
+    source[rows[i]][cols[j]], or source[rows[j]][cols[i]] if view is transposed
+    """
+    __slots__ = ("_source", "_rows", "_cols", "_transposed")
+
+    def __init__(self, source: List[List], rows: range, cols: range, transposed: bool = False):
+        """
+        :param source: list of lists with elements
+        :param rows: indices of source rows in view
+        :param cols: indices of source columns in view
+        :param transposed: if True, source rows are view columns
+        """
+        self._source = source
+        self._rows = rows
+        self._cols = cols
+        self._transposed = transposed
+
+    @classmethod
+    def of(cls, elements) -> "MatrixView":
+        """
+        :param elements: list of lists or MatrixView
+        :return: view of all elements
+        """
+        if isinstance(elements, MatrixView):
+            return elements
+        return cls(elements, range(len(elements)), range(len(elements[0])))
+
+    def transpose(self) -> "MatrixView":
+        return MatrixView(self._source, self._rows, self._cols, not self._transposed)
+
+    def block(self, rows: range, cols: range) -> "MatrixView":
+        """
+        :param rows: indices of view rows
+        :param cols: indices of view columns
+        :return: view of block of this view
+        """
+        if self._transposed:
+            return MatrixView(self._source, _select(self._rows, cols), _select(self._cols, rows), True)
+        return MatrixView(self._source, _select(self._rows, rows), _select(self._cols, cols))
+
+    def materialize(self) -> List[List]:
+        """
+        :return: copy of elements as list of lists
+        """
+        return [list(row) for row in self]
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self[i] for i in range(len(self))[item]]
+        if self._transposed:
+            col = self._cols[item]
+            return _Line(lambda row: self._source[row][col], self._rows)
+        row = self._source[self._rows[item]]
+        if self._cols == range(len(row)):
+            return row
+        return _Line(row.__getitem__, self._cols)
+
+    def __len__(self):
+        return len(self._cols) if self._transposed else len(self._rows)
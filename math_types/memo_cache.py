@@ -0,0 +1,123 @@
+"""MemoCache class implementation"""
+
+import sys
+from collections import OrderedDict
+from typing import Any, Optional, Hashable
+from math_types import Number, ComplexNumber, Matrix
+
+
+def memo_key(value) -> Optional[Hashable]:
+    """
+    Builds hashable fingerprint of evaluated function input.
+    Type of value is part of key, so 2 and 2.0 (which are printed differently) don't collide.
+    Matrix in array storage is keyed by bytes of its array, its elements aren't boxed
+
+    :param value: evaluated input (MathPrimitive)
+    :return: key, or None if value can't be used as key
+    """
+    if isinstance(value, Number):
+        return type(value.val), value.val
+    if isinstance(value, ComplexNumber):
+        return ComplexNumber, value.real, value.imag
+    if isinstance(value, Matrix):
+        stored = value.as_array()
+        if stored is not None:
+            array, kind = stored
+            return Matrix, value.rows, value.cols, kind, array.dtype.str, array.tobytes()
+        elements = []
+        for row in value._read_rows():
+            for elem in row:
+                key = memo_key(elem)
+                if key is None or isinstance(elem, Matrix):
+                    return None
+                elements.append(key)
+        return Matrix, value.rows, value.cols, tuple(elements)
+    return None
+
+
+def estimate_size(obj) -> int:
+    """
+    :param obj: cache key or MathPrimitive
+    :return: approximate number of bytes used by obj
+    """
+    if isinstance(obj, tuple):
+        return sys.getsizeof(obj) + sum(estimate_size(item) for item in obj if not isinstance(item, type))
+    if isinstance(obj, Number):
+        return sys.getsizeof(obj) + sys.getsizeof(obj.val)
+    if isinstance(obj, ComplexNumber):
+        return sys.getsizeof(obj) + sys.getsizeof(obj.real) + sys.getsizeof(obj.imag)
+    if isinstance(obj, Matrix):
+        stored = obj.as_array()
+        if stored is not None:
+            return sys.getsizeof(obj) + stored[0].nbytes
+        rows = obj._read_rows()
+        return sys.getsizeof(obj) + sys.getsizeof(rows) + \
+               sum(sys.getsizeof(row) + sum(estimate_size(elem) for elem in row) for row in rows)
+    return sys.getsizeof(obj)
+
+
+class MemoCache:
+    """
+    Memo table of pure function: maps input fingerprint (see memo_key) to result.
+    Total estimated size of keys and results never exceeds memory budget,
+    least recently used entries are evicted first.
+    """
+    def __init__(self, budget: int = 1 << 20):
+        """
+        :param budget: memory budget in bytes
+        """
+        self.budget = budget
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        lookups = self.hits + self.misses
+        hit_rate = 100 * self.hits / lookups if lookups else 0
+        return "{} entries, size {}/{} bytes, {} hits, {} misses, hit rate {:.1f}%, {} evictions".format(
+            len(self), self.size, self.budget, self.hits, self.misses, hit_rate, self.evictions)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        :param key: input fingerprint
+        :return: cached result or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """
+        Stores result, evicting least recently used entries if needed.
+        Results bigger than whole budget are not stored.
+
+        :param key: input fingerprint
+        :param value: function result
+        """
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.budget:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        while self.size + size > self.budget:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+        self._entries[key] = (value, size)
+        self.size += size
+
+    def clear(self) -> None:
+        """
+        Drops all entries, statistics are kept
+        """
+        self._entries.clear()
+        self.size = 0
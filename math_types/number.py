@@ -6,11 +6,31 @@ from math_types import ComplexNumber, MathPrimitive
 import operator
 
 
+def power_by_squaring(base, exponent: int, multiply):
+    """
+    Computes base multiplied by itself exponent times using O(log(exponent)) multiplications
+
+    :param base: MathPrimitive
+    :param exponent: positive integer
+    :param multiply: function of two arguments which multiplies them
+    :return: result of multiplications
+    """
+    result = None
+    while True:
+        if exponent & 1:
+            result = base if result is None else multiply(result, base)
+        exponent >>= 1
+        if not exponent:
+            return result
+        base = multiply(base, base)
+
+
 class Number(MathPrimitive):
     """
     Implementation of number and it's operations
     Number may interact with other ComplexNumber or Number
     """
+    __slots__ = ("val",)
     _operations = {"+": "add_to_num",
                   "-": "subtract_from_num",
                   "*": "multiply_by_num",
@@ -18,6 +38,18 @@ class Number(MathPrimitive):
                   "^": "power_num",
                   "%": "modulo_num",
                   "**": "matmul_num"}
+    # numbers are immutable, so small integers are shared like python ints are
+    _small_ints = {}
+
+    def __new__(cls, val):
+        if type(val) is int and -5 <= val <= 256 and cls is Number:
+            instance = cls._small_ints.get(val)
+            if instance is None:
+                instance = super().__new__(cls)
+                instance.val = val
+                cls._small_ints[val] = instance
+            return instance
+        return super().__new__(cls)
 
     def __init__(self, val):
         """
@@ -25,6 +57,12 @@ class Number(MathPrimitive):
         """
         self.val = val
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __eq__(self, other):
         return isclose(self.val, other.val)
 
@@ -76,18 +114,13 @@ class Number(MathPrimitive):
     def power_comp_num(self, other):
         if self.val <= 0 or not isclose(self.val, int(self.val)):
             raise OperationIsNotSupported(Number, "^", type(other))
-        res = other
-        for i in range(int(self.val-1)):
-            res = res * res
-        return res
+        return power_by_squaring(other, int(self.val), operator.mul)
 
     def matrix_elementwise_op(self, matrix, op):
-        from math_types import Matrix
-        res = Matrix(matrix.rows, matrix.cols, [row[:] for row in matrix.matrix])
-        for row_idx in range(res.rows):
-            for col_idx in range(res.cols):
-                res.matrix[row_idx][col_idx] = op(res.matrix[row_idx][col_idx], self)
-        return res
+        res = matrix.apply_scalar(self, op)
+        if res is not None:
+            return res
+        return matrix.map_elements(lambda elem: op(elem, self))
 
     def add_to_matrix(self, other):
         return self.matrix_elementwise_op(other, operator.add)
@@ -107,9 +140,39 @@ class Number(MathPrimitive):
         return self.matrix_elementwise_op(other, operator.mod)
 
     def power_matrix(self, other):
-        if self.val <= 0 or not isclose(self.val, int(self.val)):
+        """
+        Matrix power, negative powers are powers of inverted matrix
+        """
+        if self.val == 0 or not isclose(self.val, int(self.val)):
+            raise OperationIsNotSupported(Number, "^", type(other))
+        if self.val < 0:
+            other = other.invert_matrix()
+        res = other.structured_power(abs(int(self.val)))
+        if res is not None:
+            return res
+        return power_by_squaring(other, abs(int(self.val)), operator.pow)
+
+    def add_to_sparse(self, other):
+        return other.scalar_op(self, operator.add)
+
+    def subtract_from_sparse(self, other):
+        return other.scalar_op(self, operator.sub)
+
+    def multiply_by_sparse(self, other):
+        return other.scalar_op(self, operator.mul)
+
+    def divide_sparse(self, other):
+        return other.scalar_op(self, operator.truediv)
+
+    def modulo_sparse(self, other):
+        return other.scalar_op(self, operator.mod)
+
+    def power_sparse(self, other):
+        """
+        Power of sparse matrix is sparse, negative powers are computed by dense inverted matrix
+        """
+        if self.val < 0:
+            return self.power_matrix(other.to_dense())
+        if self.val == 0 or not isclose(self.val, int(self.val)):
             raise OperationIsNotSupported(Number, "^", type(other))
-        res = other
-        for i in range(int(self.val-1)):
-            res = res ** other
-        return res
+        return power_by_squaring(other, int(self.val), operator.pow)
@@ -2,12 +2,32 @@
 
 
 class Operator:
+    """
+    Operators are immutable, so there is only one instance per symbol
+    """
+    __slots__ = ("op",)
+    _instances = {}
+
+    def __new__(cls, op):
+        instance = cls._instances.get(op)
+        if instance is None:
+            instance = super().__new__(cls)
+            instance.op = op
+            cls._instances[op] = instance
+        return instance
+
     def __init__(self, op):
         """
         :param op: string which represents operator symbol
         """
         self.op = op
 
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
     def __eq__(self, other):
         return self.op == other.op
 
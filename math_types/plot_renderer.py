@@ -0,0 +1,270 @@
+"""
+Rendering of plots made by special commands. Commands compute points and pass plot
+to current renderer as list of calls of matplotlib Axes methods, (method name,
+args, kwargs), so plot could be sent to other process.
+Interactive renderer opens window for every plot by pyplot of interpreter process.
+Window renderer, which is used by REPL, shows plots by separate process running GUI
+event loop, so windows are redrawn and respond while interpreter waits for input or
+evaluates. It's progressive: plot could be rendered several times while it's refined,
+and window shows the latest version.
+Headless renderer doesn't need display: it draws on one reused Agg figure and writes
+image files to output directory. Drawing and encoding of images is done by background
+thread, so interpreter goes on evaluating while plots are written. Headless mode is
+enabled by computorV2.py --plot-dir or by COMPUTOR_PLOT_DIR environment variable.
+"""
+
+import atexit
+import os
+import queue
+import sys
+import threading
+from typing import List, Optional, Tuple
+from exceptions.evaluation_exceptions import WrongSpecialCommandUse
+
+PLOT_DIR_VARIABLE = "COMPUTOR_PLOT_DIR"
+PLOT_FORMAT_VARIABLE = "COMPUTOR_PLOT_FORMAT"
+FORMATS = ("png", "svg")
+EVENT_LOOP_INTERVAL = 0.05  # seconds GUI event loop runs between checks of plot queue
+CLOSE_TIMEOUT = 5  # seconds plot process is given to close windows and exit
+
+Calls = List[Tuple[str, tuple, dict]]
+
+_current = None
+
+
+def draw(axes, calls: Calls) -> None:
+    """
+    :param axes: matplotlib Axes
+    :param calls: list of (Axes method name, args, kwargs)
+    """
+    for method, args, kwargs in calls:
+        getattr(axes, method)(*args, **kwargs)
+
+
+class InteractiveRenderer:
+    """
+    Shows every plot in its own window
+    """
+    progressive = False
+
+    def render(self, name: str, calls: Calls, final: bool = True) -> Optional[str]:
+        """
+        :param name: name of command which plots
+        :param calls: plot as list of calls of Axes methods
+        :param final: False if plot will be rendered again after refinement
+        :return: None, as plot isn't saved
+        """
+        import matplotlib.pyplot as plt  # selects GUI backend, so it isn't imported in headless mode
+        plt.figure()
+        plt.ion()
+        draw(plt.gca(), calls)
+        plt.show()
+        plt.pause(0.001)
+        return None
+
+    def cancel(self) -> None:
+        pass
+
+    def wait(self) -> None:
+        pass
+
+
+class WindowRenderer:
+    """
+    Sends plots to process which shows them in windows. Process is started on first plot
+    """
+    progressive = True
+
+    def __init__(self):
+        self.count = 0
+        self._refined = None  # id of plot which isn't final yet
+        self._requests = None
+        self._process = None
+
+    def render(self, name: str, calls: Calls, final: bool = True) -> Optional[str]:
+        """
+        Queues plot to be shown. Plot which isn't final is shown at once and is
+        replaced in the same window by next rendered plot
+
+        :param name: name of command which plots
+        :param calls: plot as list of calls of Axes methods
+        :param final: False if plot will be rendered again after refinement
+        :return: None, as plot isn't saved
+        """
+        if self._process is None:
+            import multiprocessing  # only REPL which plots needs it
+            context = multiprocessing.get_context("spawn")  # GUI toolkits don't survive fork
+            self._requests = context.Queue()
+            self._process = context.Process(target=_window_loop, args=(self._requests,),
+                                            name="plot-windows", daemon=True)
+            self._process.start()
+            atexit.register(self.close)
+        if not self._process.is_alive():
+            raise WrongSpecialCommandUse("Plot windows can't be shown, plot process exited")
+        if self._refined is None:
+            self.count += 1
+            self._refined = self.count
+        self._requests.put((self._refined, name, calls))
+        if final:
+            self._refined = None
+        return None
+
+    def cancel(self) -> None:
+        """
+        Ends plot which isn't final, so next plot is shown in new window. It's called
+        when plot isn't finished, e.g. its evaluation raised exception
+        """
+        self._refined = None
+
+    def wait(self) -> None:
+        pass
+
+    def close(self) -> None:
+        """
+        Closes all windows and stops plot process
+        """
+        if self._process is not None and self._process.is_alive():
+            self._requests.put(None)
+            self._process.join(CLOSE_TIMEOUT)
+            if self._process.is_alive():
+                self._process.terminate()
+        self._process = None
+
+
+def _window_loop(requests) -> None:
+    """
+    Runs in plot process: shows received plots, runs GUI event loop while there are open windows
+
+    :param requests: queue of (plot id, name, calls), None stops loop
+    """
+    import matplotlib.pyplot as plt
+    plt.rcParams["figure.raise_window"] = False  # refreshed windows don't take focus from REPL
+    figures = {}
+    while True:
+        figures = {plot_id: figure for plot_id, figure in figures.items() if plt.fignum_exists(figure.number)}
+        try:
+            message = requests.get_nowait() if figures else requests.get()
+        except queue.Empty:
+            plt.pause(EVENT_LOOP_INTERVAL)
+            continue
+        if message is None:
+            break
+        plot_id, name, calls = message
+        figure = figures.get(plot_id)
+        if figure is None:
+            figure = figures[plot_id] = plt.figure(num="{} {}".format(name, plot_id))
+        figure.clear()
+        draw(figure.add_subplot(), calls)
+        figure.canvas.draw_idle()
+        plt.show(block=False)
+    plt.close("all")
+
+
+class HeadlessRenderer:
+    """
+    Writes plots to image files by background thread
+    """
+    progressive = False
+
+    def __init__(self, directory: str, image_format: str = "png"):
+        """
+        :param directory: output directory, created if it doesn't exist
+        :param image_format: "png" or "svg"
+        """
+        if image_format not in FORMATS:
+            raise ValueError("Plot format should be one of: {}".format(", ".join(FORMATS)))
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.image_format = image_format
+        self.count = 0
+        self._queue = queue.Queue()
+        self._figure = None
+        self._worker = threading.Thread(target=self._work, name="plot-renderer", daemon=True)
+        self._worker.start()
+        atexit.register(self.wait)
+
+    def render(self, name: str, calls: Calls, final: bool = True) -> Optional[str]:
+        """
+        Queues plot to be written. Points which calls use shouldn't be modified after call
+
+        :param name: name of command which plots, it's part of file name
+        :param calls: plot as list of calls of Axes methods
+        :param final: False if plot will be rendered again after refinement, then it isn't written
+        :return: path of image file
+        """
+        if not final:
+            return None
+        self.count += 1
+        path = os.path.join(self.directory, "{:04d}_{}.{}".format(self.count, name, self.image_format))
+        self._queue.put((path, calls))
+        return path
+
+    def cancel(self) -> None:
+        pass
+
+    def wait(self) -> None:
+        """
+        Waits until all queued plots are written
+        """
+        self._queue.join()
+
+    def _work(self) -> None:
+        while True:
+            path, calls = self._queue.get()
+            try:
+                self._write(path, calls)
+            except Exception as e:
+                print("ERROR: plot {} isn't written: {}".format(path, e), file=sys.stderr)
+            finally:
+                self._queue.task_done()
+
+    def _write(self, path: str, calls: Calls) -> None:
+        if self._figure is None:
+            # Agg canvas without pyplot: no GUI backend and no global figure registry
+            from matplotlib.figure import Figure
+            from matplotlib.backends.backend_agg import FigureCanvasAgg
+            self._figure = Figure()
+            FigureCanvasAgg(self._figure)
+        self._figure.clear()
+        draw(self._figure.add_subplot(), calls)
+        self._figure.savefig(path, format=self.image_format)
+
+
+def current():
+    """
+    :return: renderer used by special commands, headless if COMPUTOR_PLOT_DIR is set
+    """
+    global _current
+    if _current is None:
+        directory = os.environ.get(PLOT_DIR_VARIABLE)
+        if directory:
+            image_format = os.environ.get(PLOT_FORMAT_VARIABLE, "png")
+            if image_format not in FORMATS:
+                raise WrongSpecialCommandUse("${} should be one of: {}, got '{}'".format(
+                    PLOT_FORMAT_VARIABLE, ", ".join(FORMATS), image_format))
+            _current = HeadlessRenderer(directory, image_format)
+        else:
+            _current = InteractiveRenderer()
+    return _current
+
+
+def use(renderer):
+    """
+    Sets renderer used by special commands, None restores default one
+
+    :return: previous renderer
+    """
+    global _current
+    previous, _current = _current, renderer
+    return previous
+
+
+def use_windows():
+    """
+    Replaces default interactive renderer by window renderer, headless one is kept
+
+    :return: current renderer
+    """
+    if isinstance(current(), InteractiveRenderer):
+        use(WindowRenderer())
+    return current()
@@ -0,0 +1,67 @@
+"""
+Adaptive sampling of functions for plots.
+Function is evaluated at coarse uniform grid first. Then every interval is checked by
+its midpoint: if value at midpoint is far from chord between values at ends, function
+bends or jumps there, and both halves are checked at next level. All midpoints of one
+level are evaluated as one batch, so vectorized functions are evaluated by few calls
+over arrays, and smooth parts of plot get only few points.
+"""
+
+from typing import Callable, Optional, Tuple
+import numpy as np
+
+INITIAL_POINTS = 33  # points of coarse grid, including ends
+MAX_LEVELS = 12  # intervals of coarse grid are halved at most MAX_LEVELS times
+DEFAULT_TOLERANCE = 1e-3  # allowed distance from chord, relative to range of values on coarse grid
+
+
+def adaptive_sample(evaluate: Callable, a: float, b: float, tolerance: float = DEFAULT_TOLERANCE,
+                    initial_points: int = INITIAL_POINTS, max_levels: int = MAX_LEVELS,
+                    on_level: Optional[Callable] = None) -> Tuple[np.ndarray, np.ndarray, int]:
+    """
+    :param evaluate: function which takes 1D array of x and returns array of real values,
+        nan where function isn't defined
+    :param a: left end of range
+    :param b: right end of range
+    :param tolerance: allowed distance between plotted line and function, relative to
+        range of function values
+    :param initial_points: points of coarse grid
+    :param max_levels: limit of refinement levels
+    :param on_level: function which takes sorted x and y of points sampled so far, it's called
+        for coarse grid and after every refinement level except the last one, so plot could be
+        shown before it's refined
+    :return: (x, y, number of evaluated points), x sorted
+    """
+    xs = [np.linspace(a, b, initial_points)]
+    ys = [np.asarray(evaluate(xs[0]), dtype=np.float64)]
+    finite = ys[0][np.isfinite(ys[0])]
+    scale = finite.max() - finite.min() if len(finite) else 0.0
+    limit = tolerance * (scale if scale > 0 else 1.0)
+
+    left_x, right_x = xs[0][:-1], xs[0][1:]
+    left_y, right_y = ys[0][:-1], ys[0][1:]
+    for _ in range(max_levels):
+        if len(left_x) == 0:
+            break
+        if on_level is not None:
+            on_level(*_sorted(xs, ys))
+        mid_x = (left_x + right_x) / 2
+        mid_y = np.asarray(evaluate(mid_x), dtype=np.float64)
+        xs.append(mid_x)
+        ys.append(mid_y)
+        with np.errstate(invalid="ignore"):
+            bent = np.abs(mid_y - (left_y + right_y) / 2) > limit
+        defined = np.isfinite(np.stack((left_y, mid_y, right_y)))
+        # interval with both defined and undefined points contains edge of domain
+        refine = bent | defined.any(axis=0) & ~defined.all(axis=0)
+        left_x, right_x = np.concatenate((left_x[refine], mid_x[refine])), np.concatenate((mid_x[refine], right_x[refine]))
+        left_y, right_y = np.concatenate((left_y[refine], mid_y[refine])), np.concatenate((mid_y[refine], right_y[refine]))
+
+    x, y = _sorted(xs, ys)
+    return x, y, len(x)
+
+
+def _sorted(xs, ys) -> Tuple[np.ndarray, np.ndarray]:
+    x, y = np.concatenate(xs), np.concatenate(ys)
+    order = np.argsort(x, kind="stable")
+    return x[order], y[order]
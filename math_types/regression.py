@@ -0,0 +1,143 @@
+"""
+Streaming simple linear regression y = intercept + slope * x.
+Points are processed by chunks and only sufficient statistics are kept: number of
+points, means of x and y, sum of squared deviations of x and sum of products of
+deviations of x and y. Statistics of every chunk are merged into totals by
+pairwise update formulas, which don't lose precision the way raw sums x^2 and x*y do,
+so memory doesn't depend on number of points.
+"""
+
+import csv
+import math
+from typing import Iterator, Tuple
+import numpy as np
+from exceptions.evaluation_exceptions import WrongSpecialCommandUse
+from math_types import Number, array_storage
+
+CHUNK_SIZE = 65536  # points processed at once
+
+
+class LinearRegression:
+    """
+    Accumulates statistics of points, coefficients could be computed at any moment
+    """
+    __slots__ = ("n", "mean_x", "mean_y", "ss_x", "sp_xy", "min_x", "max_x")
+
+    def __init__(self):
+        self.n = 0
+        self.mean_x = self.mean_y = 0.0
+        self.ss_x = 0.0  # sum of (x - mean_x)^2
+        self.sp_xy = 0.0  # sum of (x - mean_x) * (y - mean_y)
+        self.min_x, self.max_x = math.inf, -math.inf
+
+    def update(self, x, y) -> None:
+        """
+        Adds chunk of points
+
+        :param x: 1D array of x coordinates
+        :param y: 1D array of y coordinates of the same length
+        """
+        n = len(x)
+        if n == 0:
+            return
+        x, y = np.asarray(x, dtype=np.float64), np.asarray(y, dtype=np.float64)
+        mean_x, mean_y = float(x.mean()), float(y.mean())
+        dx = x - mean_x
+        ss_x, sp_xy = float(dx @ dx), float(dx @ (y - mean_y))
+        total = self.n + n
+        delta_x, delta_y = mean_x - self.mean_x, mean_y - self.mean_y
+        weight = self.n * n / total
+        self.mean_x += delta_x * n / total
+        self.mean_y += delta_y * n / total
+        self.ss_x += ss_x + delta_x * delta_x * weight
+        self.sp_xy += sp_xy + delta_x * delta_y * weight
+        self.n = total
+        self.min_x, self.max_x = min(self.min_x, float(x.min())), max(self.max_x, float(x.max()))
+
+    def coefficients(self) -> Tuple[float, float]:
+        """
+        :return: (intercept, slope) of best-fit line
+        """
+        if self.n < 2 or self.ss_x == 0:
+            raise WrongSpecialCommandUse("linreg needs at least two points with different x")
+        slope = self.sp_xy / self.ss_x
+        return self.mean_y - slope * self.mean_x, slope
+
+    def __str__(self):
+        intercept, slope = self.coefficients()
+        return "f(x) = {} + {} * x".format(intercept, slope)
+
+    @classmethod
+    def from_chunks(cls, chunks: Iterator[Tuple[np.ndarray, np.ndarray]]) -> "LinearRegression":
+        res = cls()
+        for x, y in chunks:
+            res.update(x, y)
+        return res
+
+    @classmethod
+    def from_matrices(cls, x, y, chunk_size: int = CHUNK_SIZE) -> "LinearRegression":
+        """
+        :param x: Matrix with one row of x coordinates
+        :param y: Matrix with one row of y coordinates
+        """
+        return cls.from_chunks(zip(_row_chunks(x, chunk_size), _row_chunks(y, chunk_size)))
+
+    @classmethod
+    def from_file(cls, path: str, chunk_size: int = CHUNK_SIZE) -> "LinearRegression":
+        """
+        :param path: .npy file with (N, 2) array, or text file with x and y separated
+            by comma on every line, first line could be header
+        """
+        if path.endswith(".npy"):
+            return cls.from_chunks(_npy_chunks(path, chunk_size))
+        with open(path, newline="") as file:
+            return cls.from_chunks(_csv_chunks(file, chunk_size))
+
+
+def _row_chunks(matrix, chunk_size: int) -> Iterator[np.ndarray]:
+    stored = matrix.as_array()
+    if stored is not None:
+        values, kind = stored
+        if kind == array_storage.COMPLEX:
+            raise WrongSpecialCommandUse("linreg points should be real numbers")
+        for start in range(0, matrix.cols, chunk_size):
+            yield values[0, start:start + chunk_size]
+        return
+    row = matrix._read_rows()[0]
+    for start in range(0, matrix.cols, chunk_size):
+        chunk = row[start:start + chunk_size]
+        if not all(isinstance(elem, Number) for elem in chunk):
+            raise WrongSpecialCommandUse("linreg points should be real numbers")
+        yield np.fromiter((elem.val for elem in chunk), dtype=np.float64, count=len(chunk))
+
+
+def _npy_chunks(path: str, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    points = np.load(path, mmap_mode="r")
+    if points.ndim != 2 or points.shape[1] != 2:
+        raise WrongSpecialCommandUse("linreg expects array of (N, 2) shape in {}".format(path))
+    for start in range(0, len(points), chunk_size):
+        chunk = np.asarray(points[start:start + chunk_size], dtype=np.float64)
+        yield chunk[:, 0], chunk[:, 1]
+
+
+def _csv_chunks(file, chunk_size: int) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    chunk = []
+    for line_number, row in enumerate(csv.reader(file), 1):
+        if not row:
+            continue
+        if len(row) != 2:
+            raise WrongSpecialCommandUse("Line {} should contain x and y: {}".format(line_number, ",".join(row)))
+        try:
+            x, y = map(float, row)
+        except ValueError:
+            if line_number == 1:
+                continue  # header
+            raise WrongSpecialCommandUse("Line {} should contain x and y: {}".format(line_number, ",".join(row)))
+        chunk.append((x, y))
+        if len(chunk) == chunk_size:
+            points = np.array(chunk)
+            yield points[:, 0], points[:, 1]
+            chunk = []
+    if chunk:
+        points = np.array(chunk)
+        yield points[:, 0], points[:, 1]
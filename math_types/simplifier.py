@@ -0,0 +1,153 @@
+"""
+Constant folding and algebraic simplification of expressions.
+Used for bodies of user defined functions, so work that doesn't depend on
+function input is done once at definition instead of on every call.
+"""
+
+from typing import List, NamedTuple, Any
+from consts import OPERATOR_PRECEDENCE, OPERATOR_MAP
+from exceptions import MathException, EvalException
+from math_types import Number, ComplexNumber, Matrix, AFunction, Operator, Expression
+from math_types.expression import negate
+from math_types.function_compiler import OPERATOR_SYMBOLS
+
+LEAF_PRECEDENCE = float("inf")
+NEG = "neg"  # op of unary minus node, its operand is left
+
+
+class _Node(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+def simplify(expr: Expression) -> Expression:
+    """
+    Folds constant subexpressions and removes operations which don't change value:
+    x * 1, 1 * x, x + 0, 0 + x, x - 0, x ^ 1. Multiplication -1 * x becomes unary minus,
+    additions and subtractions of negated terms (a + -x, a - -3) are turned into
+    subtractions and additions. Operations aren't reordered, so constants are folded only
+    if they are evaluated together: x + 0.1 + 0.2 stays as is, as float result could differ.
+    Only operands with integer value 0 or 1 are removed, so type of result doesn't change.
+
+    :param expr: Expression
+    :return: simplified Expression, or expr itself if it can't be compiled
+    """
+    program = expr.compile()
+    if program is None:
+        return expr
+    stack = []
+    for instruction in program:
+        if type(instruction) is int:
+            stack.append(_simplify_operand(expr.body[instruction]))
+        elif instruction is negate:
+            stack.append(_negate(stack.pop()))
+        else:
+            right = stack.pop()
+            stack.append(_combine(OPERATOR_SYMBOLS[instruction], stack.pop(), right))
+    body = []
+    _emit(stack[0], body)
+    return Expression(body, preprocess=False)
+
+
+def _is_constant(obj) -> bool:
+    if isinstance(obj, (Number, ComplexNumber)):
+        return True
+    return isinstance(obj, Matrix) and obj.elements_are((Number, ComplexNumber))
+
+
+def _is_int(obj, val: int) -> bool:
+    return isinstance(obj, Number) and type(obj.val) is int and obj.val == val
+
+
+def _simplify_operand(obj):
+    """
+    Simplifies inputs of function calls and elements of matrices
+    """
+    if isinstance(obj, AFunction) and isinstance(obj.input, Expression):
+        return obj.__class__(obj.name, simplify(obj.input))
+    if isinstance(obj, Matrix) and not _is_constant(obj):
+        rows = []
+        for row in obj.matrix:
+            new_row = []
+            for elem in row:
+                if isinstance(elem, Expression):
+                    elem = simplify(elem)
+                    if len(elem.body) == 1 and isinstance(elem.body[0], (Number, ComplexNumber)):
+                        elem = elem.body[0]
+                new_row.append(elem)
+            rows.append(new_row)
+        return Matrix(obj.rows, obj.cols, rows)
+    return obj
+
+
+def _negate(operand):
+    """
+    :param operand: simplified operand of unary minus
+    :return: simplified result of unary minus
+    """
+    if _is_constant(operand):
+        return _combine("*", Number(-1), operand)
+    if isinstance(operand, _Node) and operand.op == NEG:
+        return operand.left
+    return _Node(NEG, operand, None)
+
+
+def _combine(op: str, left, right):
+    """
+    :param op: operator symbol
+    :param left: simplified left operand (math object or _Node)
+    :param right: simplified right operand
+    :return: simplified result of operation
+    """
+    if _is_constant(left) and _is_constant(right):
+        try:
+            return OPERATOR_MAP[op](left, right)
+        except (MathException, EvalException, ArithmeticError):
+            return _Node(op, left, right)  # error will be raised on call, as without folding
+
+    if (op == "*" and _is_int(right, 1)) or (op in "+-" and _is_int(right, 0)) or (op == "^" and _is_int(right, 1)):
+        return left
+    if (op == "*" and _is_int(left, 1)) or (op == "+" and _is_int(left, 0)):
+        return right
+    if op == "*" and _is_int(left, -1):
+        return _negate(right)
+
+    if op in "+-":
+        inverse = "-" if op == "+" else "+"
+        if isinstance(right, _Node) and right.op == NEG:
+            return _combine(inverse, left, right.left)
+        if isinstance(right, Number) and right.val < 0:
+            return _Node(inverse, left, Number(-right.val))
+    return _Node(op, left, right)
+
+
+def _precedence(node) -> float:
+    # unary minus binds to single operand, like leaf
+    return OPERATOR_PRECEDENCE[node.op] if isinstance(node, _Node) and node.op != NEG else LEAF_PRECEDENCE
+
+
+def _emit(node, body: List) -> None:
+    """
+    Writes node to body in infix form, with brackets only where precedence requires them
+    """
+    if not isinstance(node, _Node):
+        body.append(node)
+        return
+    if node.op == NEG:
+        body.append(Operator("-"))
+        _emit_operand(node.left, body, isinstance(node.left, _Node))
+        return
+    prec = OPERATOR_PRECEDENCE[node.op]
+    # every operator is left associative
+    _emit_operand(node.left, body, _precedence(node.left) < prec)
+    body.append(Operator(node.op))
+    _emit_operand(node.right, body, _precedence(node.right) <= prec)
+
+
+def _emit_operand(node, body: List, bracketed: bool) -> None:
+    if bracketed:
+        body.append(Operator("("))
+    _emit(node, body)
+    if bracketed:
+        body.append(Operator(")"))
@@ -0,0 +1,390 @@
+"""
+SparseMatrix class implementation.
+Sparse matrix keeps only nonzero elements in compressed sparse row (CSR) form:
+elements of row i are data[indptr[i]:indptr[i+1]], their column indices are
+indices[indptr[i]:indptr[i+1]] in increasing order. Elements which are not
+stored are integer zeros. Operations which keep zeros zeros (matrix
+multiplication, element-wise multiplication, scaling...) return sparse matrix,
+other operations compute dense Matrix.
+"""
+
+import math
+import operator
+from typing import Dict, Iterator, List, Optional, Tuple
+from exceptions.math_exceptions import WrongMatrixDimension
+from exceptions.evaluation_exceptions import MatrixIsNonInvertible, MatrixIsNotSquare, SolverDidNotConverge
+from math_types import MathPrimitive, Matrix, array_storage
+from math_types.number import Number
+from math_types.complex_number import ComplexNumber
+from math_types.matrix_structure import DIAGONAL
+
+DENSITY_THRESHOLD = 0.1  # interpreter stores results with smaller share of nonzero elements as sparse
+MIN_ELEMENTS = array_storage.ARRAY_THRESHOLD  # smaller results are never converted
+SOLVER_TOLERANCE = 1e-10  # relative residual which is accepted by iterative solver
+
+ZERO = Number(0)
+
+
+def _is_stored(elem) -> bool:
+    return type(elem) is not Number or type(elem.val) is not int or elem.val != 0
+
+
+def _is_zero(elem) -> bool:
+    if isinstance(elem, ComplexNumber):
+        return elem.real == 0 and elem.imag == 0
+    return elem.val == 0
+
+
+class SparseMatrix(MathPrimitive):
+    """
+    Matrix which stores only nonzero elements, see module docstring
+    """
+    # methods of right operand, e.g. S ^ 2 is Number.power_sparse, see math_primitive.resolve_operation
+    _operations = {"+": "add_to_sparse",
+                   "-": "subtract_from_sparse",
+                   "*": "multiply_by_sparse",
+                   "/": "divide_sparse",
+                   "^": "power_sparse",
+                   "%": "modulo_sparse",
+                   "**": "matmul_sparse"}
+    __slots__ = ("rows", "cols", "data", "indices", "indptr")
+
+    def __init__(self, rows, cols, data, indices, indptr):
+        """
+        :param rows: number of rows
+        :param cols: number of columns
+        :param data: list of stored elements
+        :param indices: column index of every stored element
+        :param indptr: list of rows + 1 offsets of rows in data
+        """
+        self.rows = rows
+        self.cols = cols
+        self.data = data
+        self.indices = indices
+        self.indptr = indptr
+
+    @classmethod
+    def from_rows(cls, rows, cols, sparse_rows) -> "SparseMatrix":
+        """
+        :param sparse_rows: iterable of rows, every row is iterable of (column index, element)
+            in increasing order of column indices
+        :return: SparseMatrix without integer zeros
+        """
+        data, indices, indptr = [], [], [0]
+        for row in sparse_rows:
+            for col, elem in row:
+                if _is_stored(elem):
+                    indices.append(col)
+                    data.append(elem)
+            indptr.append(len(data))
+        return cls(rows, cols, data, indices, indptr)
+
+    @classmethod
+    def from_dense(cls, matrix: Matrix) -> "SparseMatrix":
+        return cls.from_rows(matrix.rows, matrix.cols, (enumerate(row) for row in matrix._read_rows()))
+
+    def to_dense(self) -> Matrix:
+        rows = []
+        for i in range(self.rows):
+            row = [ZERO] * self.cols
+            for col, elem in self.row(i):
+                row[col] = elem
+            rows.append(row)
+        return Matrix(self.rows, self.cols, rows)
+
+    def row(self, i) -> Iterator[Tuple[int, MathPrimitive]]:
+        """
+        :return: iterator over (column index, element) of stored elements of row i
+        """
+        start, end = self.indptr[i], self.indptr[i + 1]
+        return zip(self.indices[start:end], self.data[start:end])
+
+    def submatrix(self, rows: range, cols: range) -> "SparseMatrix":
+        """
+        :param rows: indices of rows, range with step 1
+        :param cols: indices of columns, range with step 1
+        :return: block of self
+        """
+        return self.from_rows(len(rows), len(cols), ([(col - cols.start, elem) for col, elem in self.row(i)
+                                                      if col in cols] for i in rows))
+
+    @property
+    def density(self) -> float:
+        """
+        Share of stored elements
+        """
+        return len(self.data) / (self.rows * self.cols)
+
+    def elements_are(self, types) -> bool:
+        return all(isinstance(elem, types) for elem in self.data)
+
+    def __eq__(self, other):
+        if self.rows != other.rows or self.cols != other.cols:
+            return False
+        other = other.to_dense() if isinstance(other, SparseMatrix) else other
+        return self.to_dense() == other
+
+    def __str__(self):
+        rows = []
+        for i in range(self.rows):
+            row = ["0"] * self.cols
+            for col, elem in self.row(i):
+                row[col] = str(elem)
+            rows.append("[ " + ", ".join(row) + " ]")
+        return "\n".join(rows)
+
+    __repr__ = __str__
+
+    def scalar_op(self, scalar, op):
+        """
+        Applies op(element, scalar) to every element. If zero doesn't stay zero,
+        result is computed as dense matrix
+
+        :param scalar: Number or ComplexNumber
+        :param op: operator function
+        :return: SparseMatrix or Matrix
+        """
+        zero = op(ZERO, scalar)  # raises errors of dense matrix, like division by zero
+        if not _is_zero(zero):
+            return op(self.to_dense(), scalar)
+        return self.from_rows(self.rows, self.cols, ([(col, op(elem, scalar)) for col, elem in self.row(i)]
+                                                     for i in range(self.rows)))
+
+    def transpose_matrix(self) -> "SparseMatrix":
+        counts = [0] * (self.cols + 1)
+        for col in self.indices:
+            counts[col + 1] += 1
+        for col in range(self.cols):
+            counts[col + 1] += counts[col]
+        indptr = counts[:]
+        data, indices = [None] * len(self.data), [0] * len(self.data)
+        for i in range(self.rows):
+            for col, elem in self.row(i):
+                pos = counts[col]
+                data[pos], indices[pos] = elem, i
+                counts[col] += 1
+        return SparseMatrix(self.cols, self.rows, data, indices, indptr)
+
+    def solve(self, b) -> Matrix:
+        """
+        Solves linear system self * x = b by BiCGSTAB iterative method,
+        every column of b is solved separately
+
+        :param b: Matrix or SparseMatrix of Numbers with same number of rows as self
+        :return: x as Matrix of floats
+        """
+        if self.rows != self.cols:
+            raise MatrixIsNotSquare(self)
+        if not self.elements_are(Number):
+            raise MatrixIsNonInvertible(self)
+        if b.rows != self.rows:
+            raise WrongMatrixDimension(self, b)
+        values = [float(elem.val) for elem in self.data]
+
+        def matvec(x):
+            return [sum(values[k] * x[self.indices[k]] for k in range(self.indptr[i], self.indptr[i + 1]))
+                    for i in range(self.rows)]
+
+        b_rows = (b.to_dense() if isinstance(b, SparseMatrix) else b).matrix
+        solution = []
+        for col in range(b.cols):
+            x = _bicgstab(matvec, [float(row[col].val) for row in b_rows], 10 * self.rows + 100)
+            if x is None:
+                raise SolverDidNotConverge(self)
+            solution.append(x)
+        return Matrix(self.rows, b.cols, [[Number(x[i] + 0.0) for x in solution] for i in range(self.rows)])
+
+    def add_to_num(self, other):
+        return self.scalar_op(other, operator.add)
+
+    def multiply_by_num(self, other):
+        return self.scalar_op(other, operator.mul)
+
+    add_to_comp_num = add_to_num
+    multiply_by_comp_num = multiply_by_num
+
+    def add_to_matrix(self, other):
+        return elementwise(other, self, operator.add)
+
+    def subtract_from_matrix(self, other):
+        return elementwise(other, self, operator.sub)
+
+    def multiply_by_matrix(self, other):
+        return elementwise(other, self, operator.mul)
+
+    def divide_matrix(self, other):
+        return elementwise(other, self, operator.truediv)
+
+    def modulo_matrix(self, other):
+        return elementwise(other, self, operator.mod)
+
+    def matmul(self, other):
+        return matmul(other, self)
+
+    add_to_sparse = add_to_matrix
+    subtract_from_sparse = subtract_from_matrix
+    multiply_by_sparse = multiply_by_matrix
+    divide_sparse = divide_matrix
+    modulo_sparse = modulo_matrix
+    matmul_sparse = matmul
+
+
+def elementwise(left, right, op):
+    """
+    Element-wise operation where at least one operand is SparseMatrix.
+    Multiplication keeps only elements stored in sparse operands, addition
+    and subtraction of sparse matrices keep union of their elements,
+    other operations are computed by dense matrices
+
+    :param left: Matrix or SparseMatrix
+    :param right: Matrix or SparseMatrix
+    :param op: operator function
+    :return: SparseMatrix or Matrix
+    """
+    if left.rows != right.rows or left.cols != right.cols:
+        raise WrongMatrixDimension(left, right)
+    left_sparse, right_sparse = isinstance(left, SparseMatrix), isinstance(right, SparseMatrix)
+    if op is operator.mul:
+        if left_sparse and right_sparse:
+            rows = (_intersection(left.row(i), right.row(i), op) for i in range(left.rows))
+        elif left_sparse:
+            dense = right._read_rows()
+            rows = ([(col, op(elem, dense[i][col])) for col, elem in left.row(i)] for i in range(left.rows))
+        else:
+            dense = left._read_rows()
+            rows = ([(col, op(dense[i][col], elem)) for col, elem in right.row(i)] for i in range(left.rows))
+        return SparseMatrix.from_rows(left.rows, left.cols, rows)
+    if op in (operator.add, operator.sub) and left_sparse and right_sparse:
+        rows = (_union(left.row(i), right.row(i), op) for i in range(left.rows))
+        return SparseMatrix.from_rows(left.rows, left.cols, rows)
+    left = left.to_dense() if left_sparse else left
+    right = right.to_dense() if right_sparse else right
+    return op(left, right)
+
+
+def _intersection(left_row, right_row, op) -> List:
+    right_row = dict(right_row)
+    return [(col, op(elem, right_row[col])) for col, elem in left_row if col in right_row]
+
+
+def _union(left_row, right_row, op) -> List:
+    left_row, right_row = dict(left_row), dict(right_row)
+    merged: Dict[int, MathPrimitive] = {}
+    for col, elem in left_row.items():
+        merged[col] = op(elem, right_row[col]) if col in right_row else op(elem, ZERO)
+    for col, elem in right_row.items():
+        if col not in left_row:
+            merged[col] = op(ZERO, elem)
+    return sorted(merged.items())
+
+
+def matmul(left, right):
+    """
+    Matrix multiplication where at least one operand is SparseMatrix.
+    Product of sparse matrices is sparse, product with dense matrix is dense
+
+    :param left: Matrix or SparseMatrix
+    :param right: Matrix or SparseMatrix
+    :return: SparseMatrix or Matrix
+    """
+    if left.cols != right.rows:
+        raise WrongMatrixDimension(left, right)
+    if isinstance(left, SparseMatrix) and isinstance(right, SparseMatrix):
+        return SparseMatrix.from_rows(left.rows, right.cols,
+                                      (_accumulate(left.row(i), right) for i in range(left.rows)))
+    if isinstance(left, SparseMatrix):
+        dense = right._read_rows()
+        rows = []
+        for i in range(left.rows):
+            acc = None
+            for k, elem in left.row(i):
+                products = [elem * other for other in dense[k]]
+                acc = products if acc is None else list(map(operator.add, acc, products))
+            rows.append(acc if acc is not None else [ZERO] * right.cols)
+        return Matrix(left.rows, right.cols, rows)
+    rows = []
+    for row in left._read_rows():
+        acc = dict(_accumulate(enumerate(row), right))
+        rows.append([acc.get(col, ZERO) for col in range(right.cols)])
+    return Matrix(left.rows, right.cols, rows)
+
+
+def _accumulate(row, right: SparseMatrix) -> List:
+    """
+    :param row: iterable of (index, element) of left row
+    :return: sorted (column index, element) of product of row and right matrix
+    """
+    acc: Dict[int, MathPrimitive] = {}
+    for k, elem in row:
+        for col, other in right.row(k):
+            product = elem * other
+            acc[col] = acc[col] + product if col in acc else product
+    return sorted(acc.items())
+
+
+def auto_sparse(value):
+    """
+    :param value: result of evaluation
+    :return: SparseMatrix if value is big Matrix with few nonzero elements, otherwise value.
+        Diagonal matrices with known structure are kept, Matrix has fast paths for them
+    """
+    if type(value) is not Matrix or value.rows * value.cols < MIN_ELEMENTS:
+        return value
+    if value._structure is not None and DIAGONAL in value._structure:
+        return value
+    limit = DENSITY_THRESHOLD * value.rows * value.cols
+    stored = value.as_array()
+    if stored is not None:
+        array, kind = stored
+        if kind != array_storage.INT or array_storage.np.count_nonzero(array) > limit:
+            return value
+    elif sum(map(_is_stored, (elem for row in value._read_rows() for elem in row))) > limit:
+        return value
+    return SparseMatrix.from_dense(value)
+
+
+def _bicgstab(matvec, b: List[float], max_iterations: int) -> Optional[List[float]]:
+    """
+    Biconjugate gradient stabilized method
+
+    :param matvec: function which multiplies matrix by vector
+    :param b: right side
+    :return: solution or None if method didn't converge
+    """
+    def dot(u, v):
+        return math.fsum(map(operator.mul, u, v))
+
+    n = len(b)
+    x = [0.0] * n
+    tolerance = SOLVER_TOLERANCE * math.sqrt(dot(b, b))
+    if tolerance == 0:
+        return x
+    r = b[:]
+    r_hat = r[:]
+    rho = alpha = omega = 1.0
+    v = p = [0.0] * n
+    for _ in range(max_iterations):
+        rho_next = dot(r_hat, r)
+        if rho_next == 0 or omega == 0:
+            return None
+        beta = rho_next / rho * alpha / omega
+        rho = rho_next
+        p = [ri + beta * (pi - omega * vi) for ri, pi, vi in zip(r, p, v)]
+        v = matvec(p)
+        denominator = dot(r_hat, v)
+        if denominator == 0:
+            return None
+        alpha = rho / denominator
+        s = [ri - alpha * vi for ri, vi in zip(r, v)]
+        if math.sqrt(dot(s, s)) <= tolerance:
+            return [xi + alpha * pi for xi, pi in zip(x, p)]
+        t = matvec(s)
+        tt = dot(t, t)
+        if tt == 0:
+            return None
+        omega = dot(t, s) / tt
+        x = [xi + alpha * pi + omega * si for xi, pi, si in zip(x, p, s)]
+        r = [si - omega * ti for si, ti in zip(s, t)]
+        if math.sqrt(dot(r, r)) <= tolerance:
+            return x
+    return None
@@ -5,6 +5,8 @@ class Variable:
     """
     Variable class
     """
+    __slots__ = ("name", "val")
+
     def __init__(self, name: str, val=None):
         """
         :param name: name of variable(would be lowercased)
@@ -26,3 +28,34 @@ class Variable:
         return hash(self.name)
 
     __repr__ = __str__
+
+
+class ReactiveVariable(Variable):
+    """
+    Variable which keeps expression it was assigned to. When something expression
+    reads is changed, variable is marked dirty and value is recomputed on next access
+    """
+    __slots__ = ("expression", "_evaluate", "dirty", "_val")
+
+    def __init__(self, name: str, expression, evaluate):
+        """
+        :param name: name of variable
+        :param expression: assigned expression (Expression)
+        :param evaluate: callable which evaluates expression in current environment
+        """
+        self.expression = expression
+        self._evaluate = evaluate
+        self.dirty = True
+        super().__init__(name)
+
+    @property
+    def val(self):
+        if self.dirty:
+            self._val = self._evaluate(self.expression)
+            self.dirty = False
+        return self._val
+
+    @val.setter
+    def val(self, item):
+        self._val = item
+        self.dirty = item is None
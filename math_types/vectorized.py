@@ -0,0 +1,150 @@
+"""
+Vectorized evaluation of functions over NumPy arrays.
+Function body is lowered to code over whole arrays: arithmetic operators map to
+NumPy operators and predefined math functions to ufuncs. Anything which couldn't
+be vectorized with same result as Number arithmetic (matrices, matrix multiplication,
+complex powers, domain errors, division by zero...) is evaluated element by element.
+"""
+
+from typing import Callable, Dict, Optional
+from consts import OPERATOR_MAP
+from exceptions.evaluation_exceptions import NonNumericResult
+from math_types import Number, ComplexNumber, AFunction, UserDefinedFunction, SpecialNumericFunction
+from math_types.function_compiler import CodeGenerator
+from math_types.lazy_import import lazy_import
+
+np = lazy_import("numpy")  # None if NumPy isn't installed
+
+PRECISION = 3  # predefined functions round results
+
+
+class NotVectorizable(Exception):
+    """Raised by vectorized code when arrays have values which should be evaluated one by one"""
+
+
+def _real_ufunc(name: str) -> Callable:
+    """
+    Predefined functions take only real numbers and round result
+
+    :param name: name of NumPy ufunc, it's looked up on call, so NumPy isn't loaded at import
+    """
+    def apply(x):
+        if np.iscomplexobj(x):
+            raise NotVectorizable()
+        return np.round(getattr(np, name)(x), PRECISION)
+    return apply
+
+
+def _power(base, exponent):
+    """
+    Complex powers are evaluated by ComplexNumber, powers of reals are evaluated
+    in float, so any power which should be complex raises FloatingPointError
+    """
+    if np.iscomplexobj(base) or np.iscomplexobj(exponent):
+        raise NotVectorizable()
+    return np.power(np.asarray(base, dtype=float), exponent)
+
+
+def _modulo(left, right):
+    if np.iscomplexobj(left) or np.iscomplexobj(right):
+        raise NotVectorizable()
+    return np.mod(left, right)
+
+
+if np is not None:
+    VECTORIZED_FUNCS = {
+        "sin": _real_ufunc("sin"),
+        "cos": _real_ufunc("cos"),
+        "tan": _real_ufunc("tan"),
+        "exp": _real_ufunc("exp"),
+        "abs": _real_ufunc("abs"),
+        "sqrt": _real_ufunc("sqrt"),
+        "log": _real_ufunc("log")
+    }
+else:
+    VECTORIZED_FUNCS = {}
+
+VECTORIZED_OPERATORS = {OPERATOR_MAP["^"]: "_power", OPERATOR_MAP["%"]: "_modulo"}
+
+
+class VectorCodeGenerator(CodeGenerator):
+    """Generates code of function body over NumPy arrays"""
+    def __init__(self, input_name: str, functions: Dict[str, AFunction]):
+        super().__init__(input_name, functions)
+        self.namespace.update({"_power": _power, "_modulo": _modulo})
+
+    def generate_operator(self, func: Callable, left: str, right: str) -> Optional[str]:
+        if func is OPERATOR_MAP["**"]:
+            return None
+        if func in VECTORIZED_OPERATORS:
+            return "{}({}, {})".format(VECTORIZED_OPERATORS[func], left, right)
+        return super().generate_operator(func, left, right)
+
+    def generate_constant(self, obj) -> Optional[str]:
+        if isinstance(obj, Number):
+            return self.bind(obj.val)
+        if isinstance(obj, ComplexNumber):
+            return self.bind(complex(obj.real, obj.imag))
+        return None
+
+    def generate_call(self, func: AFunction, arg: str) -> Optional[str]:
+        if isinstance(func, SpecialNumericFunction) and func.name in VECTORIZED_FUNCS:
+            return "{}({})".format(self.bind(VECTORIZED_FUNCS[func.name]), arg)
+        if isinstance(func, UserDefinedFunction) and func.vectorized is not None:
+            return "{}.vectorized({})".format(self.bind(func), arg)
+        return None
+
+
+def vectorize_function(func: UserDefinedFunction, functions: Dict[str, AFunction]) -> Optional[Callable]:
+    """
+    :param func: UserDefinedFunction with defined body
+    :param functions: dict of defined functions
+    :return: python function which takes ndarray and returns ndarray,
+             or None if NumPy isn't available or body can't be vectorized
+    """
+    if np is None:
+        return None
+    generator = VectorCodeGenerator(func.input.name, functions)
+    code = generator.generate(func.body)
+    if code is None:
+        return None
+    return generator.build("vectorized_" + func.name, code)
+
+
+def evaluate_many(func: AFunction, xs, functions: Dict[str, AFunction]):
+    """
+    Evaluates function at every value of array
+
+    :param func: UserDefinedFunction or SpecialNumericFunction
+    :param xs: array of real or complex values
+    :param functions: dict of defined functions
+    :return: ndarray of results
+    """
+    xs = np.asarray(xs)
+    if np.iscomplexobj(xs):
+        xs = xs.astype(complex)
+    else:
+        xs = xs.astype(float)
+
+    if isinstance(func, SpecialNumericFunction) and func.name in VECTORIZED_FUNCS:
+        vectorized = VECTORIZED_FUNCS[func.name]
+    else:
+        vectorized = getattr(func, "vectorized", None)
+    if vectorized is not None:
+        try:
+            with np.errstate(all="raise"):
+                return np.broadcast_to(vectorized(xs), xs.shape).copy()
+        except (NotVectorizable, FloatingPointError):
+            pass
+
+    results = []
+    for x in xs.flat:
+        value = ComplexNumber(x.real, x.imag) if isinstance(x, complex) else Number(float(x))
+        res = func.evaluate_value(value, functions)
+        if isinstance(res, Number):
+            results.append(res.val)
+        elif isinstance(res, ComplexNumber):
+            results.append(complex(res.real, res.imag))
+        else:
+            raise NonNumericResult(func.name, res)
+    return np.array(results).reshape(xs.shape)
@@ -0,0 +1,97 @@
+"""
+Adapter between AST built by PrattParser and flat lists of math objects used by Expression.
+AST is lowered to explicit form: hidden multiplications become "*" operators,
+brackets are placed only where precedence requires them, and unary minus
+is folded into constants or kept as "-" operator in place of operand.
+"""
+
+from typing import List
+from consts import OPERATOR_PRECEDENCE
+from math_types import Operator, Number, Variable, Matrix, UserDefinedFunction, Expression
+from parsing.ast_nodes import Const, Var, Neg, BinOp, ImplicitMul, Call, MatrixLiteral, Statement
+
+ATOM_PRECEDENCE = float("inf")
+
+
+def to_expression(node) -> Expression:
+    """
+    :param node: root of AST
+    :return: Expression which doesn't need preprocessing
+    """
+    return Expression(lower(node), preprocess=False)
+
+
+def lower_statement(statement: Statement) -> List:
+    """
+    :param statement: line parsed by PrattParser
+    :return: flat list of math objects, where parts are separated by "=" operators
+    """
+    objs = []
+    for i, node in enumerate(statement.parts):
+        if i:
+            objs.append(Operator("="))
+        if node is not None:
+            _lower(node, objs)
+    if statement.question_mark:
+        objs.append(Operator("?"))
+    return objs
+
+
+def lower(node) -> List:
+    """
+    :param node: root of AST
+    :return: flat list of math objects
+    """
+    objs = []
+    _lower(node, objs)
+    return objs
+
+
+def _precedence(node) -> float:
+    # Neg binds to single operand, like atom
+    if isinstance(node, BinOp):
+        return OPERATOR_PRECEDENCE[node.op]
+    if isinstance(node, ImplicitMul):
+        return OPERATOR_PRECEDENCE["*"]
+    return ATOM_PRECEDENCE
+
+
+def _lower_operand(node, objs: List, bracketed: bool) -> None:
+    if bracketed:
+        objs.append(Operator("("))
+        _lower(node, objs)
+        objs.append(Operator(")"))
+    else:
+        _lower(node, objs)
+
+
+def _lower(node, objs: List) -> None:
+    if isinstance(node, Const):
+        objs.append(node.value)
+    elif isinstance(node, Var):
+        objs.append(Variable(node.name))
+    elif isinstance(node, (BinOp, ImplicitMul)):
+        op = node.op if isinstance(node, BinOp) else "*"
+        prec = OPERATOR_PRECEDENCE[op]
+        # every operator is left associative
+        _lower_operand(node.left, objs, _precedence(node.left) < prec)
+        objs.append(Operator(op))
+        _lower_operand(node.right, objs, _precedence(node.right) <= prec)
+    elif isinstance(node, Neg):
+        if isinstance(node.operand, Const):
+            objs.append(Number(-1) * node.operand.value)
+        else:
+            objs.append(Operator("-"))
+            _lower_operand(node.operand, objs, _precedence(node.operand) != ATOM_PRECEDENCE)
+    elif isinstance(node, Call):
+        args = []
+        for arg in node.args:
+            if args:
+                args.append(Operator(","))
+            _lower(arg, args)
+        objs.append(UserDefinedFunction(node.name, Expression(args, preprocess=False)))
+    elif isinstance(node, MatrixLiteral):
+        rows = [[to_expression(elem) for elem in row] for row in node.rows]
+        objs.append(Matrix(len(rows), len(rows[0]), rows))
+    else:
+        raise TypeError("Unknown AST node {}".format(type(node).__name__))
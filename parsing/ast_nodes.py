@@ -0,0 +1,52 @@
+"""
+Immutable AST nodes built by PrattParser
+
+Leaves hold already constructed math objects (Const) or names (Var),
+inner nodes hold other nodes. Nodes are tuples, so whole tree could be
+shared between evaluations without copying.
+"""
+
+from typing import NamedTuple, Tuple, Any
+
+
+class Const(NamedTuple):
+    """Number or ComplexNumber literal"""
+    value: Any
+
+
+class Var(NamedTuple):
+    name: str
+
+
+class Neg(NamedTuple):
+    """Unary minus applied to single operand"""
+    operand: Any
+
+
+class BinOp(NamedTuple):
+    op: str
+    left: Any
+    right: Any
+
+
+class ImplicitMul(NamedTuple):
+    """Hidden multiplication such as 2x or 4i"""
+    left: Any
+    right: Any
+
+
+class Call(NamedTuple):
+    """Function call, args are comma separated nodes"""
+    name: str
+    args: Tuple
+
+
+class MatrixLiteral(NamedTuple):
+    """Matrix as tuple of rows, each row is tuple of nodes"""
+    rows: Tuple
+
+
+class Statement(NamedTuple):
+    """Whole line: expressions separated by "=", None for empty one"""
+    parts: Tuple
+    question_mark: bool
@@ -0,0 +1,81 @@
+"""ParseCache class implementation"""
+
+import re
+from collections import OrderedDict
+from typing import Any, Optional
+
+_WHITESPACE = re.compile(r"[ \t\n\r\x0b\x0c]+")
+
+
+class ParseCache:
+    """
+    Bounded LRU cache from normalized input line to its parsed form.
+    Cache is size-aware: every entry has a size (number of tokens in line),
+    and total size of all entries never exceeds capacity. Least recently used
+    entries are evicted first. Entries are stored as is, so caller is responsible
+    for storing only immutable values or copying them.
+    """
+    def __init__(self, capacity: int = 100000):
+        """
+        :param capacity: maximum total size of cached entries, 0 disables cache
+        """
+        self.capacity = capacity
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return "parse cache: {} entries, size {}/{}, {} hits, {} misses, {} evictions".format(
+            len(self), self.size, self.capacity, self.hits, self.misses, self.evictions)
+
+    @staticmethod
+    def normalize(string: str) -> str:
+        """
+        Lines which differ only in whitespace or letter case produce same tokens
+
+        :param string: input line
+        :return: cache key
+        """
+        return _WHITESPACE.sub(" ", string).strip().lower()
+
+    def get(self, key: str) -> Optional[Any]:
+        """
+        :param key: normalized line
+        :return: cached value or None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def put(self, key: str, value: Any, size: int) -> None:
+        """
+        Stores value, evicting least recently used entries if needed.
+        Values bigger than whole capacity are not stored.
+
+        :param key: normalized line
+        :param value: parsed form of line
+        :param size: size of value
+        """
+        if size > self.capacity:
+            return
+        if key in self._entries:
+            self.size -= self._entries.pop(key)[1]
+        while self.size + size > self.capacity:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.size -= evicted_size
+            self.evictions += 1
+        self._entries[key] = (value, size)
+        self.size += size
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.size = 0
@@ -0,0 +1,176 @@
+"""PrattParser class implementation"""
+
+from typing import List, Optional
+from consts import OPERATOR_PRECEDENCE
+from parsing.parser import Parser
+from parsing.ast_nodes import Const, Var, Neg, BinOp, ImplicitMul, Call, MatrixLiteral, Statement
+from exceptions.parsing_exceptions import (UnexpectedToken, UnexpectedEndOfInput, NoClosingBracket,
+                                           EmptyMatrix, MatrixDiffElems)
+
+IMPLICIT_MUL_PRECEDENCE = OPERATOR_PRECEDENCE["*"]
+
+
+class PrattParser:
+    """
+    One-pass precedence climbing parser which builds AST of single expression from tokens.
+    Follows evaluation rules of Expression:
+        all binary operators are left associative and use OPERATOR_PRECEDENCE;
+        hidden multiplication is number literal followed by name (2x, 4i);
+        unary minus binds to the single operand or bracketed expression right after it,
+        so -2^2 is (-2)^2.
+    Anything Expression couldn't evaluate either is rejected with ParsingError.
+    """
+    def parse_statement(self, tokens: List[str]) -> Statement:
+        """
+        Parses line of any kind: expressions separated by assignment operators, with
+        optional question mark at the end. Kind of statement is recognized by Interpreter.
+
+        :param tokens: list of tokens as strings
+        :return: Statement
+        """
+        Parser._check_brackets(tokens)
+        question_mark = len(tokens) > 0 and tokens[-1] == "?"
+        if question_mark:
+            tokens = tokens[:-1]
+        parts = []
+        start = 0
+        for i, token in enumerate(list(tokens) + ["="]):
+            if token == "=":
+                parts.append(self.parse(tokens[start:i]) if i > start else None)
+                start = i + 1
+        return Statement(tuple(parts), question_mark)
+
+    def parse(self, tokens: List[str]):
+        """
+        :param tokens: list of tokens as strings
+        :return: root node of AST
+        """
+        self._tokens = tokens
+        self._pos = 0
+        self._in_matrix = False
+        node = self._parse_expression(0)
+        if self._pos != len(tokens):
+            raise UnexpectedToken(tokens[self._pos])
+        return node
+
+    def _peek(self, offset: int = 0) -> Optional[str]:
+        idx = self._pos + offset
+        return self._tokens[idx] if idx < len(self._tokens) else None
+
+    def _next(self) -> str:
+        token = self._peek()
+        if token is None:
+            raise UnexpectedEndOfInput()
+        self._pos += 1
+        return token
+
+    def _expect(self, expected: str) -> None:
+        token = self._next()
+        if token != expected:
+            raise UnexpectedToken(token)
+
+    def _parse_expression(self, min_prec: int):
+        """
+        Parses operators with precedence not lower than min_prec
+
+        :param min_prec: minimal precedence of operator which could be consumed
+        :return: node
+        """
+        left = self._parse_prefix()
+        while True:
+            token = self._peek()
+            if token in OPERATOR_PRECEDENCE:
+                prec = OPERATOR_PRECEDENCE[token]
+                if prec < min_prec:
+                    break
+                self._pos += 1
+                left = BinOp(token, left, self._parse_expression(prec + 1))
+            elif self._is_hidden_multiplication():
+                if IMPLICIT_MUL_PRECEDENCE < min_prec:
+                    break
+                left = ImplicitMul(left, self._parse_expression(IMPLICIT_MUL_PRECEDENCE + 1))
+            else:
+                break
+        return left
+
+    def _is_hidden_multiplication(self) -> bool:
+        """
+        Hidden multiplication is number literal followed by variable or imaginary unit
+        """
+        token = self._peek()
+        return (token is not None and token[0].isalpha() and self._peek(1) != "(" and
+                self._tokens[self._pos - 1][0].isdigit())
+
+    def _parse_prefix(self):
+        token = self._next()
+        if token == "-":
+            if self._peek() != "(" and not self._starts_operand(self._peek()):
+                raise UnexpectedToken(token)
+            return Neg(self._parse_prefix())
+        if token == "(":
+            node = self._parse_expression(0)
+            if self._peek() is None:
+                raise NoClosingBracket(token)
+            self._expect(")")
+            return node
+        return self._parse_operand(token)
+
+    @staticmethod
+    def _starts_operand(token: Optional[str]) -> bool:
+        return token is not None and (token == "[" or token[0].isalnum())
+
+    def _parse_operand(self, token: str):
+        """
+        Parses number, variable, function call or matrix which starts with token
+        """
+        if token == "[":
+            return self._parse_matrix()
+        if not token[0].isalnum():
+            raise UnexpectedToken(token)
+        if token[0].isalpha() and token != "i" and self._peek() == "(":
+            return self._parse_call(token)
+        obj = Parser._parse_token(token)
+        if token[0].isalpha() and token != "i":
+            return Var(obj.name)
+        return Const(obj)
+
+    def _parse_call(self, name: str) -> Call:
+        self._expect("(")
+        if self._peek() == ")":
+            self._pos += 1
+            return Call(name, ())  # like 'vars()'
+        args = [self._parse_expression(0)]
+        while self._peek() == ",":
+            self._pos += 1
+            args.append(self._parse_expression(0))
+        if self._peek() is None:
+            raise NoClosingBracket("(")
+        self._expect(")")
+        return Call(name, tuple(args))
+
+    def _parse_matrix(self) -> MatrixLiteral:
+        """
+        Parses matrix in form [[a, b]; [c, d]], opening bracket is already consumed
+        """
+        if self._in_matrix:
+            raise UnexpectedToken("[")
+        self._in_matrix = True
+        rows = []
+        while True:
+            if self._peek() == "]" and not rows:
+                raise EmptyMatrix()
+            self._expect("[")
+            row = [self._parse_expression(0)]
+            while self._peek() == ",":
+                self._pos += 1
+                row.append(self._parse_expression(0))
+            self._expect("]")
+            if rows and len(row) != len(rows[0]):
+                raise MatrixDiffElems()
+            rows.append(tuple(row))
+            if self._peek() != ";":
+                break
+            self._pos += 1
+        self._expect("]")
+        self._in_matrix = False
+        return MatrixLiteral(tuple(rows))
@@ -1,13 +1,42 @@
 """
-Contains Tokenizer class, which has only tokenize method
+Contains Tokenizer class, which transforms input string to tokens
 """
 
-from string import whitespace
+import re
 from exceptions.parsing_exceptions import UnknownToken
-from typing import List, Tuple
+from typing import List, Iterator, NamedTuple
 from consts import ONE_CHAR_TOKENS
 
 
+class Token(NamedTuple):
+    """
+    Typed token produced by scanner
+
+    kind: one of "number", "name" or "operator"
+    text: token as string (names are lowercased)
+    start, end: offsets of token in scanned string
+    """
+    kind: str
+    text: str
+    start: int
+    end: int
+
+
+_WHITESPACE = " \t\n\r\x0b\x0c"
+_NUMBER = r"\d[\d.]*"
+_NAME = r"[^\W\d_]+"
+_OPERATOR = r"\*\*|[" + re.escape("".join(ONE_CHAR_TOKENS)) + r"]"
+
+# master pattern with one named group per token kind
+_TOKEN_PATTERN = re.compile(
+    r"(?P<skip>[{}]+)|(?P<number>{})|(?P<name>{})|(?P<operator>{})|(?P<unknown>.)".format(
+        _WHITESPACE, _NUMBER, _NAME, _OPERATOR),
+    re.DOTALL)
+# same alternatives without groups, so findall returns plain strings
+_TEXT_PATTERN = re.compile("|".join((_NUMBER, _NAME, _OPERATOR)))
+_DELETE_WHITESPACE = str.maketrans("", "", _WHITESPACE)
+
+
 class Tokenizer:
     """
     Class which transforms interpreter input string to list of tokens (as strings)
@@ -19,56 +48,29 @@ class Tokenizer:
 
         Returns: list of tokens as strings
         """
-        tokens = []
-
-        char_idx = 0
-        while char_idx < len(string):
-            char = string[char_idx]
-
-            if char in whitespace:
-                char_idx += 1
-                continue
-            elif char.isdigit():
-                char_idx, token = self._tokenize_number(string, char_idx)
-            elif char.isalpha():
-                char_idx, token = self._tokenize_name(string, char_idx)
-            elif string[char_idx:char_idx + 2] == "**":
-                char_idx += 2
-                token = "**"
-            elif char in ONE_CHAR_TOKENS:
-                char_idx += 1
-                token = char
-            else:
-                raise UnknownToken(char)
-            tokens.append(token)
-
+        string = string.lower()
+        tokens = _TEXT_PATTERN.findall(string)
+        # findall silently skips unknown characters, so if tokens don't cover
+        # whole non-whitespace input, rescan to report the bad character
+        if sum(map(len, tokens)) != len(string.translate(_DELETE_WHITESPACE)):
+            tokens = [token.text for token in self.scan(string)]
         return tokens
 
     @staticmethod
-    def _tokenize_number(string: str, char_idx: int) -> Tuple[int, str]:
+    def scan(string: str) -> Iterator[Token]:
         """
-        Tokenizes number that starts at char_idx in string
+        Scans string in a single pass using one precompiled pattern
 
-        :param string: input string
-        :param char_idx: index from where to start
-        :return: index where number ends and string with number
+        :param string: string to be scanned
+        :return: iterator over typed tokens
         """
-        start_idx = char_idx
-        while char_idx < len(string) and (string[char_idx].isdigit() or string[char_idx] == '.'):
-            char_idx += 1
-
-        return char_idx, string[start_idx:char_idx]
-
-    @staticmethod
-    def _tokenize_name(string: str, char_idx: int) -> Tuple[int, str]:
-        """
-        Tokenizes name(which is sequence of letters) in string, starting from char_idx
-
-        :param string: string for tokenizing
-        :param char_idx: index from where to start
-        :return: index where end of the found token, token
-        """
-        start_idx = char_idx
-        while char_idx < len(string) and string[char_idx].isalpha():
-            char_idx += 1
-        return char_idx, string[start_idx:char_idx].lower()
+        for match in _TOKEN_PATTERN.finditer(string):
+            kind = match.lastgroup
+            if kind == "skip":
+                continue
+            text = match.group()
+            if kind == "unknown":
+                raise UnknownToken(text)
+            if kind == "name":
+                text = text.lower()
+            yield Token(kind, text, match.start(), match.end())
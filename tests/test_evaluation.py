@@ -3,8 +3,10 @@ from math_types import *
 import pytest
 from exceptions.evaluation_exceptions import *
 from exceptions.parsing_exceptions import UnexpectedToken
-from exceptions.math_exceptions import OperationIsNotSupported
+from exceptions.math_exceptions import OperationIsNotSupported, ZeroDivisionError as MathZeroDivisionError
 from math import isclose
+from math_types.memo_cache import MemoCache, memo_key
+from dependency_graph import DependencyGraph
 
 # basic print tests
 def test1():
@@ -248,7 +250,7 @@ def test24():
     out_str = i.eval_string("varA = 2 + 4 *2 - 5 %4 + 2 * (4 + 5)")
     out_str = i.eval_string(" varB = 2 * varA - 5 %4")
     out_str = i.eval_string("funA(x) = varA + varB * 4 - 1 / 2 + x")
-    assert out_str == "funa(x) = 27 + 53 * 4 - 1 / 2 + x"
+    assert out_str == "funa(x) = 238.5 + x"
     i.eval_string("varC = 2 * varA - varB")
     out_str = i.eval_string("varD = funA(varC)")
     assert out_str == "239.5"
@@ -702,3 +704,597 @@ def test__2():
     i.eval_string("g(z) = z * [[8, 4]]")
 
     assert i.eval_string("f(2)") == "[ 16, 8 ]"
+
+
+def test_unary_minus_function():
+    i = Interpreter()
+    i.eval_string("f(x) = x * 2")
+    assert i.eval_string("1 + -f(3)") == "-5"
+    assert i.eval_string("y = -f(2) ^ 2") == "16"
+
+
+def test_parse_cache_hits():
+    i = Interpreter()
+    i.eval_string("a = 2")
+    assert i.eval_string("[[a, a + 1]] * a") == "[ 4, 6 ]"
+    i.eval_string("a = 3")
+    assert i.eval_string("[[A,  a + 1]] * a") == "[ 9, 12 ]"
+    i.eval_string("f(x) = x + a")
+    i.eval_string("a = 4")
+    i.eval_string("f(x) = x + a")
+    assert i.eval_string("f(1)") == "5"
+    assert i.parse_cache.hits == 2
+    assert i.parse_cache.misses == 6
+
+
+def test_parse_cache_copies_uncompiled_expression():
+    i = Interpreter()
+    i.eval_string("a = [[1, 2]; [3, 4]]")
+    assert i.eval_string("transp(a)") == i.eval_string("transp(a)") == "[ 1, 3 ]\n[ 2, 4 ]"
+
+
+def test_statements_parsed_to_ast():
+    i = Interpreter()
+    assert i.eval_string("f(x) = -x + 5") == "f(x) = -x + 5"
+    assert i.eval_string("f(x) = ?") == "-x + 5"
+    assert i.eval_string("-x + 5 = 3 ?") == "Reduced equation: -x + 2 = 0\nSolution: x = 2.0"
+    assert i.eval_string("a = -(2 + 3)") == "-5"
+    assert i.parse_cache.misses == len(i.parse_cache) == 4
+
+
+def test_parse_cache_eviction():
+    i = Interpreter(parse_cache_capacity=5)
+    i.eval_string("2 + 3")
+    i.eval_string("3 + 4")
+    i.eval_string("2 + 3")
+    i.eval_string("[[1, 2]]")
+    assert i.parse_cache.evictions == 2
+    assert i.parse_cache.hits == 0
+    assert len(i.parse_cache) == 1
+
+
+def test_compile_postfix():
+    expr = Expression([Number(1), Operator("+"), Number(2), Operator("*"), Operator("("), Number(3),
+                       Operator("-"), Number(4), Operator(")")])
+    program = expr.compile()
+    assert [instr for instr in program if type(instr) is int] == [0, 2, 5, 7]
+    assert len(program) == 7
+    assert expr.evaluate({}, {}) == Number(-1)
+
+
+def test_compile_malformed():
+    for body in ([Number(1), Operator("+")], [Operator("("), Operator(")")], [Number(1), Number(2)],
+                 [Number(1), Operator("="), Number(2)], [Operator("("), Number(1)]):
+        assert Expression(body, preprocess=False).compile() is None
+
+
+def test_bracket_reduction_unary_minus():
+    i = Interpreter()
+    i.eval_string("a = 3")
+    body = [Operator("-"), Number(2), Operator("*"), Operator("("), Operator("-"), Variable("a"), Operator("+"),
+            Number(1), Operator(")"), Operator("-"), Operator("-"), Number(4)]
+    expr = Expression(body, preprocess=False)
+    values = expr._evaluate_operands(i._variables, i._functions)
+    assert expr._reduce_brackets(values) == expr.evaluate(i._variables, i._functions) == Number(8)
+    with pytest.raises(ExpressionIsNotValid):
+        i.eval_string("-2 3")
+
+
+def test_function_matrix_body_not_mutated():
+    i = Interpreter()
+    i.eval_string("f(x) = [[x, 1]] * 2")
+    assert i.eval_string("f(2)") == "[ 4, 2 ]"
+    assert i.eval_string("f(3)") == "[ 6, 2 ]"
+
+
+def test_compiled_function():
+    i = Interpreter()
+    i.eval_string("a = 3")
+    i.eval_string("f(x) = 2 * x ^ 2 - a * x + abs(2) / 4")
+    f = i._functions["f"]
+    assert f.compiled is not None
+    assert f.compiled(Number(2)) == f.body.evaluate({"x": Variable("x", Number(2))}, i._functions)
+    assert i.eval_string("f(2)") == "2.5"
+    assert i.eval_string("f(i)") == "-1.5 - 3i"
+    assert i.eval_string("f([[2]])") == "[ 2.5 ]"
+
+
+def test_compiled_function_redefinition():
+    i = Interpreter()
+    i.eval_string("f(x) = g(x) + 1")
+    assert i._functions["f"].compiled is None
+    i.eval_string("g(x) = x * 2")
+    assert i._functions["f"].compiled is not None
+    assert i.eval_string("f(3)") == "7"
+    i.eval_string("g(x) = x * 3")
+    assert i.eval_string("f(3)") == "10"
+
+
+def test_simplified_function_body():
+    i = Interpreter()
+    assert i.eval_string("f(x) = 2 * 3 * x + 4 - 1") == "f(x) = 6 * x + 4 - 1"
+    assert i.eval_string("g(x) = x ^ 1 * 1 + 0 - (-1) * x") == "g(x) = x + x"
+    assert i.eval_string("h(x) = -x + 3 - -2") == "h(x) = -x + 3 + 2"
+    assert i.eval_string("k(x) = [[x * 1, 2 + 3]]") == "k(x) = [ x, 5 ]"
+    assert i.eval_string("m(x) = f(x + 0) / 2 ^ 2") == "m(x) = f(x) / 4"
+    assert i.eval_string("h(1)") == "4"
+    assert i.eval_string("m(1)") == "2.25"
+    assert i.eval_string("n(x) = x + 0.1 + 0.2 + -1 * (x * 3)") == "n(x) = x + 0.1 + 0.2 - x * 3"
+    assert i.eval_string("n(1)") == i.eval_string("1 + 0.1 + 0.2 - 1 * 3")
+
+
+def test_simplified_function_keeps_errors():
+    i = Interpreter()
+    assert i.eval_string("f(x) = x + 1 / 0") == "f(x) = x + 1 / 0"
+    with pytest.raises(MathZeroDivisionError):
+        i.eval_string("f(1)")
+
+
+def test_memoized_function():
+    i = Interpreter()
+    i.eval_string("f(x) = x ^ 2 + 1")
+    i.eval_string("g(x) = f(x) * 2")
+    assert i.eval_string("cache()") == "No memoized functions"
+    i.eval_string("cache(f)")
+    assert i.eval_string("f(2)") == "5"
+    assert i.eval_string("g(2)") == "10"
+    assert i.eval_string("f(2.0)") == "5.0"
+    memo = i._functions["f"].memo
+    assert (len(memo), memo.hits, memo.misses) == (2, 1, 2)
+    assert i.eval_string("cache()").startswith("f: 2 entries")
+    i.eval_string("f(x) = x + 1")
+    assert i._functions["f"].memo is memo and len(memo) == 0
+    assert i.eval_string("g(2)") == "6"
+    i.eval_string("cache(clear)")
+    assert len(memo) == 0
+    i.eval_string("cache(f, 0)")
+    assert i._functions["f"].memo is None
+    with pytest.raises(WrongSpecialCommandUse):
+        i.eval_string("cache(sin)")
+
+
+def test_memo_cache_budget():
+    cache = MemoCache(1000)
+    for val in range(100):
+        cache.put(memo_key(Number(val)), Number(val * 2))
+    assert 0 < cache.size <= 1000
+    assert cache.evictions == 100 - len(cache)
+    assert cache.get(memo_key(Number(99))) == Number(198)
+    assert cache.get(memo_key(Number(0))) is None
+    assert memo_key(Matrix(1, 2, [[Number(1), Number(2)]])) != memo_key(Matrix(2, 1, [[Number(1)], [Number(2)]]))
+    assert memo_key(Number(2)) != memo_key(Number(2.0))
+
+
+def test_memo_cache_array_matrix():
+    i = Interpreter()
+    i.eval_string("A = [{}]".format("; ".join("[{}]".format(", ".join(str(r * 12 + c if r != c else 500) for c in range(12)))
+                                              for r in range(12))))
+    i.eval_string("f(x) = x * 2")
+    i.eval_string("cache(f)")
+    i.eval_string("inv(A)")
+    a = i._variables["a"].val
+    lu = a._lu
+    assert lu is not None and a.as_array() is not None
+    first = i.eval_string("f(A)")
+    assert i.eval_string("f(A)") == first
+    # fingerprint and size are taken from array, matrix isn't boxed and keeps its LU decomposition
+    assert a._lu is lu and a._matrix is None
+    memo = i._functions["f"].memo
+    assert (len(memo), memo.hits) == (1, 1) and memo.size < 2 * 144 * 8 + 1000
+    assert memo_key(a) != memo_key(Matrix(12, 12, [[Number(float(elem.val)) for elem in row] for row in a._read_rows()]))
+
+
+def test_reactive_variables():
+    i = Interpreter(reactive=True)
+    i.eval_string("a = 2")
+    i.eval_string("b = a * 2")
+    i.eval_string("c = [[a, b]]")
+    i.eval_string("f(x) = x * a")
+    i.eval_string("d = f(3)")
+    i.eval_string("unrelated = 7")
+    i.eval_string("a = 5")
+    assert i._variables["b"].dirty and i._variables["c"].dirty and i._variables["d"].dirty
+    assert not i._variables["unrelated"].dirty
+    assert i.eval_string("c") == "[ 5, 10 ]"
+    assert not i._variables["b"].dirty
+    assert i.eval_string("f(1)") == "5"
+    assert i.eval_string("d") == "15"
+    assert i.eval_string("a = a + 1") == "6"
+    assert i.eval_string("b") == "12"
+
+
+def test_reactive_variables_cycle():
+    i = Interpreter(reactive=True)
+    i.eval_string("a = 1")
+    i.eval_string("b = a + 1")
+    assert i.eval_string("a = b * 10") == "20"
+    assert i.eval_string("b") == "21"
+    assert i.dependencies.dependencies(("variable", "a")) == frozenset()
+
+
+def test_not_reactive_variables():
+    i = Interpreter()
+    i.eval_string("a = 2")
+    i.eval_string("b = a * 2")
+    i.eval_string("a = 5")
+    assert i.eval_string("b") == "4"
+    assert i.dependencies.dependencies(("variable", "b")) == {("variable", "a")}
+
+
+def test_dependency_graph_order():
+    graph = DependencyGraph()
+    graph.set_dependencies("b", ["a"])
+    graph.set_dependencies("c", ["a", "b"])
+    graph.set_dependencies("d", ["c"])
+    graph.set_dependencies("e", ["x"])
+    assert graph.dependents("a") == ["b", "c", "d"]
+    assert graph.depends_on("d", "a") and not graph.depends_on("a", "d")
+    graph.set_dependencies("c", ["x"])
+    assert graph.dependents("a") == ["b"]
+
+
+def test_matrix_lu_builtins():
+    i = Interpreter()
+    i.eval_string("A = [[2, 1, 1]; [4, -6, 0]; [-2, 7, 2]]")
+    assert i.eval_string("det(A)") == "-16.0"
+    assert i.eval_string("solve(A, [[5]; [-2]; [9]])") == "[ 1.0 ]\n[ 1.0 ]\n[ 2.0 ]"
+    assert i.eval_string("A ** inv(A)") == "[ 1.0, 0.0, 0.0 ]\n[ 0.0, 1.0, 0.0 ]\n[ 0.0, 0.0, 1.0 ]"
+    assert i.eval_string("det([[1, 2]; [2, 4]])") == "0.0"
+    assert i.eval_string("inv([[1, 2]; [3, 4]])") == "[ -2.0, 1.0 ]\n[ 1.5, -0.5 ]"
+    assert i.eval_string("inv([[2, 1, 1]; [4, -6, 0]; [-2, 7, 2]])") == \
+        "[ 0.75, -0.3125, -0.375 ]\n[ 0.5, -0.375, -0.25 ]\n[ -1.0, 1.0, 1.0 ]"
+    with pytest.raises(MatrixIsNonInvertible):
+        i.eval_string("solve([[1, 2]; [2, 4]], [[1]; [1]])")
+    with pytest.raises(BadFunctionInput):
+        i.eval_string("solve(A)")
+    for line in ("det([[1, 2]])", "inv([[1, 2, 3]; [4, 5, 6]])", "det([[1, 2, 3]; [4, 5, 6]])",
+                 "solve(sparse([[1, 2]]), [[1]])"):
+        with pytest.raises(MatrixIsNotSquare):
+            i.eval_string(line)
+
+
+def test_matrix_lu_cached():
+    i = Interpreter()
+    i.eval_string("A = [[1, 2]; [3, 4]]")
+    i.eval_string("det(A)")
+    lu = i._variables["a"].val._lu
+    assert lu is not None
+    i.eval_string("solve(A, [[1]; [1]])")
+    i.eval_string("det(A)")
+    assert i._variables["a"].val._lu is lu
+    i.eval_string("A = [[2, 1]; [4, 5]]")
+    assert i._variables["a"].val._lu is None
+    assert i.eval_string("det(A)") == "6.0"
+
+
+def test_submatrix_builtin():
+    i = Interpreter()
+    i.eval_string("A = [[1, 2, 3]; [4, 5, 6]; [7, 8, 9]]")
+    assert i.eval_string("sub(A, 2, 3)") == "[ 4, 5, 6 ]\n[ 7, 8, 9 ]"
+    assert i.eval_string("sub(A, 1, 3, 2, 2)") == "[ 2 ]\n[ 5 ]\n[ 8 ]"
+    assert i.eval_string("sub(transp(A), 1, 2, 2, 3)") == "[ 4, 7 ]\n[ 5, 8 ]"
+    assert i.eval_string("sub(A, 1, 1) * 2 + 1") == "[ 3, 5, 7 ]"
+    assert i.eval_string("transp(A) ** sub(A, 1, 3, 1, 1)") == "[ 66 ]\n[ 78 ]\n[ 90 ]"
+    for bad in ("sub(A, 1)", "sub(A, 1, 2, 3)", "sub(A, 0, 1)", "sub(A, 2, 1)", "sub(A, 1, 4)",
+                "sub(A, 1.5, 2)", "sub(1, 1, 1)", "solve(A)", "solve(A, A, A)"):
+        with pytest.raises(BadFunctionInput):
+            i.eval_string(bad)
+    assert i._functions["sub"].arg_counts == (3, 5)
+    assert str(i._functions["sub"]) == "sub(m, r1, r2, c1, c2)"
+    assert str(i._functions["solve"]) == "solve(a, b)"
+    assert str(i._functions["inv"]) == "inv(x)"
+
+
+def test_fused_matrix_expression():
+    import operator
+    from math_types.lazy_matrix import LazyMatrix, apply
+    from exceptions.math_exceptions import WrongMatrixDimension
+    i = Interpreter()
+    i.eval_string("A = [[1, 2]; [3, 4]]")
+    i.eval_string("B = [[0.5, 1]; [2, 4]]")
+    assert i.eval_string("A * 2 + B - A / 4") == "[ 2.25, 4.5 ]\n[ 7.25, 11.0 ]"
+    assert i.eval_string("(A + 1) ** A - 1") == "[ 10, 15 ]\n[ 18, 27 ]"
+    assert i.eval_string("2 * A % 3") == "[ 2, 1 ]\n[ 0, 2 ]"
+    assert isinstance(apply(Number(2), operator.mul, Matrix(1, 1, [[Number(1)]])), LazyMatrix)
+    with pytest.raises(MathZeroDivisionError):
+        i.eval_string("A / 0 + 1")
+    with pytest.raises(MathZeroDivisionError):  # error of deferred division is reported first
+        i.eval_string("A / 0 + 2 % A")
+    with pytest.raises(WrongMatrixDimension):
+        i.eval_string("A * 2 + [[1, 2, 3]]")
+
+    big = Matrix(12, 12, [[Number((r * 12 + c) % 7 - 3) for c in range(12)] for r in range(12)])
+    body = [big, Operator("*"), Number(3), Operator("-"), big, Operator("%"), Number(5), Operator("+"),
+            big, Operator("/"), Number(0.5), Operator("+"), Number(3)]
+    expr = Expression(body, preprocess=False)
+    values = expr.body
+    fused = Expression._run_matrix_program(expr.compile(), values)
+    assert fused._array is not None
+    assert str(fused) == str(Expression._run_program(expr.compile(), values))
+
+
+def test_sparse_builtins():
+    from math_types import sparse_matrix
+    i = Interpreter()
+    i.eval_string("A = [[2, 0, 0]; [0, 0, 1]; [0, 3, 0]]")
+    i.eval_string("S = sparse(A)")
+    assert isinstance(i._variables["s"].val, SparseMatrix)
+    assert i.eval_string("S") == i.eval_string("A")
+    assert i.eval_string("S ** S * 2") == "[ 8, 0, 0 ]\n[ 0, 6, 0 ]\n[ 0, 0, 6 ]"
+    assert i.eval_string("transp(S) + A") == "[ 4, 0, 0 ]\n[ 0, 0, 4 ]\n[ 0, 4, 0 ]"
+    assert i.eval_string("det(S)") == i.eval_string("det(A)")
+    i.eval_string("Q = S ^ 3")
+    assert isinstance(i._variables["q"].val, SparseMatrix)
+    assert i.eval_string("Q") == i.eval_string("A ^ 3") and i.eval_string("S ^ -1") == i.eval_string("inv(A)")
+    i.eval_string("X = solve(S, [[2]; [1]; [3]])")
+    assert i._variables["x"].val == Matrix(3, 1, [[Number(1.0)]] * 3)
+    i.eval_string("D = dense(S)")
+    assert isinstance(i._variables["d"].val, Matrix)
+    i.eval_string("P = [{}]".format("; ".join("[{}]".format(", ".join("1" if r == c else "0" for c in range(10)))
+                                              for r in range(10))))
+    assert isinstance(i._variables["p"].val, SparseMatrix)
+    assert sparse_matrix.auto_sparse(i._variables["a"].val) is i._variables["a"].val
+    # automatically converted results are accepted wherever matrix is expected
+    i.eval_string("Q = sub(P, 2, 3)")
+    assert isinstance(i._variables["q"].val, SparseMatrix)
+    assert i.eval_string("Q") == i.eval_string("sub(eye(10), 2, 3)")
+    assert i.eval_string("sub(P, 2, 3, 2, 4)") == "[ 1, 0, 0 ]\n[ 0, 1, 0 ]"
+    assert i.eval_string("diag(P)") == i.eval_string("eye(10)")
+    assert i.eval_string("diag(S)") == "[ 2, 0, 0 ]\n[ 0, 0, 0 ]\n[ 0, 0, 0 ]"
+    assert i.eval_string("diag(sparse([[1, 0, 3]]))") == "[ 1, 0, 0 ]\n[ 0, 0, 0 ]\n[ 0, 0, 3 ]"
+    i.eval_string("X = [[{}]]".format(", ".join(["1"] + ["0"] * 199)))
+    i.eval_string("Y = [[{}]]".format(", ".join(["3"] + ["1"] * 199)))
+    assert isinstance(i._variables["x"].val, SparseMatrix)
+    assert i.eval_string("linreg(X, Y, noplot)") == "[ 1.0 ]\n[ 2.0 ]"
+    with pytest.raises(BadFunctionInput):
+        i.eval_string("diag(sparse([[1, 0]; [0, 1]; [1, 1]]))")
+    with pytest.raises(BadFunctionInput):
+        i.eval_string("sparse(1)")
+
+
+def test_eye_and_diag_builtins():
+    i = Interpreter()
+    assert i.eval_string("eye(2)") == "[ 1, 0 ]\n[ 0, 1 ]"
+    assert i.eval_string("diag([[1, 2]])") == "[ 1, 0 ]\n[ 0, 2 ]"
+    assert i.eval_string("diag([[1, 2]; [3, 4]])") == "[ 1, 0 ]\n[ 0, 4 ]"
+    assert i.eval_string("diag([[1.5]; [2.5]]) ^ 2") == "[ 2.25, 0.0 ]\n[ 0.0, 6.25 ]"
+    assert i.eval_string("eye(2) ** [[1, 2]; [3, 4]]") == "[ 1, 2 ]\n[ 3, 4 ]"
+    assert i.eval_string("inv(diag([[2, 4]]))") == "[ 0.5, 0.0 ]\n[ 0.0, 0.25 ]"
+    assert i.eval_string("det(diag([[2, 4, 5]]))") == "40.0"
+    i.eval_string("E = eye(20)")
+    assert isinstance(i._variables["e"].val, Matrix)
+    for bad in ("eye(0)", "eye(1.5)", "eye([[1]])", "diag([[1, 2]; [3, 4]; [5, 6]])"):
+        with pytest.raises(BadFunctionInput):
+            i.eval_string(bad)
+
+
+def test_streaming_linreg(tmp_path):
+    import os
+    import subprocess
+    import sys
+    import numpy as np
+    from math_types.regression import LinearRegression
+    i = Interpreter()
+    i.eval_string("X = [[1, 2, 3, 4]]")
+    i.eval_string("Y = [[2, 4.1, 5.9, 8]]")
+    assert i.eval_string("linreg(X, Y, noplot)") == "[ 0.04999999999999982 ]\n[ 1.98 ]"
+    for bad in ("linreg(X, Y, plot)", "linreg(X, [[1, 2]], noplot)", "linreg([[1, 1]], [[1, 2]], noplot)"):
+        with pytest.raises(WrongSpecialCommandUse):
+            i.eval_string(bad)
+    rng = np.random.default_rng(0)
+    x = rng.uniform(1e3, 1e3 + 1, 1000)
+    y = 3 * x + 1 + rng.normal(0, 0.01, 1000)
+    slope, intercept = np.polyfit(x - 1e3, y, 1)
+    expected = (intercept - slope * 1e3, slope)
+    row = Matrix(1, 1000, [[Number(float(val)) for val in x]])
+    assert np.allclose(LinearRegression.from_matrices(row, Matrix(1, 1000, [[Number(float(val)) for val in y]]),
+                                                      chunk_size=64).coefficients(), expected)
+    np.save(tmp_path / "points.npy", np.stack([x, y], axis=1))
+    assert np.allclose(LinearRegression.from_file(str(tmp_path / "points.npy"), 100).coefficients(), expected)
+    (tmp_path / "points.csv").write_text("x,y\n" + "".join("{!r},{!r}\n".format(float(a), float(b)) for a, b in zip(x, y)))
+    regression = LinearRegression.from_file(str(tmp_path / "points.csv"), 300)
+    assert regression.n == 1000 and np.allclose(regression.coefficients(), expected)
+    for text in ("1,2,3\n4,5\n6,7\n", "x,y,z\n4,5\n6,7\n", "4,5\n6,7,8\n", "x,y\n4,5\nx,y\n"):
+        (tmp_path / "bad.csv").write_text(text)
+        with pytest.raises(WrongSpecialCommandUse):
+            LinearRegression.from_file(str(tmp_path / "bad.csv"))
+
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "computorV2.py")
+    for chunk_size, returncode in (("300", 0), ("0", 2), ("-5", 2), ("x", 2)):
+        result = subprocess.run([sys.executable, script, "--linreg", str(tmp_path / "points.csv"),
+                                 "--chunk-size", chunk_size], capture_output=True, text=True)
+        assert result.returncode == returncode
+    assert "--chunk-size: should be positive integer, got 'x'" in result.stderr
+
+
+def test_least_squares_fits():
+    import numpy as np
+    from math_types import least_squares
+    i = Interpreter()
+    i.eval_string("X = [[1, 2, 3, 4, 5]]")
+    i.eval_string("Y = [[1, 4.1, 9.2, 15.8, 25.1]]")
+    expected = np.polyfit([1, 2, 3, 4, 5], [1, 4.1, 9.2, 15.8, 25.1], 2)[::-1]
+    i.eval_string("C = polyfit(X, Y, 2)")
+    assert np.allclose([row[0].val for row in i._variables["c"].val.matrix], expected)
+    assert i.eval_string("polyfit(X, Y, 0)") == "[ 11.04 ]"
+    res = i.eval_string("linfit([[1, 2]; [2, 1]; [3, 3]; [4, 0]], [[5]; [4]; [9]; [4]])")
+    assert np.allclose([float(line.strip("[ ]")) for line in res.split("\n")], [0, 1, 2], atol=1e-12)
+    for bad in ("polyfit(X, Y)", "polyfit(X, Y, 1.5)", "polyfit(X, Y, 5)", "polyfit([[1, 1, 1, 2]], [[1, 2, 3, 4]], 2)",
+                "polyfit(X, [[1, 2]], 1)", "linfit(X, Y, 3)", "linfit([[1, 2]; [3, 4]], [[1, 2]], plot)",
+                "a = vars()", "2 * polyfit(X, Y, 1)"):
+        with pytest.raises(WrongSpecialCommandUse):
+            i.eval_string(bad)
+
+    # x around 10^5 makes X^T * X ill-conditioned, QR keeps precision
+    x = np.array([240000, 139800, 150500, 185530, 176000, 114800, 166800, 89000, 144500, 84000, 82029, 63060,
+                  74000, 97500, 67000, 76025, 48235, 93000, 60949, 65674, 54000, 68500, 22899, 61789])
+    y = 8000 - 0.02 * x + 3e-8 * x ** 2 + np.arange(24) % 5
+    row = lambda values: Matrix(1, len(values), [[Number(float(val)) for val in values]])
+    assert np.allclose(least_squares.polyfit(row(x), row(y), 2, block_rows=5), np.polyfit(x, y, 2)[::-1])
+    rng = np.random.default_rng(0)
+    features = rng.uniform(1e5, 2e5, (1000, 3))
+    values = 5 + features @ [1, -2, 0.5] + rng.normal(0, 1, 1000)
+    design = Matrix(1000, 3, [[Number(float(val)) for val in point] for point in features])
+    expected = np.linalg.lstsq(np.column_stack((np.ones(1000), features)), values, rcond=None)[0]
+    assert np.allclose(least_squares.linfit(design, row(values), block_rows=64), expected)
+
+
+def test_adaptive_plot_sampling():
+    import numpy as np
+    from math_types.commands import evaluate_points
+    from math_types.plot_sampling import adaptive_sample
+    i = Interpreter()
+    i.eval_string("f(x) = x ^ 2")
+    i.eval_string("g(x) = log(x)")
+    functions = i._functions
+    x, y, count = adaptive_sample(lambda xs: evaluate_points(functions["f"], xs, functions), -3, 3, 1e-3)
+    assert count == len(x) < 1000 and np.all(np.diff(x) > 0) and x[0] == -3 and x[-1] == 3
+    assert np.allclose(y, x ** 2)
+    dense = np.linspace(-3, 3, 10001)
+    assert np.abs(np.interp(dense, x, y) - dense ** 2).max() <= 9 * 1e-3
+    # more points are taken where function bends
+    assert adaptive_sample(np.sin, -10, 10, 1e-4)[2] > adaptive_sample(np.sin, -10, 10, 1e-2)[2]
+    x, y, _ = adaptive_sample(lambda xs: evaluate_points(functions["g"], xs, functions), -2, 2)
+    assert np.isnan(y[x <= 0]).all() and np.isfinite(y[x > 0]).all()
+    assert 0 < x[x > 0].min() < 4 / 32 / 2 ** 10
+    for bad in ("plot(f(x), 1)", "plot(f(x), 1, 2, 0)", "plot(f(x), 1, 2, 3, 4)", "plot(g(x), -2, -1)"):
+        with pytest.raises(WrongSpecialCommandUse):
+            i.eval_string(bad)
+
+
+def test_headless_plots(tmp_path, monkeypatch):
+    import os
+    import subprocess
+    import sys
+    from math_types import plot_renderer
+    renderer = plot_renderer.HeadlessRenderer(str(tmp_path / "plots"), "svg")
+    previous = plot_renderer.use(renderer)
+    try:
+        i = Interpreter()
+        i.eval_string("f(x) = x ^ 2")
+        first = i.eval_string("plot(f(x), -1, 1)")
+        second = i.eval_string("linreg([[1, 2, 3]], [[2, 4, 7]])")
+        assert i.eval_string("linfit([[1, 2, 3]], [[2, 4, 7]], plot)").startswith("[ -0.666666666666")
+        renderer.wait()
+    finally:
+        plot_renderer.use(previous)
+    assert first == str(tmp_path / "plots" / "0001_plot.svg")
+    assert second == str(tmp_path / "plots" / "0002_linreg.svg")
+    assert sorted(path.name for path in (tmp_path / "plots").iterdir()) == \
+        ["0001_plot.svg", "0002_linreg.svg", "0003_linfit.svg"]
+    assert "<svg" in (tmp_path / "plots" / "0003_linfit.svg").read_text()
+    with pytest.raises(ValueError):
+        plot_renderer.HeadlessRenderer(str(tmp_path), "gif")
+
+    monkeypatch.setenv(plot_renderer.PLOT_DIR_VARIABLE, str(tmp_path))
+    monkeypatch.setenv(plot_renderer.PLOT_FORMAT_VARIABLE, "gif")
+    previous = plot_renderer.use(None)
+    try:
+        with pytest.raises(WrongSpecialCommandUse):
+            Interpreter().eval_string("plot(x, -1, 1)")
+    finally:
+        plot_renderer.use(previous)
+    script = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "computorV2.py")
+    result = subprocess.run([sys.executable, script], capture_output=True, text=True)
+    assert result.returncode == 2 and "invalid $COMPUTOR_PLOT_FORMAT value: 'gif'" in result.stderr
+
+
+def test_startup_doesnt_load_heavy_modules():
+    import os
+    import subprocess
+    import sys
+    code = ("import sys\n"
+            "from interpreter import Interpreter\n"
+            "i = Interpreter()\n"
+            "i.eval_string('f(x) = x ^ 2 + 1')\n"
+            "print(i.eval_string('f(2) * [[1, 2]]'))\n"
+            "print(*(name for name in ('numpy', 'matplotlib') if type(sys.modules.get(name)).__name__ == 'module'))\n"
+            "print(i.eval_string('vars()').split()[0])\n"
+            "print(type(sys.modules['numpy']).__name__)\n")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+    # special commands and arrays load NumPy on first use
+    assert output.split("\n")[:4] == ["[ 5, 10 ]", "", "pi", "module"]
+
+
+def test_progressive_plot_windows(monkeypatch):
+    import numpy as np
+    from math_types import plot_renderer
+    from math_types.plot_sampling import adaptive_sample
+    levels = []
+    _, _, count = adaptive_sample(np.sin, -10, 10, 1e-4, on_level=lambda x, y: levels.append(len(x)))
+    assert levels[0] == 33 and levels == sorted(levels) and levels[-1] < count
+
+    class RecordingRenderer:
+        progressive = True
+
+        def __init__(self):
+            self.rendered = []
+
+        def render(self, name, calls, final=True):
+            self.rendered.append((name, len(calls[0][1][0]), final))
+
+        def cancel(self):
+            pass
+
+    recording = RecordingRenderer()
+    previous = plot_renderer.use(recording)
+    try:
+        i = Interpreter()
+        i.eval_string("f(x) = sin(x) * 10")
+        i.eval_string("plot(f(x), -10, 10)")
+    finally:
+        plot_renderer.use(previous)
+    # coarse plot is shown at once, then it's replaced by refined ones
+    assert len(recording.rendered) > 2 and recording.rendered[0] == ("plot", 33, False)
+    assert [final for _, _, final in recording.rendered] == [False] * (len(recording.rendered) - 1) + [True]
+    assert [points for _, points, _ in recording.rendered] == sorted(points for _, points, _ in recording.rendered)
+
+    monkeypatch.setenv("MPLBACKEND", "Agg")  # plot process inherits environment
+    renderer = plot_renderer.WindowRenderer()
+    previous = plot_renderer.use(renderer)
+    try:
+        i.eval_string("plot(f(x), -10, 10)")
+        i.eval_string("linreg([[1, 2, 3]], [[2, 4, 7]])")
+        assert renderer.count == 2
+        process = renderer._process
+        assert process.is_alive()
+    finally:
+        plot_renderer.use(previous)
+        renderer.close()
+    assert process.exitcode == 0
+
+
+def test_aborted_progressive_plot(monkeypatch):
+    import queue
+    from math_types import commands, plot_renderer
+
+    class AliveProcess:
+        def is_alive(self):
+            return True
+
+    renderer = plot_renderer.WindowRenderer()
+    renderer._process, renderer._requests = AliveProcess(), queue.Queue()
+    evaluate_points = commands.evaluate_points
+    batches = []
+
+    def interrupted(func, xs, functions):
+        batches.append(len(xs))
+        if len(batches) == 3:
+            raise KeyboardInterrupt
+        return evaluate_points(func, xs, functions)
+
+    previous = plot_renderer.use(renderer)
+    try:
+        i = Interpreter()
+        i.eval_string("f(x) = sin(x) * 10")
+        monkeypatch.setattr(commands, "evaluate_points", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            i.eval_string("plot(f(x), -10, 10)")
+        monkeypatch.setattr(commands, "evaluate_points", evaluate_points)
+        i.eval_string("plot(f(x), -10, 10)")
+    finally:
+        plot_renderer.use(previous)
+    # aborted plot keeps its window, next plot gets new one
+    ids = [renderer._requests.get()[0] for _ in range(renderer._requests.qsize())]
+    assert ids[:2] == [1, 1] and set(ids[2:]) == {2} and renderer.count == 2
@@ -1,6 +1,7 @@
 from math_types import *
 import pytest
 from exceptions.math_exceptions import *
+from exceptions.evaluation_exceptions import MatrixIsNonInvertible
 
 
 def test1():
@@ -286,8 +287,8 @@ def test72():
 
 
 def test73():
-    with pytest.raises(OperationIsNotSupported):
-        M1 ^ Number(-1)
+    assert M1 ^ Number(-1) == M1.invert_matrix()
+    assert M1 ^ Number(-3) == M1.invert_matrix() ** M1.invert_matrix() ** M1.invert_matrix()
 
 
 def test74():
@@ -347,3 +348,165 @@ def test85():
 def test86():
     with pytest.raises(ZeroDivisionError):
         Matrix(1, 2, [[Number(2), Number(3)]]) / Matrix(1, 2, [[Number(5), Number(0)]])
+
+
+def test_dispatch_table():
+    from math_types.math_primitive import DISPATCH_TABLE
+    assert DISPATCH_TABLE[Number, "+", ComplexNumber] is ComplexNumber.add_to_num
+    assert DISPATCH_TABLE[ComplexNumber, "%", Number] is None
+    with pytest.raises(OperationIsNotSupported):
+        ComplexNumber(2, 1) % Number(2)
+    with pytest.raises(OperationIsNotSupported):
+        Number(2) + Variable("x")
+    assert DISPATCH_TABLE[Number, "+", Variable] is None
+
+
+def test_interned_constants():
+    from copy import deepcopy
+    assert Number(3) is Number(3) and Number(-1) is Number(-1)
+    assert Number(3.0) is not Number(3) and Number(1000) is not Number(1000)
+    assert Operator("(") is Operator("(")
+    assert deepcopy([Number(2.5), Operator("*")])[1] is Operator("*")
+    assert not hasattr(Number(2.5), "__dict__") and not hasattr(Matrix(1, 1, [[Number(1)]]), "__dict__")
+
+
+def big_matrix(n, element):
+    return Matrix(n, n, [[element(i, j) for j in range(n)] for i in range(n)])
+
+
+def test_array_storage():
+    a = big_matrix(10, lambda i, j: Number(i - j))
+    b = big_matrix(10, lambda i, j: Number(i * j + 1))
+    res = a * b + Number(1)
+    assert res._array is not None
+    assert res.matrix[2][3] == Number(-6) and type(res.matrix[2][3].val) is int
+    assert res._array is None
+    assert str(a / Number(2)).startswith("[ 0.0, -0.5, -1.0")
+    assert str(a ** b) == str(Matrix(10, 10, a.matrix) ** Matrix(10, 10, b.matrix))
+    assert a.transpose_matrix().matrix[0][1] == Number(1)
+    with pytest.raises(ZeroDivisionError):
+        a / a
+
+
+def test_array_storage_fallback(monkeypatch):
+    from math_types import array_storage
+    big = big_matrix(10, lambda i, j: Number(10 ** 6 + i))
+    square = big ** big
+    assert square._array is not None
+    cube = square ** big
+    assert cube._array is None  # doesn't fit into float64 exactly
+    monkeypatch.setattr(array_storage, "ARRAY_THRESHOLD", 1000)
+    assert str(cube) == str(big_matrix(10, lambda i, j: Number(10 ** 6 + i)) ** big ** big)
+    mixed = big_matrix(10, lambda i, j: Number(1.5) if i else Number(1))
+    assert str((mixed * Number(2)).matrix[0][0]) == "2"
+    c = big_matrix(10, lambda i, j: ComplexNumber(1.5, -0.0))
+    assert str((c * Number(0)).matrix[0][0]) == str(ComplexNumber(1.5, -0.0) * Number(0))
+
+
+def test_power_by_squaring():
+    c = ComplexNumber(1, 1)
+    assert c ^ Number(3) == c * c * c
+    assert c ^ Number(10) == ComplexNumber(0, 32)
+    m = Matrix(2, 2, [[Number(1), Number(1)], [Number(1), Number(0)]])
+    assert str(m ^ Number(30)) == "[ 1346269, 832040 ]\n[ 832040, 514229 ]"
+    with pytest.raises(MatrixIsNonInvertible):
+        Matrix(2, 2, [[Number(1), Number(2)], [Number(2), Number(4)]]) ^ Number(-2)
+
+
+def test_matmul_kernel(monkeypatch):
+    from math_types import matmul_kernel
+    a = big_matrix(9, lambda i, j: Number(i - 2 * j))
+    b = big_matrix(9, lambda i, j: Number(i * j % 7 + 0.5))
+    expected = Matrix(9, 9, [[Matrix._calc_matrix_matmul_elem(a.matrix, b.matrix, i, j) for j in range(9)] for i in range(9)])
+    assert str(a ** b) == str(expected)
+    monkeypatch.setattr(matmul_kernel, "STRASSEN_THRESHOLD", 2)
+    assert a ** b == expected
+    assert str(a ** a) == str(Matrix(9, 9, [[Matrix._calc_matrix_matmul_elem(a.matrix, a.matrix, i, j) for j in range(9)]
+                                           for i in range(9)]))
+    mixed = Matrix(1, 2, [[Number(1), ComplexNumber(1.0, 2.0)]])
+    assert matmul_kernel.matmul(mixed.matrix, [[Number(2)], [Number(3)]]) is None
+    assert str(mixed ** Matrix(2, 1, [[Number(2)], [Number(3)]])) == "[ 5.0 + 6.0i ]"
+
+
+def test_matrix_views():
+    import numpy as np
+    from math_types.matrix_view import MatrixView
+    m = Matrix(2, 3, [[Number(1), Number(2), Number(3)], [Number(4), Number(5), Number(6)]])
+    t = m.transpose_matrix()
+    assert isinstance(t._matrix, MatrixView)
+    assert t._read_rows()[2][1] is m.matrix[1][2]
+    assert str(t) == "[ 1, 4 ]\n[ 2, 5 ]\n[ 3, 6 ]"
+    block = t.submatrix(range(1, 3), range(0, 1))
+    assert str(block) == "[ 2 ]\n[ 3 ]"
+    assert str(block.transpose_matrix() * Number(2)) == "[ 4, 6 ]"
+    assert t ** m == Matrix(3, 3, [[Number(17), Number(22), Number(27)], [Number(22), Number(29), Number(36)],
+                                   [Number(27), Number(36), Number(45)]])
+    assert t - t == t * Number(0)
+    t.matrix[0][0] = Number(10)  # modification materializes view
+    assert str(m.matrix[0][0]) == "1"
+    big = big_matrix(10, lambda i, j: Number(i * 10 + j))
+    big.as_array()
+    assert np.shares_memory(big.transpose_matrix()._array, big._array)
+    assert str(big.submatrix(range(2, 3), range(4, 7))) == "[ 24, 25, 26 ]"
+
+
+def test_sparse_matrix():
+    a = big_matrix(4, lambda i, j: Number(i + 1) if i == j else Number(0))
+    b = big_matrix(4, lambda i, j: Number(j) if i == 0 else Number(0))
+    sa, sb = SparseMatrix.from_dense(a), SparseMatrix.from_dense(b)
+    assert sa.data == [Number(1), Number(2), Number(3), Number(4)] and sa.indptr == [0, 1, 2, 3, 4]
+    assert str(sa) == str(a) and sa.to_dense() == a
+    for res, expected in ((sa + sb, a + b), (sa - sb, a - b), (sa * sb, a * b), (sa ** sb, a ** b),
+                          (sa * Number(3), a * Number(3)), (Number(2) * sa, Number(2) * a), (sa ^ Number(3), a ^ Number(3)),
+                          (sa % Number(2), a % Number(2)), (sb.transpose_matrix(), b.transpose_matrix())):
+        assert isinstance(res, SparseMatrix) and res == expected
+    for res, expected in ((sa + Number(1), a + Number(1)), (sa ** b, a ** b), (a ** sb, a ** b),
+                          (sa - b, a - b), (sa ^ Number(-1), a ^ Number(-1))):
+        assert isinstance(res, Matrix) and res == expected
+    assert isinstance(sa * b, SparseMatrix) and sa * b == a * b
+    assert (sa - sa).data == []
+    with pytest.raises(ZeroDivisionError):
+        sa / Number(0)
+    with pytest.raises(WrongMatrixDimension):
+        sa ** SparseMatrix.from_dense(Matrix(1, 2, [[Number(1), Number(0)]]))
+    n = 30
+    tridiagonal = big_matrix(n, lambda i, j: Number(4) if i == j else Number(-1) if abs(i - j) == 1 else Number(0))
+    rhs = Matrix(n, 1, [[Number(i % 5)] for i in range(n)])
+    assert SparseMatrix.from_dense(tridiagonal).solve(rhs) == tridiagonal.solve(rhs)
+
+
+def test_matrix_structure():
+    import numpy as np
+    from math_types import matrix_structure
+    from math_types.matrix_structure import IDENTITY, DIAGONAL, UPPER, LOWER, SYMMETRIC
+    upper = Matrix(3, 3, [[Number(2), Number(1), Number(1)], [Number(0), Number(3), Number(1)],
+                          [Number(0), Number(0), Number(4)]])
+    assert upper.structure == {UPPER}
+    assert upper.transpose_matrix().structure == {LOWER}
+    assert big_matrix(3, lambda i, j: Number(i + j)).structure == {SYMMETRIC}
+    assert Matrix(1, 2, [[Number(1), Number(0)]]).structure == set()
+    identity = Matrix.identity(12)
+    assert identity.structure == {IDENTITY, DIAGONAL, UPPER, LOWER, SYMMETRIC}
+    d = Matrix.diagonal([Number(2), Number(3), Number(4)])
+    assert DIAGONAL in d.structure and IDENTITY not in d.structure
+    general = big_matrix(3, lambda i, j: Number(i * 3 + j + 1))
+    for a, b in ((d, general), (general, d), (d, d)):
+        expected = Matrix(3, 3, [[Matrix._calc_matrix_matmul_elem(a.matrix, b.matrix, i, j) for j in range(3)]
+                                 for i in range(3)])
+        assert str(a ** b) == str(expected)
+    x = big_matrix(12, lambda i, j: Number(i - j + 0.5))
+    assert (identity ** x)._array is x.as_array()[0]
+    assert str(d ^ Number(3)) == "[ 8, 0, 0 ]\n[ 0, 27, 0 ]\n[ 0, 0, 64 ]"
+    assert d ^ Number(-2) == Matrix.diagonal([Number(0.25), Number(1 / 9), Number(1 / 16)])
+    assert np.shares_memory((identity ^ Number(5))._array, identity._array)
+    assert matrix_structure.power(Matrix.diagonal([Number(1e200), Number(1.0)]), 2) is None
+    assert upper.lu_decomposition().triangle == UPPER
+    assert upper.determinant() == Number(24)
+    assert str(upper.transpose_matrix().invert_matrix()) == \
+        "[ 0.5, 0.0, 0.0 ]\n[ -0.16666666666666666, 0.3333333333333333, 0.0 ]\n[ -0.08333333333333333, " \
+        "-0.08333333333333333, 0.25 ]"
+    with pytest.raises(MatrixIsNonInvertible):
+        Matrix.diagonal([Number(1), Number(0)]).invert_matrix()
+    m = Matrix.diagonal([Number(2), Number(3)])
+    m.matrix[0][1] = Number(1)  # modification drops structure
+    assert m.structure == {UPPER}
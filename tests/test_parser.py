@@ -1,4 +1,9 @@
 from parsing.parser import Parser
+from parsing.pratt_parser import PrattParser
+from parsing.ast_nodes import Const, Var, Neg, BinOp, ImplicitMul, Call, MatrixLiteral, Statement
+from parsing.ast_adapter import lower, lower_statement
+from parsing.parse_cache import ParseCache
+from exceptions import ParsingError
 from math_types import *
 from exceptions.parsing_exceptions import *
 import pytest
@@ -184,3 +189,69 @@ def test24():
     print(res)
     for i, elem in enumerate(res):
         assert elem == out[i]
+
+
+pp = PrattParser()
+
+
+def test_pratt1():
+    assert pp.parse(("1", "+", "2", "*", "3")) == BinOp("+", Const(Number(1)), BinOp("*", Const(Number(2)), Const(Number(3))))
+
+
+def test_pratt2():
+    assert pp.parse(("4", "-", "2", "-", "1")) == BinOp("-", BinOp("-", Const(Number(4)), Const(Number(2))), Const(Number(1)))
+
+
+def test_pratt3():
+    assert pp.parse(("2", "x", "^", "2")) == ImplicitMul(Const(Number(2)), BinOp("^", Var("x"), Const(Number(2))))
+
+
+def test_pratt4():
+    assert pp.parse(("-", "2", "^", "2")) == BinOp("^", Neg(Const(Number(2))), Const(Number(2)))
+
+
+def test_pratt5():
+    inp = ("f", "(", "(", "2", "+", "3", ")", "*", "x", ",", "[", "[", "1", ",", "4", "i", "]", "]", ")")
+    out = Call("f", (BinOp("*", BinOp("+", Const(Number(2)), Const(Number(3))), Var("x")),
+                     MatrixLiteral(((Const(Number(1)), ImplicitMul(Const(Number(4)), Const(ComplexNumber(0, 1)))),))))
+    assert pp.parse(inp) == out
+
+
+def test_pratt6():
+    with pytest.raises(MatrixDiffElems):
+        pp.parse(("[", "[", "0", ",", "1", "]", ";", "[", "13.5", "]", "]"))
+
+
+def test_pratt7():
+    for inp in (("2", "+"), ("-", "-", "2"), ("(", "2"), ("2", "3"), ("2", "sin", "(", "x", ")")):
+        with pytest.raises(ParsingError):
+            pp.parse(inp)
+
+
+def test_pratt_lowering():
+    node = pp.parse(("(", "1", "-", "x", ")", "*", "-", "y", "^", "2", "-", "(", "2", "-", "3", ")"))
+    out = [Operator("("), Number(1), Operator("-"), Variable("x"), Operator(")"), Operator("*"),
+           Operator("-"), Variable("y"), Operator("^"), Number(2),
+           Operator("-"), Operator("("), Number(2), Operator("-"), Number(3), Operator(")")]
+    assert lower(node) == out
+
+
+def test_pratt_statement():
+    statement = pp.parse_statement(("f", "(", "x", ")", "=", "-", "(", "x", "+", "1", ")", "?"))
+    assert statement == Statement((Call("f", (Var("x"),)), Neg(BinOp("+", Var("x"), Const(Number(1))))), True)
+    assert lower_statement(statement)[1:] == [Operator("="), Operator("-"), Operator("("), Variable("x"),
+                                              Operator("+"), Number(1), Operator(")"), Operator("?")]
+    assert pp.parse_statement(("=", "2")) == Statement((None, Const(Number(2))), False)
+
+
+def test_parse_cache():
+    cache = ParseCache(capacity=4)
+    assert cache.normalize("  X =\t2 ") == "x = 2"
+    cache.put("a", 1, 2)
+    cache.put("b", 2, 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3, 1)
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    cache.put("d", 4, 5)
+    assert (cache.hits, cache.misses, cache.evictions, cache.size) == (2, 1, 1, 3)
@@ -1,4 +1,4 @@
-from parsing.tokenizer import Tokenizer
+from parsing.tokenizer import Tokenizer, Token
 import pytest
 from exceptions.parsing_exceptions import UnknownToken
 
@@ -77,3 +77,20 @@ def test25():
 def test26():
     with pytest.raises(UnknownToken):
         t.tokenize("hello_world = 2")
+
+def test27():
+    with pytest.raises(UnknownToken):
+        t.tokenize("2 + 3 $ 4")
+
+def test28():
+    assert t.tokenize("2.5.1 ** X") == ["2.5.1", "**", "x"]
+
+def test_scan1():
+    assert list(t.scan("fA(x) = 2**x")) == [Token("name", "fa", 0, 2), Token("operator", "(", 2, 3),
+                                            Token("name", "x", 3, 4), Token("operator", ")", 4, 5),
+                                            Token("operator", "=", 6, 7), Token("number", "2", 8, 9),
+                                            Token("operator", "**", 9, 11), Token("name", "x", 11, 12)]
+
+def test_scan2():
+    with pytest.raises(UnknownToken):
+        list(t.scan("a = b & c"))
@@ -0,0 +1,57 @@
+from interpreter import Interpreter
+from exceptions.evaluation_exceptions import BadFunctionInput, NonNumericResult, FunctionNotExists
+import numpy as np
+import pytest
+
+
+def per_element(i, name, xs):
+    return np.array([float(i.eval_string("{}({})".format(name, x))) for x in xs])
+
+
+def test1():
+    i = Interpreter()
+    i.eval_string("f(x) = 2 * x ^ 2 - 3x + sin(x) / 4 + x % 3")
+    assert i._functions["f"].vectorized is not None
+    xs = np.linspace(-5, 5, 101)
+    assert np.allclose(i.evaluate_function_many("f", xs), per_element(i, "f", xs))
+
+
+def test2():
+    i = Interpreter()
+    i.eval_string("g(y) = exp(y) + abs(y)")
+    i.eval_string("f(x) = g(x) * cos(x) - tan(x) / 2")
+    xs = np.linspace(0, 2, 21)
+    assert np.allclose(i.evaluate_function_many("f", xs), per_element(i, "f", xs))
+
+
+def test3():
+    i = Interpreter()
+    i.eval_string("f(x) = x * 2 + i")
+    res = i.evaluate_function_many("f", [1, 2])
+    assert np.allclose(res, [2 + 1j, 4 + 1j])
+
+
+def test4():
+    # sqrt of negative number can't be vectorized, so it's evaluated one by one and fails
+    i = Interpreter()
+    i.eval_string("f(x) = sqrt(x)")
+    assert np.allclose(i.evaluate_function_many("f", [0, 4, 9]), [0, 2, 3])
+    with pytest.raises(BadFunctionInput):
+        i.evaluate_function_many("f", [4, -1])
+
+
+def test5():
+    i = Interpreter()
+    i.eval_string("f(x) = x * [[1, 2]]")
+    assert i._functions["f"].vectorized is None
+    with pytest.raises(NonNumericResult):
+        i.evaluate_function_many("f", [1])
+    with pytest.raises(FunctionNotExists):
+        i.evaluate_function_many("g", [1])
+
+
+def test6():
+    i = Interpreter()
+    i.eval_string("f(x) = 5")
+    assert np.allclose(i.evaluate_function_many("f", [1, 2, 3]), [5, 5, 5])
+    assert np.allclose(i.evaluate_function_many("sin", [0, 1]), [0, 0.841])